@@ -1,23 +1,47 @@
 # mypy: disable-error-code="attr-defined"
-from importlib import metadata
-
-from .core import AiohttpApiSpec, OpenApiVersion, setup_aiohttp_apispec
-from .decorators import (
-    cookies_schema,
-    docs,
-    form_schema,
-    headers_schema,
-    json_schema,
-    match_info_schema,
-    querystring_schema,
-    request_schema,
-    response_schema,
-)
-from .middlewares import validation_middleware
+"""
+aiohttp-apigami: API documentation and validation for aiohttp.
+
+Names are imported lazily on the first access, so the decorators and the validation middleware
+can be imported without the spec generation stack (apispec and its marshmallow plugin).
+"""
+
+from importlib import import_module
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from .core import AiohttpApiSpec, OpenApiVersion, setup_aiohttp_apispec
+    from .decorators import (
+        cookies_schema,
+        docs,
+        form_schema,
+        headers_schema,
+        json_schema,
+        match_info_schema,
+        querystring_schema,
+        request_schema,
+        response_schema,
+    )
+    from .handler_spec import HandlerSpec
+    from .metrics import ValidationMetrics
+    from .middlewares import validation_middleware
+    from .offload import OffloadPolicy
+    from .parser import request_json
+    from .process_pool import ValidationProcessPool
+    from .profiling import ValidationProfiler
+    from .response_validation import ResponseSampler
+
+    __version__: str
 
 __all__ = [
     "AiohttpApiSpec",
+    "HandlerSpec",
+    "OffloadPolicy",
     "OpenApiVersion",
+    "ResponseSampler",
+    "ValidationMetrics",
+    "ValidationProcessPool",
+    "ValidationProfiler",
     "__version__",
     "cookies_schema",
     "docs",
@@ -26,10 +50,53 @@ __all__ = [
     "json_schema",
     "match_info_schema",
     "querystring_schema",
+    "request_json",
     "request_schema",
     "response_schema",
     "setup_aiohttp_apispec",
     "validation_middleware",
 ]
 
-__version__ = metadata.version(__package__)
+# Modules of the public names
+_MODULES = {
+    "AiohttpApiSpec": ".core",
+    "OpenApiVersion": ".core",
+    "setup_aiohttp_apispec": ".core",
+    "cookies_schema": ".decorators",
+    "docs": ".decorators",
+    "form_schema": ".decorators",
+    "headers_schema": ".decorators",
+    "json_schema": ".decorators",
+    "match_info_schema": ".decorators",
+    "querystring_schema": ".decorators",
+    "request_schema": ".decorators",
+    "response_schema": ".decorators",
+    "HandlerSpec": ".handler_spec",
+    "ValidationMetrics": ".metrics",
+    "validation_middleware": ".middlewares",
+    "OffloadPolicy": ".offload",
+    "request_json": ".parser",
+    "ValidationProcessPool": ".process_pool",
+    "ValidationProfiler": ".profiling",
+    "ResponseSampler": ".response_validation",
+}
+
+
+def __getattr__(name: str) -> Any:
+    if name == "__version__":
+        # The package metadata lookup is slow, so it is done on demand
+        from importlib import metadata
+
+        value: Any = metadata.version(__name__)
+    elif name in _MODULES:
+        value = getattr(import_module(_MODULES[name], __name__), name)
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    # Cache it, so the next accesses don't call __getattr__
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted({*globals(), *__all__})
@@ -0,0 +1,85 @@
+"""
+Command line interface of aiohttp-apigami.
+
+Export the OpenAPI spec of an app, to be served with ``prebuilt_spec_path`` or used by other tools::
+
+    python -m aiohttp_apigami export myapp.main:create_app -o spec.json
+"""
+
+import argparse
+import asyncio
+import inspect
+import sys
+from collections.abc import Sequence
+from importlib import import_module
+from typing import Any
+
+from aiohttp import web
+
+from .export import dump_spec, export_spec, get_format, write_spec
+
+
+def load_app(target: str) -> web.Application:
+    """Import the app, or call the app factory, given as ``module:name``"""
+    module_name, _, name = target.partition(":")
+    if not module_name or not name:
+        raise ValueError(f"Invalid app {target!r}, expected `module:name`")
+
+    app: Any = import_module(module_name)
+    for attr in name.split("."):
+        app = getattr(app, attr)
+    if not isinstance(app, web.Application) and callable(app):
+        app = app()
+        if inspect.isawaitable(app):
+            app = asyncio.run(_await(app))
+    if not isinstance(app, web.Application):
+        raise ValueError(f"{target!r} is not an app or an app factory")
+    return app
+
+
+async def _await(awaitable: Any) -> Any:
+    return await awaitable
+
+
+def export(args: argparse.Namespace) -> int:
+    spec = export_spec(load_app(args.app))
+    data = dump_spec(spec, args.format or get_format(args.output), indent=args.indent)
+
+    if args.output is None:
+        sys.stdout.buffer.write(data)
+        return 0
+
+    digest = write_spec(args.output, data)
+    sys.stderr.write(f"Exported {len(spec.get('paths', {}))} paths to {args.output}, sha256 {digest}\n")
+    return 0
+
+
+def make_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m aiohttp_apigami", description="aiohttp-apigami tools")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = commands.add_parser("export", help="export the OpenAPI spec of an app set up with the extension")
+    export_parser.add_argument("app", help="app or app factory called without arguments, as `module:name`")
+    export_parser.add_argument(
+        "-o", "--output", help="spec file, with its content hash in a `.sha256` file next to it. Stdout by default"
+    )
+    export_parser.add_argument(
+        "--format", choices=("json", "yaml"), help="by the extension of the output file, JSON by default"
+    )
+    export_parser.add_argument("--indent", type=int, help="indent of the JSON spec, compact by default")
+    export_parser.set_defaults(handler=export)
+    return parser
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    args = make_parser().parse_args(argv)
+    try:
+        result: int = args.handler(args)
+    except (ImportError, AttributeError, ValueError, RuntimeError) as e:
+        sys.stderr.write(f"Error: {e}\n")
+        return 1
+    return result
+
+
+if __name__ == "__main__":
+    sys.exit(main())
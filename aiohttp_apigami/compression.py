@@ -0,0 +1,123 @@
+"""Precompressed response bodies with ``Accept-Encoding`` negotiation."""
+
+import gzip
+import hashlib
+from collections.abc import Mapping
+from dataclasses import dataclass, field
+
+from aiohttp import hdrs, web
+
+try:
+    import brotli  # type: ignore[import-untyped]
+
+except ImportError:  # pragma: no cover
+    brotli = None
+
+GZIP = "gzip"
+BROTLI = "br"
+
+GZIP_LEVEL = 9
+BROTLI_QUALITY = 9
+
+
+def available_encodings() -> tuple[str, ...]:
+    """Return supported content codings in order of preference."""
+    if brotli is None:
+        return (GZIP,)
+    return BROTLI, GZIP
+
+
+def compress_variants(data: bytes) -> dict[str, bytes]:
+    """
+    Build compressed variants of the data.
+
+    Variants which are not smaller than the original data are dropped.
+    """
+    variants = {}
+    for encoding in available_encodings():
+        if encoding == BROTLI:
+            compressed: bytes = brotli.compress(data, quality=BROTLI_QUALITY)
+        else:
+            compressed = gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+        if len(compressed) < len(data):
+            variants[encoding] = compressed
+    return variants
+
+
+def select_encoding(accept_encoding: str, available: Mapping[str, bytes | memoryview]) -> str | None:
+    """
+    Select the best available content coding for the ``Accept-Encoding`` header value.
+
+    Returns None if the identity representation should be used.
+    """
+    if not accept_encoding or not available:
+        return None
+
+    qualities: dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        coding, _, params = item.partition(";")
+        coding = coding.strip().lower()
+        quality = 1.0
+        name, _, value = params.partition("=")
+        if name.strip().lower() == "q":
+            try:
+                quality = float(value)
+            except ValueError:
+                quality = 0.0
+        if coding:
+            qualities[coding] = quality
+
+    wildcard = qualities.get("*", 0.0)
+    best: str | None = None
+    best_quality = 0.0
+    # Iterate in order of preference, so the first coding wins a tie
+    for encoding in available:
+        quality = qualities.get(encoding, wildcard)
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+@dataclass(frozen=True, slots=True, kw_only=True)
+class PrecompressedBody:
+    """Immutable response body with its ETag and precompressed variants, bytes or views of shared memory."""
+
+    body: bytes | memoryview
+    etag: str
+    variants: Mapping[str, bytes | memoryview] = field(default_factory=dict)
+
+    @classmethod
+    def from_bytes(cls, body: bytes, compress: bool = False) -> "PrecompressedBody":
+        return cls(
+            body=body,
+            etag=hashlib.sha256(body).hexdigest(),
+            variants=compress_variants(body) if compress else {},
+        )
+
+    def make_response(self, request: web.Request, content_type: str, cache_control: str) -> web.Response:
+        """Build a response for the request, negotiating the encoding and handling ``If-None-Match``."""
+        encoding = select_encoding(request.headers.get(hdrs.ACCEPT_ENCODING, ""), self.variants)
+        # Each content coding is a separate representation with its own strong ETag
+        etag = self.etag if encoding is None else f"{self.etag}-{encoding}"
+
+        if _etag_matches(request, etag):
+            response = web.Response(status=304)
+        else:
+            body = self.body if encoding is None else self.variants[encoding]
+            response = web.Response(body=body, content_type=content_type)
+            if encoding is not None:
+                response.headers[hdrs.CONTENT_ENCODING] = encoding
+
+        if self.variants:
+            response.headers[hdrs.VARY] = hdrs.ACCEPT_ENCODING
+        response.etag = etag
+        response.headers[hdrs.CACHE_CONTROL] = cache_control
+        return response
+
+
+def _etag_matches(request: web.Request, etag: str) -> bool:
+    """Check the ``If-None-Match`` header against the ETag (weak comparison)."""
+    if_none_match = request.if_none_match
+    if not if_none_match:
+        return False
+    return any(tag.value == etag or tag.value == "*" for tag in if_none_match)
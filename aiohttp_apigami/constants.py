@@ -1,17 +1,31 @@
-import uuid
+from typing import TYPE_CHECKING
 
 from aiohttp import web
-from webargs.aiohttpparser import AIOHTTPParser
+
+if TYPE_CHECKING:
+    from .core import AiohttpApiSpec
+    from .data import EncodedSpec
+    from .parser import ApigamiParser
+    from .validation import ValidationPlans
 
 # TODO: make it web.AppKey in 1.x release
 # Leave as a string for backward compatibility with 0.x
 SWAGGER_DICT = "swagger_dict"
 
-# TODO: make __apispec__ and __schemas__ typed objects in 1.x release
+# Handler attributes: the `HandlerSpec` and, for backward compatibility, the list of its validation steps
 API_SPEC_ATTR = "__apispec__"
 SCHEMAS_ATTR = "__schemas__"
 
-# Private keys
-_PREFIX = str(uuid.uuid4())  # Prefix to avoid conflicts with other aiohttp keys
+# Private keys. App keys are compared by identity, their types are for the type checkers only,
+# so the modules of the types are not imported with the validation middleware.
+_PREFIX = "aiohttp_apigami"  # Prefix to avoid conflicts with other aiohttp keys
 APISPEC_VALIDATED_DATA_NAME = web.AppKey(f"{_PREFIX}_apispec_validated_data_name", str)
-APISPEC_PARSER = web.AppKey(f"{_PREFIX}_apispec_parser", AIOHTTPParser)
+APISPEC_PARSER: "web.AppKey[ApigamiParser]" = web.AppKey(f"{_PREFIX}_apispec_parser")
+APISPEC_ENCODED_SPEC: "web.AppKey[EncodedSpec]" = web.AppKey(f"{_PREFIX}_apispec_encoded_spec")
+APISPEC_VALIDATION_PLANS: "web.AppKey[ValidationPlans]" = web.AppKey(f"{_PREFIX}_apispec_validation_plans")
+APISPEC_INSTANCE: "web.AppKey[AiohttpApiSpec]" = web.AppKey(f"{_PREFIX}_apispec_instance")
+
+# Private request keys
+APISPEC_JSON_BODY = f"{_PREFIX}_apispec_json_body"
+APISPEC_FORM_DATA = f"{_PREFIX}_apispec_form_data"
+APISPEC_MAX_BODY_SIZE = f"{_PREFIX}_apispec_max_body_size"
@@ -1,17 +1,40 @@
 import enum
+import json
 import logging.config
-from typing import Any
-
-from aiohttp import web
-from apispec import APISpec
-from apispec.ext.marshmallow import common
-from webargs.aiohttpparser import parser
-
-from .constants import APISPEC_PARSER, APISPEC_VALIDATED_DATA_NAME, SWAGGER_DICT
-from .plugin import ApigamiPlugin
+import os
+from typing import TYPE_CHECKING, Any
+
+from aiohttp import hdrs, web
+
+from .constants import (
+    APISPEC_ENCODED_SPEC,
+    APISPEC_INSTANCE,
+    APISPEC_PARSER,
+    APISPEC_VALIDATED_DATA_NAME,
+    APISPEC_VALIDATION_PLANS,
+    SWAGGER_DICT,
+)
+from .data import EncodedSpec
+from .export import load_prebuilt_spec
+from .metrics import NAME_METRICS, ValidationMetrics
+from .offload import OffloadPolicy
+from .parser import ApigamiParser, JSONDecoder, get_json_loads
+from .process_pool import ValidationProcessPool
+from .profiling import NAME_PROFILER, ValidationProfiler
+from .response_validation import ResponseSampler
 from .route_processor import RouteProcessor
+from .serialization import JSONEncoder, get_json_dumps
+from .shared_spec import load_or_build_shared_spec
+from .spec_cache import load_cached_spec, spec_fingerprint, store_cached_spec
+from .spec_endpoint import spec_handler
+from .spec_first import bind_document
 from .swagger_ui import NAME_SWAGGER_SPEC, LayoutOption, SwaggerUIManager
 from .typedefs import SchemaNameResolver, SchemaType
+from .validation import ValidationPlans
+from .warmup import warm_up_handlers
+
+if TYPE_CHECKING:
+    from apispec import APISpec
 
 logger = logging.getLogger(__name__)
 
@@ -22,6 +45,8 @@ def resolver(schema: SchemaType) -> str:
     Strips 'Schema' from the end of the class name.
     Adds 'Partial-' prefix if schema is a partial schema.
     """
+    from apispec.ext.marshmallow import common
+
     schema_instance = common.resolve_schema_instance(schema)
     resolved = common.resolve_schema_cls(schema)
     schema_cls = resolved[0] if isinstance(resolved, list) else resolved
@@ -45,13 +70,32 @@ class OpenApiVersion(str, enum.Enum):
 
 class AiohttpApiSpec:
     __slots__ = (
+        "_compact",
+        "_json_dumps",
+        "_json_loads",
+        "_metrics",
+        "_offload_policy",
+        "_prebuilt_spec_path",
+        "_precompress",
+        "_process_pool",
+        "_profiler",
         "_registered",
         "_request_data_name",
+        "_response_sampler",
         "_route_processor",
+        "_server_timing",
+        "_shared_spec_path",
         "_spec",
+        "_spec_cache_path",
+        "_spec_first_path",
+        "_spec_options",
         "_swagger_ui",
+        "_validation_only",
+        "_warm_up",
         "error_callback",
+        "metrics_url",
         "prefix",
+        "profiler_url",
         "static_path",
         "swagger_path",
         "url",
@@ -70,21 +114,64 @@ class AiohttpApiSpec:
         schema_name_resolver: SchemaNameResolver = resolver,
         openapi_version: str | OpenApiVersion = OpenApiVersion.V20,
         swagger_layout: LayoutOption = LayoutOption.Standalone,
+        precompress: bool = False,
+        spec_cache_path: str | os.PathLike[str] | None = None,
+        json_decoder: JSONDecoder = "json",
+        offload_policy: OffloadPolicy | None = None,
+        process_pool: ValidationProcessPool | None = None,
+        json_encoder: JSONEncoder = "json",
+        response_sampler: ResponseSampler | None = None,
+        metrics: ValidationMetrics | None = None,
+        metrics_url: str | None = None,
+        server_timing: bool = False,
+        profiler: ValidationProfiler | None = None,
+        profiler_url: str | None = None,
+        warm_up: bool = False,
+        validation_only: bool = False,
+        compact: bool = False,
+        shared_spec_path: str | os.PathLike[str] | None = None,
+        prebuilt_spec_path: str | os.PathLike[str] | None = None,
+        spec_first_path: str | os.PathLike[str] | None = None,
         **options: Any,
     ):
+        if metrics_url is not None and metrics is None:
+            raise ValueError("`metrics_url` requires `metrics`")
+        if profiler_url is not None and (profiler is None or not profiler.token):
+            raise ValueError("`profiler_url` requires `profiler` with a `token`")
+        spec_files = {
+            "spec_cache_path": spec_cache_path,
+            "shared_spec_path": shared_spec_path,
+            "prebuilt_spec_path": prebuilt_spec_path,
+            "spec_first_path": spec_first_path,
+        }
+        spec_file_options = [f"`{name}`" for name, path in spec_files.items() if path is not None]
+        # The spec-first document is needed for the validation too
+        served_options = [option for option in spec_file_options if option != "`spec_first_path`"]
+        if validation_only and (swagger_path is not None or served_options):
+            raise ValueError(f"{', '.join(['`swagger_path`', *served_options])} can't be used with `validation_only`")
+        if len(spec_file_options) > 1:
+            raise ValueError(f"{' and '.join(spec_file_options)} can't be used together")
+
         try:
             openapi_version = OpenApiVersion(openapi_version)
         except ValueError:
             raise ValueError(f"Invalid `openapi_version`: {openapi_version!r}") from None
 
+        self._json_loads = get_json_loads(json_decoder)
+        self._json_dumps = get_json_dumps(json_encoder)
+
         # Initialize components
-        self._spec = APISpec(
-            plugins=(ApigamiPlugin(schema_name_resolver=schema_name_resolver),),
-            openapi_version=openapi_version,
+        self._spec_options = {
+            "schema_name_resolver": schema_name_resolver,
+            "openapi_version": openapi_version,
             **options,
+        }
+        # The spec is created on demand, apps with `validation_only` or a spec file never build one
+        self._spec: APISpec | None = None
+        self._route_processor = RouteProcessor(prefix=prefix)
+        self._swagger_ui = SwaggerUIManager(
+            url=url, static_path=static_path, layout=swagger_layout, precompress=precompress
         )
-        self._route_processor = RouteProcessor(self._spec, prefix=prefix)
-        self._swagger_ui = SwaggerUIManager(url=url, static_path=static_path, layout=swagger_layout)
 
         # Store configuration
         self.url = url
@@ -94,19 +181,65 @@ class AiohttpApiSpec:
         self.prefix = prefix
         self._registered = False
         self._request_data_name = request_data_name
+        self._precompress = precompress
+        self._spec_cache_path = spec_cache_path
+        self._offload_policy = offload_policy
+        self._process_pool = process_pool
+        self._response_sampler = response_sampler
+        self._metrics = metrics
+        self.metrics_url = metrics_url
+        self._server_timing = server_timing
+        self._profiler = profiler
+        self.profiler_url = profiler_url
+        self._warm_up = warm_up
+        self._validation_only = validation_only
+        self._compact = compact
+        self._shared_spec_path = shared_spec_path
+        self._prebuilt_spec_path = prebuilt_spec_path
+        self._spec_first_path = spec_first_path
 
         # Register app if provided
         if app is not None:
             self.register(app, in_place)
 
+    def _make_spec(self) -> "APISpec":
+        from apispec import APISpec
+
+        from .plugin import ApigamiPlugin
+
+        options = dict(self._spec_options)
+        schema_name_resolver = options.pop("schema_name_resolver")
+        return APISpec(plugins=(ApigamiPlugin(schema_name_resolver=schema_name_resolver),), **options)
+
     @property
-    def spec(self) -> APISpec:
+    def spec(self) -> "APISpec":
         """Get access to APISpec instance. Deprecated in 1.x release."""
+        if self._spec is None:
+            self._spec = self._make_spec()
         return self._spec
 
+    def _spec_route_processor(self) -> RouteProcessor:
+        """Route processor registering the routes in the spec"""
+        return RouteProcessor(self.spec, prefix=self.prefix)
+
     def swagger_dict(self) -> dict[str, Any]:
         """Returns swagger spec representation in JSON format"""
-        return self._spec.to_dict()
+        return self.spec.to_dict()
+
+    def export(self, app: web.Application) -> dict[str, Any]:
+        """Generate the spec of the app routes without registering them, as ``python -m aiohttp_apigami export`` does"""
+        if APISPEC_ENCODED_SPEC in app:
+            # Already registered in place, the handlers docs data may be released
+            result: dict[str, Any] = json.loads(bytes(app[APISPEC_ENCODED_SPEC].body))
+            return result
+
+        if self._spec_first_path is not None:
+            result = json.loads(bytes(load_prebuilt_spec(self._spec_first_path).body))
+            return result
+
+        spec = self._make_spec()
+        RouteProcessor(spec, prefix=self.prefix).register_routes(app)
+        return spec.to_dict()
 
     def register(self, app: web.Application, in_place: bool = False) -> None:
         """Creates spec based on registered app routes and registers needed view"""
@@ -116,11 +249,22 @@ class AiohttpApiSpec:
             return None
 
         # Set up app configuration
+        app[APISPEC_INSTANCE] = self
         app[APISPEC_VALIDATED_DATA_NAME] = self._request_data_name
+        # Each app gets its own parser, so error callbacks and decoders don't leak between apps
+        parser = ApigamiParser(json_loads=self._json_loads, error_handler=self.error_callback)
         app[APISPEC_PARSER] = parser
-
-        if self.error_callback:
-            parser.error_callback = self.error_callback
+        app[APISPEC_VALIDATION_PLANS] = ValidationPlans(
+            parser,
+            self._request_data_name,
+            offload_policy=self._offload_policy,
+            process_pool=self._process_pool,
+            json_dumps=self._json_dumps,
+            response_sampler=self._response_sampler,
+            metrics=self._metrics,
+            server_timing=self._server_timing,
+            profiler=self._profiler,
+        )
 
         # Register routes and generate API spec
         if in_place:
@@ -128,15 +272,30 @@ class AiohttpApiSpec:
         else:
             self._register_on_startup(app)
 
+        # Start the process pool after the plans are compiled, so the workers get all the schemas
+        if self._process_pool is not None:
+            self._setup_process_pool(app, self._process_pool)
+
+        # Let the pending response checks and profile stats dumps complete on shutdown
+        self._setup_pending_waits(app)
+
         self._registered = True
 
         # Add Swagger spec endpoint
-        if self.url:
+        if self.url and not self._validation_only:
             self._setup_spec_endpoint(app, self.url)
 
             # Set up Swagger UI if path is provided
             if self.swagger_path:
                 self._swagger_ui.setup(app, self.swagger_path)
+                if self._warm_up:
+                    self._setup_swagger_ui_warm_up(app)
+
+        if self._metrics is not None and self.metrics_url:
+            self._setup_metrics_endpoint(app, self._metrics, self.metrics_url)
+
+        if self._profiler is not None and self.profiler_url:
+            self._setup_profiler_endpoint(app, self._profiler, self.profiler_url)
 
     def _register_on_startup(self, app: web.Application) -> None:
         """Register routes and generate API spec on app startup"""
@@ -146,19 +305,135 @@ class AiohttpApiSpec:
 
         app.on_startup.append(_async_register)
 
+    def _setup_swagger_ui_warm_up(self, app: web.Application) -> None:
+        """Render the Swagger UI index page on app startup, when the routes have their final prefixes"""
+
+        async def _warm_up(app_: web.Application) -> None:
+            self._swagger_ui.warm_up(app_)
+
+        app.on_startup.append(_warm_up)
+
+    def _setup_process_pool(self, app: web.Application, process_pool: ValidationProcessPool) -> None:
+        """Start the validation process pool on app startup and stop it on cleanup"""
+
+        async def _start(app_: web.Application) -> None:
+            await process_pool.start(self._json_loads)
+
+        async def _shutdown(app_: web.Application) -> None:
+            process_pool.shutdown()
+
+        app.on_startup.append(_start)
+        app.on_cleanup.append(_shutdown)
+
+    def _setup_pending_waits(self, app: web.Application) -> None:
+        waiters = [waiter for waiter in (self._response_sampler, self._profiler) if waiter is not None]
+        if not waiters:
+            return
+
+        async def _wait(app_: web.Application) -> None:
+            for waiter in waiters:
+                await waiter.wait()
+
+        app.on_cleanup.append(_wait)
+
     def _register(self, app: web.Application) -> None:
         """Register routes and generate API spec immediately"""
-        self._route_processor.register_routes(app)
-        app[SWAGGER_DICT] = self.swagger_dict()
+        plans = app[APISPEC_VALIDATION_PLANS]
+        self._route_processor.register_plans(app, plans)
+
+        if self._spec_first_path is not None:
+            self._bind_spec_first(app, plans, self._spec_first_path)
+        elif not self._validation_only:
+            self._build_spec(app)
+
+        if self._warm_up:
+            handlers = [route.handler for route in self._route_processor.get_routes(app)]
+            count = warm_up_handlers(handlers)
+            logger.debug("%d request schemas are warmed up", count)
+
+        if self._compact:
+            self._compact_docs(app)
+
+    def _bind_spec_first(self, app: web.Application, plans: ValidationPlans, path: str | os.PathLike[str]) -> None:
+        """Compile the plans of the routes described by the document, which is served as the spec"""
+        encoded = load_prebuilt_spec(path, compress=self._precompress)
+        count = bind_document(app, json.loads(bytes(encoded.body)), plans, prefix=self.prefix)
+        logger.debug("%d operations of %s are bound to the routes", count, path)
+
+        if not self._validation_only:
+            app[APISPEC_ENCODED_SPEC] = encoded
+
+    def _build_spec(self, app: web.Application) -> None:
+        """Generate the API spec of the app routes, or load it from the cache or the shared file"""
+        if self._prebuilt_spec_path is not None:
+            # Exported by `python -m aiohttp_apigami export`, nothing is generated
+            app[APISPEC_ENCODED_SPEC] = load_prebuilt_spec(self._prebuilt_spec_path, compress=self._precompress)
+            return
+
+        if self._shared_spec_path is not None:
+            # Served from the mapped file, the spec dict is not kept
+            app[APISPEC_ENCODED_SPEC] = self._get_shared_spec(app, self._shared_spec_path)
+            return
+
+        if self._spec_cache_path is None:
+            self._spec_route_processor().register_routes(app)
+            app[SWAGGER_DICT] = self.swagger_dict()
+        else:
+            app[SWAGGER_DICT] = self._get_cached_swagger_dict(app, self._spec_cache_path)
+
+        # Serialize the spec once, the endpoint serves these immutable bytes
+        app[APISPEC_ENCODED_SPEC] = EncodedSpec.from_dict(app[SWAGGER_DICT], compress=self._precompress)
+
+    def _compact_docs(self, app: web.Application) -> None:
+        """Release the spec data of the app once the spec is serialized, keeping the spec bytes"""
+        # The `__apispec__` data is kept, the handlers may be shared with the other apps of the process
+        # Drop the built spec, which refers to the schemas of all the routes, an empty one is created on access
+        self._spec = None
+
+        app.pop(SWAGGER_DICT, None)
+
+    def _get_shared_spec(self, app: web.Application, path: str | os.PathLike[str]) -> EncodedSpec:
+        """Map the shared spec file, or generate the spec and write it if the fingerprint doesn't match"""
+        routes = self._route_processor.get_routes(app)
+
+        def build() -> EncodedSpec:
+            self._spec_route_processor().register_routes(app, routes)
+            return EncodedSpec.from_dict(self.swagger_dict(), compress=self._precompress)
+
+        return load_or_build_shared_spec(path, spec_fingerprint(routes, self.spec), build, self._precompress)
+
+    def _get_cached_swagger_dict(self, app: web.Application, cache_path: str | os.PathLike[str]) -> dict[str, Any]:
+        """Load the spec from the cache file or generate and cache it if the fingerprint doesn't match"""
+        routes = self._route_processor.get_routes(app)
+        fingerprint = spec_fingerprint(routes, self.spec)
+
+        swagger_dict = load_cached_spec(cache_path, fingerprint)
+        if swagger_dict is not None:
+            logger.debug("API spec is loaded from cache %s", cache_path)
+            return swagger_dict
+
+        self._spec_route_processor().register_routes(app, routes)
+        swagger_dict = self.swagger_dict()
+        store_cached_spec(cache_path, fingerprint, swagger_dict)
+        return swagger_dict
 
     @staticmethod
     def _setup_spec_endpoint(app: web.Application, spec_path: str) -> None:
-        async def spec_handler(request: web.Request) -> web.Response:
-            return web.json_response(request.app[SWAGGER_DICT])
-
         spec_path = spec_path if spec_path.startswith("/") else f"/{spec_path}"
         app.router.add_get(spec_path, spec_handler, name=NAME_SWAGGER_SPEC)
 
+    @staticmethod
+    def _setup_metrics_endpoint(app: web.Application, metrics: ValidationMetrics, metrics_path: str) -> None:
+        metrics_path = metrics_path if metrics_path.startswith("/") else f"/{metrics_path}"
+        app.router.add_get(metrics_path, metrics.handler, name=NAME_METRICS)
+
+    @staticmethod
+    def _setup_profiler_endpoint(app: web.Application, profiler: ValidationProfiler, profiler_path: str) -> None:
+        profiler_path = profiler_path if profiler_path.startswith("/") else f"/{profiler_path}"
+        resource = app.router.add_resource(profiler_path, name=NAME_PROFILER)
+        resource.add_route(hdrs.METH_GET, profiler.handler)
+        resource.add_route(hdrs.METH_POST, profiler.handler)
+
 
 def setup_aiohttp_apispec(
     app: web.Application,
@@ -175,6 +450,24 @@ def setup_aiohttp_apispec(
     schema_name_resolver: SchemaNameResolver = resolver,
     openapi_version: str | OpenApiVersion = OpenApiVersion.V20,
     swagger_layout: LayoutOption = LayoutOption.Standalone,
+    precompress: bool = False,
+    spec_cache_path: str | os.PathLike[str] | None = None,
+    json_decoder: JSONDecoder = "json",
+    offload_policy: OffloadPolicy | None = None,
+    process_pool: ValidationProcessPool | None = None,
+    json_encoder: JSONEncoder = "json",
+    response_sampler: ResponseSampler | None = None,
+    metrics: ValidationMetrics | None = None,
+    metrics_url: str | None = None,
+    server_timing: bool = False,
+    profiler: ValidationProfiler | None = None,
+    profiler_url: str | None = None,
+    warm_up: bool = False,
+    validation_only: bool = False,
+    compact: bool = False,
+    shared_spec_path: str | os.PathLike[str] | None = None,
+    prebuilt_spec_path: str | os.PathLike[str] | None = None,
+    spec_first_path: str | os.PathLike[str] | None = None,
     **options: Any,
 ) -> AiohttpApiSpec:
     """
@@ -243,6 +536,54 @@ def setup_aiohttp_apispec(
     :param openapi_version: version of OpenAPI schema
     :param swagger_layout: layout of Swagger UI (``LayoutOption.Standalone`` by default).
                             See ``LayoutOption`` for more details.
+    :param precompress: serve gzip (and brotli, if installed) variants of the spec and
+                        Swagger UI static files, negotiated by ``Accept-Encoding``.
+                        Variants are compressed once and kept in memory.
+    :param spec_cache_path: path of a file to cache the generated spec in.
+                            The cache is keyed by a fingerprint of the routes, handlers spec data,
+                            schemas and APISpec options, and is rebuilt automatically on mismatch.
+    :param json_decoder: JSON decoder for the ``json`` location: ``"json"`` (default), ``"orjson"``,
+                         ``"msgspec"`` or a callable decoding the request body bytes.
+    :param offload_policy: ``OffloadPolicy`` moving the schema loads of large or slow requests
+                           from the event loop to an executor. By default all loads run inline.
+    :param process_pool: ``ValidationProcessPool`` validating the ``json`` location of schemas
+                         declared with ``request_schema(..., process_pool=True)`` in worker processes.
+    :param json_encoder: JSON encoder of the handler results serialized with
+                         ``response_schema(..., serialize=True)``: ``"json"`` (default), ``"orjson"``,
+                         ``"msgspec"`` or a callable encoding the data to bytes.
+    :param response_sampler: ``ResponseSampler`` checking a sample of the responses against
+                             the response schemas in the background, disabled by default.
+    :param metrics: ``ValidationMetrics`` recording per-route latency histograms of the validation
+                    phases and the handler, and validation failure counts, disabled by default.
+    :param metrics_url: url of the metrics endpoint in the Prometheus text format,
+                        e.g. ``"/api/docs/metrics"``. Requires ``metrics``.
+    :param server_timing: add a ``Server-Timing`` header with the durations of the validation phases
+                          and the handler to the responses of the routes with schemas. For debugging,
+                          as it exposes the timings to the clients.
+    :param profiler: ``ValidationProfiler`` profiling the schema loads of every N-th request of each route,
+                     or of the routes with slow loads, and dumping the stats to a directory. Disabled by default.
+    :param profiler_url: url of the admin endpoint controlling the profiler at runtime,
+                         authorized by the profiler ``token``. Requires ``profiler`` with a ``token``.
+    :param warm_up: load every request schema with its examples and a synthesized payload on registration,
+                    and render the Swagger UI index page on startup, so the first requests
+                    don't pay for the lazy initialization. Disabled by default.
+    :param validation_only: set up only what ``validation_middleware`` needs, for the apps that don't serve
+                            the docs: no spec is created, the spec endpoint and Swagger UI are not added.
+    :param compact: release the spec data of the app once the spec is serialized: the built ``APISpec``
+                    and ``app["swagger_dict"]``. The spec endpoint serves the serialized spec, and the validation
+                    is not affected. The ``__apispec__`` data of the handlers is kept for the other apps.
+    :param shared_spec_path: path of a file to share the serialized spec between the worker processes of a host.
+                             The first process writes it, the others map it to memory and serve the spec
+                             straight from the shared pages, without building it. The file is keyed by
+                             the same fingerprint as ``spec_cache_path`` and rebuilt on mismatch.
+                             ``app["swagger_dict"]`` is not set.
+    :param prebuilt_spec_path: path of the spec exported by ``python -m aiohttp_apigami export``, served instead
+                               of generating the spec. The content hash is checked if its ``.sha256`` file is
+                               next to it. ``app["swagger_dict"]`` is not set.
+    :param spec_first_path: path of a hand-maintained OpenAPI document, JSON or YAML, served as the spec.
+                            The validation of the routes matching its operations, by the path and the method
+                            or by the ``operationId``, is compiled from its schemas instead of the decorators.
+                            Nothing is generated, ``app["swagger_dict"]`` is not set.
     :param options: any apispec.APISpec options
     :return: return instance of AiohttpApiSpec class
     :rtype: AiohttpApiSpec
@@ -261,5 +602,23 @@ def setup_aiohttp_apispec(
         schema_name_resolver=schema_name_resolver,
         openapi_version=openapi_version,
         swagger_layout=swagger_layout,
+        precompress=precompress,
+        spec_cache_path=spec_cache_path,
+        json_decoder=json_decoder,
+        offload_policy=offload_policy,
+        process_pool=process_pool,
+        json_encoder=json_encoder,
+        response_sampler=response_sampler,
+        metrics=metrics,
+        metrics_url=metrics_url,
+        server_timing=server_timing,
+        profiler=profiler,
+        profiler_url=profiler_url,
+        warm_up=warm_up,
+        validation_only=validation_only,
+        compact=compact,
+        shared_spec_path=shared_spec_path,
+        prebuilt_spec_path=prebuilt_spec_path,
+        spec_first_path=spec_first_path,
         **options,
     )
@@ -1,5 +1,8 @@
+import json
 from dataclasses import dataclass
+from typing import Any
 
+from .compression import PrecompressedBody
 from .typedefs import HandlerType
 
 
@@ -8,3 +11,18 @@ class RouteData:
     method: str
     path: str
     handler: HandlerType
+
+
+@dataclass(frozen=True, slots=True, kw_only=True)
+class EncodedSpec(PrecompressedBody):
+    """Immutable JSON representation of the OpenAPI spec with its strong ETag."""
+
+    @classmethod
+    def from_dict(cls, spec: dict[str, Any], compress: bool = False) -> "EncodedSpec":
+        return cls.from_json(json.dumps(spec).encode("utf-8"), compress=compress)
+
+    @classmethod
+    def from_json(cls, body: bytes, compress: bool = False) -> "EncodedSpec":
+        """Wrap the already serialized spec"""
+        encoded = PrecompressedBody.from_bytes(body, compress=compress)
+        return cls(body=encoded.body, etag=encoded.etag, variants=encoded.variants)
@@ -1,8 +1,8 @@
 from collections.abc import Callable
 from typing import Any, TypeVar
 
+from aiohttp_apigami.handler_spec import get_or_set_handler_spec
 from aiohttp_apigami.typedefs import HandlerType
-from aiohttp_apigami.utils import get_or_set_apispec, get_or_set_schemas
 
 T = TypeVar("T", bound=HandlerType)
 
@@ -92,17 +92,7 @@ def docs(
     kwargs.update(custom_attrs)
 
     def wrapper(func: T) -> T:
-        func_apispec = get_or_set_apispec(func)
-        get_or_set_schemas(func)  # just to make sure schemas are initialized
-
-        extra_parameters = parameters or []
-        extra_responses = responses or {}
-
-        # Update the function's apispec attributes
-        func_apispec["parameters"].extend(extra_parameters)
-        func_apispec["responses"].update(extra_responses)
-        func_apispec.update(kwargs)
-
+        get_or_set_handler_spec(func).add_docs(parameters or [], responses or {}, **kwargs)
         return func
 
     return wrapper
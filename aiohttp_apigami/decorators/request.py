@@ -3,8 +3,9 @@ from collections.abc import Callable
 from functools import partial
 from typing import Any, Literal, TypeVar
 
+from aiohttp_apigami.handler_spec import get_or_set_handler_spec
 from aiohttp_apigami.typedefs import HandlerType, IDataclass, SchemaType
-from aiohttp_apigami.utils import get_or_set_apispec, get_or_set_schemas, resolve_schema_instance
+from aiohttp_apigami.utils import resolve_schema_instance
 from aiohttp_apigami.validation import ValidationSchema
 
 # Locations supported by both openapi and webargs.aiohttpparser
@@ -42,6 +43,9 @@ def request_schema(
     put_into: str | None = None,
     example: dict[str, Any] | None = None,
     add_to_refs: bool = False,
+    process_pool: bool = False,
+    stream: bool = False,
+    max_body_size: int | None = None,
     **kwargs: Any,
 ) -> Callable[[T], T]:
     """
@@ -115,41 +119,65 @@ def request_schema(
     add_to_refs : bool, default=False
         Works only if example is not None. If True, adds example
         for ref schema. Otherwise, adds example to endpoint.
+
+    process_pool : bool, default=False
+        Decode and validate the body in a worker process of the app
+        ``ValidationProcessPool``, if it is set up. Only the ``json``
+        location is supported.
+
+    stream : bool, default=False
+        Validate the items of a ``many=True`` schema one by one while the
+        body is read, and pass an async iterator of the validated items
+        to the handler. Only the ``json`` location is supported.
+
+    max_body_size : int, optional
+        Maximum request body size in bytes. Requests with a larger
+        Content-Length are rejected with ``413`` before the body is read,
+        and reading streamed and multipart bodies without Content-Length is
+        aborted over the limit. Other bodies without Content-Length are
+        checked once read.
+        If several schemas of the handler set it, the smallest one is used.
     """
 
     if location not in VALID_SCHEMA_LOCATIONS:
         raise ValueError(f"Invalid location argument: {location}")
 
+    if max_body_size is not None and max_body_size <= 0:
+        raise ValueError(f"Invalid `max_body_size`: {max_body_size!r}, must be positive")
+
+    if process_pool and location != "json":
+        raise ValueError("`process_pool` is supported for the `json` location only")
+
     schema_instance = resolve_schema_instance(schema)
 
+    if stream:
+        if location != "json" or not schema_instance.many:
+            raise ValueError("`stream` is supported for `many=True` schemas in the `json` location only")
+        if process_pool:
+            raise ValueError("`stream` and `process_pool` can't be used together")
+
     options = {"required": kwargs.pop("required", False)}
 
     def wrapper(func: T) -> T:
-        func_apispec = get_or_set_apispec(func)
-        func_schemas = get_or_set_schemas(func)
-
         _example = copy.copy(example) or {}
         if _example:
             _example["add_to_refs"] = add_to_refs
 
-        func_apispec["schemas"].append(
+        get_or_set_handler_spec(func).add_request_schema(
             {
                 "schema": schema_instance,
                 "location": location,
                 "options": options,
                 "example": _example,
-            }
-        )
-
-        if location in {sch.location for sch in func_schemas}:
-            raise RuntimeError(f"Multiple `{location}` locations are not allowed")
-
-        func_schemas.append(
+            },
             ValidationSchema(
                 schema=schema_instance,
                 location=location,
                 put_into=put_into,
-            )
+                process_pool=process_pool,
+                stream=stream,
+                max_body_size=max_body_size,
+            ),
         )
 
         return func
@@ -1,8 +1,9 @@
 from collections.abc import Callable
 from typing import TypeVar
 
+from aiohttp_apigami.handler_spec import get_or_set_handler_spec
 from aiohttp_apigami.typedefs import HandlerType, IDataclass, SchemaType
-from aiohttp_apigami.utils import get_or_set_apispec, get_or_set_schemas, resolve_schema_instance
+from aiohttp_apigami.utils import resolve_schema_instance
 
 T = TypeVar("T", bound=HandlerType)
 TDataclass = TypeVar("TDataclass", bound=IDataclass)
@@ -13,6 +14,8 @@ def response_schema(
     code: int = 200,
     required: bool = False,
     description: str | None = None,
+    serialize: bool = False,
+    sample_rate: float | None = None,
 ) -> Callable[[T], T]:
     """
     Add response info into the swagger spec for OpenAPI documentation.
@@ -72,18 +75,36 @@ def response_schema(
 
     description : str, optional
         Response description for OpenAPI documentation
+
+    serialize : bool, default=False
+        Serialize the handler result with this schema. If the handler
+        returns anything but a response, ``validation_middleware`` dumps
+        it with a dumper compiled from the schema and returns it as a
+        JSON response with this status code. Only one response schema
+        of a handler can be serialized. Class-based views must return
+        responses, so it is supported for function handlers only.
+
+    sample_rate : float, optional
+        Share of the responses with this status code checked against
+        the schema by the app ``ResponseSampler``, overriding its rate.
     """
+    if sample_rate is not None and not 0 <= sample_rate <= 1:
+        raise ValueError(f"Invalid `sample_rate`: {sample_rate!r}, must be in [0, 1]")
+
     schema_instance = resolve_schema_instance(schema)
 
     def wrapper(func: T) -> T:
-        func_apispec = get_or_set_apispec(func)
-        get_or_set_schemas(func)  # just to make sure schemas are initialized
-
-        func_apispec["responses"][str(code)] = {
+        response = {
             "schema": schema_instance,
             "required": required,
             "description": description or "",
         }
+        if serialize:
+            response["serialize"] = True
+        if sample_rate is not None:
+            response["sample_rate"] = sample_rate
+
+        get_or_set_handler_spec(func).add_response(str(code), response)
         return func
 
     return wrapper
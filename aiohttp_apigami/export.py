@@ -0,0 +1,89 @@
+"""Offline export of the OpenAPI spec, and loading of the exported spec at startup."""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from types import ModuleType
+from typing import Any, Literal
+
+from aiohttp import web
+
+from .constants import APISPEC_INSTANCE
+from .data import EncodedSpec
+
+SpecFormat = Literal["json", "yaml"]
+
+YAML_SUFFIXES = (".yaml", ".yml")
+# Content hash of the exported spec, in the `sha256sum` format
+HASH_SUFFIX = ".sha256"
+
+
+def export_spec(app: web.Application) -> dict[str, Any]:
+    """Generate the spec of the app set up with ``setup_aiohttp_apispec``, without starting the app"""
+    api_spec = app.get(APISPEC_INSTANCE)
+    if api_spec is None:
+        raise ValueError("The app is not set up with `setup_aiohttp_apispec`")
+    return api_spec.export(app)
+
+
+def get_format(path: str | os.PathLike[str] | None) -> SpecFormat:
+    """Format of the spec file by its extension, JSON by default"""
+    if path is not None and Path(path).suffix.lower() in YAML_SUFFIXES:
+        return "yaml"
+    return "json"
+
+
+def _import_yaml() -> ModuleType:
+    # Imported on demand, only the YAML specs need it
+    try:
+        import yaml
+    except ImportError:  # pragma: no cover
+        raise RuntimeError(
+            "PyYAML is required for YAML specs. Install it with `pip install aiohttp-apigami[yaml]`."
+        ) from None
+    return yaml
+
+
+def dump_spec(spec: dict[str, Any], spec_format: SpecFormat = "json", indent: int | None = None) -> bytes:
+    if spec_format == "yaml":
+        # Not sorted, same as apispec, to keep the order of the schema fields
+        dumped: str = _import_yaml().dump(spec, sort_keys=False)
+        return dumped.encode("utf-8")
+    # Same encoding as the spec endpoint, unless indented
+    return json.dumps(spec, indent=indent).encode("utf-8")
+
+
+def content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def write_spec(path: str | os.PathLike[str], data: bytes) -> str:
+    """Write the exported spec and its content hash next to it, return the hash"""
+    digest = content_hash(data)
+    path = Path(path)
+    path.write_bytes(data)
+    path.with_name(path.name + HASH_SUFFIX).write_text(f"{digest}  {path.name}\n", encoding="utf-8")
+    return digest
+
+
+def load_prebuilt_spec(path: str | os.PathLike[str], compress: bool = False) -> EncodedSpec:
+    """
+    Load the spec exported by ``python -m aiohttp_apigami export``.
+
+    The content hash is checked, if the hash file is next to the spec. JSON specs are served as they are,
+    YAML specs are converted to JSON.
+    """
+    path = Path(path)
+    data = path.read_bytes()
+
+    hash_path = path.with_name(path.name + HASH_SUFFIX)
+    if hash_path.exists():
+        expected = hash_path.read_text(encoding="utf-8").split(maxsplit=1)[0]
+        if content_hash(data) != expected:
+            raise ValueError(f"Content hash of the spec {path} doesn't match {hash_path}")
+
+    if get_format(path) == "yaml":
+        return EncodedSpec.from_dict(_import_yaml().safe_load(data), compress=compress)
+
+    return EncodedSpec.from_json(data, compress=compress)
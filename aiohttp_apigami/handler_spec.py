@@ -0,0 +1,142 @@
+"""Spec data and validation schemas of the handlers, set by the decorators."""
+
+from collections.abc import Iterable, Iterator, Mapping, MutableMapping
+from typing import Any, TypeVar
+
+import marshmallow as m
+
+from .constants import API_SPEC_ATTR, SCHEMAS_ATTR
+from .validation import ValidationSchema
+
+T = TypeVar("T")
+
+# Mapping keys of the docs data kept in attributes, the other keys are the operation options
+_FIELDS = ("schemas", "responses", "parameters")
+
+
+class HandlerSpec(MutableMapping[str, Any]):
+    """
+    Spec data and validation schemas of a handler.
+
+    The decorators keep the data read by the validation middleware and the spec build in attributes:
+    the request locations, the serialized response and the response schemas with their sample rates.
+
+    For compatibility with the ``__apispec__`` dicts of the previous versions, the docs data can also
+    be accessed as a mapping, with the ``schemas``, ``responses`` and ``parameters`` keys and the
+    operation options (``tags``, ``summary`` and the like).
+    """
+
+    __slots__ = (
+        "locations",
+        "options",
+        "parameters",
+        "response_schemas",
+        "responses",
+        "schemas",
+        "serialized_response",
+        "validation",
+    )
+
+    def __init__(self) -> None:
+        # Docs data
+        self.schemas: list[dict[str, Any]] = []
+        self.responses: dict[Any, dict[str, Any]] = {}
+        self.parameters: list[dict[str, Any]] = []
+        self.options: dict[str, Any] = {}
+
+        # Validation data
+        self.validation: list[ValidationSchema] = []
+        self.locations: frozenset[str] = frozenset()
+        self.serialized_response: tuple[m.Schema, int] | None = None
+        self.response_schemas: dict[int, tuple[m.Schema, float | None]] = {}
+
+    @classmethod
+    def from_mapping(cls, data: Mapping[str, Any], validation: Iterable[ValidationSchema] = ()) -> "HandlerSpec":
+        """Build the spec from an ``__apispec__`` dict and ``__schemas__`` list of the previous versions"""
+        spec = cls()
+        spec.update(data)
+        spec.validation = list(validation)
+        spec.locations = frozenset(step.location for step in spec.validation)
+        return spec
+
+    def add_request_schema(self, entry: dict[str, Any], step: ValidationSchema) -> None:
+        """Add a request schema with its docs entry and its validation step"""
+        if step.location in self.locations:
+            raise RuntimeError(f"Multiple `{step.location}` locations are not allowed")
+
+        self.schemas.append(entry)
+        self.validation.append(step)
+        self.locations |= {step.location}
+
+    def add_response(self, code: str, response: dict[str, Any]) -> None:
+        if response.get("serialize") and self.serialized_response is not None:
+            raise RuntimeError("Multiple serialized responses are not allowed")
+
+        self.responses[code] = response
+        self._update_responses()
+
+    def add_docs(self, parameters: Iterable[dict[str, Any]], responses: Mapping[Any, Any], **options: Any) -> None:
+        self.parameters.extend(parameters)
+        self.responses.update(responses)
+        self._update_responses()
+        # Same as updating an ``__apispec__`` dict, options may replace the docs data
+        self.update(options)
+
+    def _update_responses(self) -> None:
+        self.serialized_response = None
+        self.response_schemas = {}
+        for code, response in self.responses.items():
+            if self.serialized_response is None and response.get("serialize"):
+                self.serialized_response = response["schema"], int(code)
+            if "schema" in response and str(code).isdigit():
+                self.response_schemas[int(code)] = response["schema"], response.get("sample_rate")
+
+    def __getitem__(self, key: str) -> Any:
+        if key in _FIELDS:
+            return getattr(self, key)
+        return self.options[key]
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        if key not in _FIELDS:
+            self.options[key] = value
+            return
+
+        setattr(self, key, value)
+        if key == "responses":
+            self._update_responses()
+
+    def __delitem__(self, key: str) -> None:
+        if key in _FIELDS:
+            self[key] = {} if key == "responses" else []
+        else:
+            del self.options[key]
+
+    def __iter__(self) -> Iterator[str]:
+        yield from _FIELDS
+        yield from self.options
+
+    def __len__(self) -> int:
+        return len(_FIELDS) + len(self.options)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({dict(self)!r})"
+
+
+def get_handler_spec(func: Any) -> HandlerSpec | None:
+    """Get the spec of the handler function, ``None`` if it is not decorated"""
+    spec = getattr(func, API_SPEC_ATTR, None)
+    if spec is None or isinstance(spec, HandlerSpec):
+        return spec
+    # A dict set by hand, as the decorators of the previous versions did
+    return HandlerSpec.from_mapping(spec, getattr(func, SCHEMAS_ATTR, ()))
+
+
+def get_or_set_handler_spec(func: T) -> HandlerSpec:
+    """Get the spec of the handler function, setting an empty one if it is not decorated yet"""
+    existing = get_handler_spec(func)
+    spec = HandlerSpec() if existing is None else existing
+    if getattr(func, API_SPEC_ATTR, None) is not spec:
+        setattr(func, API_SPEC_ATTR, spec)
+        # The validation steps are also available as a list, as in the previous versions
+        setattr(func, SCHEMAS_ATTR, spec.validation)
+    return spec
@@ -0,0 +1,158 @@
+"""Per-route latency histograms of the validation phases, in the Prometheus text format."""
+
+import time
+from bisect import bisect_left
+from collections import Counter
+from collections.abc import Iterator, Sequence
+from contextlib import contextmanager
+
+from aiohttp import web
+
+# Seconds, from 50 microseconds to 10 seconds
+DEFAULT_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1, 2.5, 10)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+NAME_METRICS = "apigami.metrics"
+
+
+def operation_name(request: web.Request) -> str:
+    """Method and canonical path of the matched route, e.g. ``GET /items/{id}``"""
+    resource = request.match_info.route.resource
+    return f"{request.method} {request.path if resource is None else resource.canonical}"
+
+
+class PhaseTimer:
+    """
+    Durations of the phases of a single request, in the order they ran.
+
+    Phases are ``read`` (the request body), ``decode`` (the location data), ``load`` (the schema load),
+    ``handler`` and ``serialize`` (the handler result), the first three with the request location they belong to.
+    """
+
+    __slots__ = ("failure", "phases")
+
+    def __init__(self) -> None:
+        self.phases: list[tuple[str, str | None, float]] = []
+        # Location of the validation error, if the request is rejected
+        self.failure: str | None = None
+
+    def add(self, phase: str, seconds: float, location: str | None = None) -> None:
+        self.phases.append((phase, location, seconds))
+
+    def server_timing(self) -> str:
+        """``Server-Timing`` header value, in milliseconds, e.g. ``read-json;dur=0.120, handler;dur=2.500``"""
+        durations: dict[str, float] = {}
+        for phase, location, seconds in self.phases:
+            name = phase if location is None else f"{phase}-{location}"
+            durations[name] = durations.get(name, 0.0) + seconds
+        return ", ".join(f"{name};dur={seconds * 1000:.3f}" for name, seconds in durations.items())
+
+    @contextmanager
+    def measure(self, phase: str, location: str | None = None) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(phase, time.perf_counter() - start, location)
+
+
+class Histogram:
+    """Cumulative histogram with fixed buckets"""
+
+    __slots__ = ("buckets", "count", "counts", "sum")
+
+    def __init__(self, buckets: Sequence[float]) -> None:
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        index = bisect_left(self.buckets, value)
+        if index < len(self.counts):
+            self.counts[index] += 1
+        self.count += 1
+        self.sum += value
+
+    def cumulative(self) -> Iterator[tuple[float, int]]:
+        total = 0
+        for bound, count in zip(self.buckets, self.counts, strict=True):
+            total += count
+            yield bound, total
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels: str) -> str:
+    return ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items())
+
+
+class ValidationMetrics:
+    """
+    Latency histograms of the validation phases and the handler, and validation failure counts, per route.
+
+    Routes are labeled by the method and the canonical path of their resource (``GET /items/{id}``),
+    so the label sets are bounded by the route table. Only the routes with schemas are measured.
+
+    :param buckets: upper bounds of the histogram buckets, in seconds
+    """
+
+    __slots__ = ("_histograms", "buckets", "failures")
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS) -> None:
+        if not buckets or list(buckets) != sorted(set(buckets)):
+            raise ValueError(f"Invalid `buckets`: {buckets!r}, must be increasing")
+
+        self.buckets = tuple(buckets)
+        self._histograms: dict[tuple[str, str], Histogram] = {}
+        self.failures: Counter[tuple[str, str]] = Counter()
+
+    def observe(self, operation: str, timer: PhaseTimer) -> None:
+        """Add the phase durations of a request to the histograms of the route"""
+        # Phases of all the locations of the request are added up
+        totals: dict[str, float] = {}
+        for phase, _, seconds in timer.phases:
+            totals[phase] = totals.get(phase, 0.0) + seconds
+
+        for phase, seconds in totals.items():
+            histogram = self._histograms.get((operation, phase))
+            if histogram is None:
+                histogram = self._histograms[operation, phase] = Histogram(self.buckets)
+            histogram.observe(seconds)
+
+        if timer.failure is not None:
+            self.failures[operation, timer.failure] += 1
+
+    def histogram(self, operation: str, phase: str) -> Histogram | None:
+        return self._histograms.get((operation, phase))
+
+    def render(self) -> str:
+        """Metrics in the Prometheus text exposition format"""
+        lines = [
+            "# HELP apigami_phase_duration_seconds Duration of the request phases of the validated routes.",
+            "# TYPE apigami_phase_duration_seconds histogram",
+        ]
+        for (operation, phase), histogram in sorted(self._histograms.items()):
+            labels = _labels(operation=operation, phase=phase)
+            for bound, count in histogram.cumulative():
+                lines.append(f'apigami_phase_duration_seconds_bucket{{{labels},le="{bound}"}} {count}')
+            lines.append(f'apigami_phase_duration_seconds_bucket{{{labels},le="+Inf"}} {histogram.count}')
+            lines.append(f"apigami_phase_duration_seconds_sum{{{labels}}} {histogram.sum}")
+            lines.append(f"apigami_phase_duration_seconds_count{{{labels}}} {histogram.count}")
+
+        lines.extend(
+            [
+                "# HELP apigami_validation_failures_total Requests rejected by validation errors.",
+                "# TYPE apigami_validation_failures_total counter",
+            ]
+        )
+        for (operation, location), count in sorted(self.failures.items()):
+            labels = _labels(operation=operation, location=location)
+            lines.append(f"apigami_validation_failures_total{{{labels}}} {count}")
+        return "\n".join(lines) + "\n"
+
+    async def handler(self, request: web.Request) -> web.Response:
+        """Metrics endpoint"""
+        return web.Response(text=self.render(), headers={"Content-Type": CONTENT_TYPE})
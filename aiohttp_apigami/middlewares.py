@@ -1,47 +1,72 @@
-import logging.config
+import logging
 from typing import Any, cast
 
 from aiohttp import web
 from aiohttp.typedefs import Handler
 
-from .constants import APISPEC_PARSER, APISPEC_VALIDATED_DATA_NAME, SCHEMAS_ATTR
+from .constants import APISPEC_VALIDATION_PLANS
+from .handler_spec import HandlerSpec, get_handler_spec
+from .metrics import PhaseTimer
 from .utils import is_class_based_view
-from .validation import ValidationSchema
+from .validation import ValidationPlan, ValidationPlans
 
 logger = logging.getLogger(__name__)
 
 _missing: Any = object()
 
 
-def _get_handler_schemas(request: web.Request) -> list[ValidationSchema] | None:
+def _get_handler_spec(request: web.Request) -> HandlerSpec | None:
     """
-    Get schemas from the request handler
+    Get the spec of the request handler, of its method for class-based views
     """
     handler = request.match_info.handler
+    if is_class_based_view(handler):
+        return get_handler_spec(getattr(handler, request.method.lower(), None))
+    return get_handler_spec(handler)
+
+
+def _compile_plan(request: web.Request, plans: ValidationPlans, key: tuple[Any, str]) -> ValidationPlan | None:
+    spec = _get_handler_spec(request)
+    if spec is None:
+        return plans.compile(key, None)
+    return plans.compile(
+        key,
+        spec.validation,
+        # Views must return responses, so their results are never serialized
+        None if is_class_based_view(request.match_info.handler) else spec.serialized_response,
+        spec.response_schemas,
+    )
 
-    # Function-based view
-    if hasattr(handler, SCHEMAS_ATTR):
-        return cast(list[ValidationSchema], getattr(handler, SCHEMAS_ATTR))
 
-    # Class-based view
-    if is_class_based_view(handler):
-        sub_handler = getattr(handler, request.method.lower(), None)
-        if sub_handler and hasattr(sub_handler, SCHEMAS_ATTR):
-            return cast(list[ValidationSchema], getattr(sub_handler, SCHEMAS_ATTR))
+def _finish(request: web.Request, response: Any, plan: ValidationPlan) -> web.StreamResponse:
+    """Serialize the handler result, if needed, and sample the response"""
+    if plan.serializer is not None and not isinstance(response, web.StreamResponse):
+        response = plan.serializer.make_response(response)
 
-    return None
+    plan.sample_response(request, response)
+    return cast(web.StreamResponse, response)
 
 
-async def _get_validated_data(request: web.Request, schema: ValidationSchema) -> Any | None:
-    """
-    Parse and validate request data using the schema
-    """
-    return await request.app[APISPEC_PARSER].parse(
-        argmap=schema.schema,
-        req=request,
-        location=schema.location,
-        unknown=None,  # Pass None to use the schema`s setting instead.
-    )
+async def _handle_timed(request: web.Request, handler: Handler, plan: ValidationPlan) -> web.StreamResponse:
+    """Validate the request and call the handler, recording the durations of the phases"""
+    timer = PhaseTimer()
+    try:
+        await plan.validate(request, timer)
+        with timer.measure("handler"):
+            result = await handler(request)
+        if plan.serializer is not None and not isinstance(result, web.StreamResponse):
+            with timer.measure("serialize"):
+                result = plan.serializer.make_response(result)
+        response = _finish(request, result, plan)
+    except web.HTTPException as exc:
+        # Also for the responses of the rejected requests
+        plan.add_server_timing(exc, timer)
+        raise
+    finally:
+        plan.record_timings(request, timer)
+
+    plan.add_server_timing(response, timer)
+    return response
 
 
 @web.middleware
@@ -49,6 +74,17 @@ async def validation_middleware(request: web.Request, handler: Handler) -> web.S
     """
     Validation middleware for aiohttp web app
 
+    Validation plans are compiled for all routes on registration,
+    so the middleware only looks up the plan of the matched route.
+    Plans of routes added after registration are compiled on the first request.
+    Results of function handlers with a serialized response schema are serialized
+    into a JSON response, unless the handler returns a response itself.
+    A sample of the responses is checked against the response schemas,
+    if a ``ResponseSampler`` is set up.
+    The durations of the validation phases and the handler are recorded,
+    if ``ValidationMetrics`` are set up, and sent in the ``Server-Timing`` header,
+    if ``server_timing`` is enabled.
+
     Usage:
 
     .. code-block:: python
@@ -57,29 +93,29 @@ async def validation_middleware(request: web.Request, handler: Handler) -> web.S
 
 
     """
-    schemas = _get_handler_schemas(request)
-    if schemas is None:
-        # Skip validation if no schemas are found
+    if request.match_info.http_exception is not None:
+        # Nothing to validate for unmatched routes (404, 405)
+        return await handler(request)
+
+    plans = request.app.get(APISPEC_VALIDATION_PLANS)
+    if plans is None:
+        # The app is not set up with `setup_aiohttp_apispec`, for example a parent app of the set up sub-app
         return await handler(request)
 
-    result = _missing
-    for sch in schemas:
-        # Parse and validate request data using the schema
-        data = await _get_validated_data(request, sch)
+    # Keyed by the route, the handlers may be mounted on several routes with different plans
+    key = (request.match_info.route, request.method)
 
-        # If put_into is specified, store the validated data in a specific key
-        if sch.put_into:
-            request[sch.put_into] = data
+    plan = plans.get(key, _missing)
+    if plan is _missing:
+        plan = _compile_plan(request, plans, key)
 
-        # Otherwise, store the validated data in the default key
-        elif data and result is _missing:
-            result = data
-        else:
-            logger.error("Multiple schemas provided, but no put_into specified. Using the first one only.")
+    if plan is None:
+        # Skip validation if no schemas are found
+        return await handler(request)
 
-    # For backward compatibility, if no validated data is provided, use the list
-    result = [] if result is _missing else result
+    if plan.timed:
+        return await _handle_timed(request, handler, plan)
 
-    # Store validated data in request object
-    request[request.app[APISPEC_VALIDATED_DATA_NAME]] = result
-    return await handler(request)
+    await plan.validate(request)
+    response = await handler(request)
+    return _finish(request, response, plan)
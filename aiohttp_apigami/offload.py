@@ -0,0 +1,81 @@
+"""Policy running expensive schema loads in an executor instead of the event loop."""
+
+from concurrent.futures import Executor
+
+# Locations read from the request body, the cost of their load grows with the body size
+BODY_LOCATIONS = frozenset({"json", "form", "files"})
+
+
+class OffloadPolicy:
+    """
+    Decides which schema loads of the validation middleware run in an executor.
+
+    A load is offloaded if the request body is at least ``min_content_length`` bytes,
+    or if its cost predicted from the previous loads of the same schema is at least
+    ``max_inline_seconds``. The cost of body locations is learned per byte of the body,
+    so a schema that is cheap for small payloads is still offloaded for large ones.
+    Everything else stays inline on the event loop.
+
+    :param min_content_length: body size to always offload at, ``None`` to disable
+    :param max_inline_seconds: predicted load time to offload at, ``None`` to disable
+    :param executor: executor to run loads in, the loop default executor if ``None``
+    :param smoothing: weight of the last timing in the exponential moving average of the cost
+    """
+
+    __slots__ = ("_costs", "executor", "max_inline_seconds", "min_content_length", "smoothing")
+
+    def __init__(
+        self,
+        *,
+        min_content_length: int | None = 1024 * 1024,
+        max_inline_seconds: float | None = 0.005,
+        executor: Executor | None = None,
+        smoothing: float = 0.2,
+    ) -> None:
+        if not 0 < smoothing <= 1:
+            raise ValueError(f"Invalid `smoothing`: {smoothing!r}, must be in (0, 1]")
+
+        self.min_content_length = min_content_length
+        self.max_inline_seconds = max_inline_seconds
+        self.executor = executor
+        self.smoothing = smoothing
+        # Cost estimates keyed by schema id: (seconds per body byte, seconds per load)
+        self._costs: dict[int, tuple[float | None, float]] = {}
+
+    def estimate(self, key: int, content_length: int | None) -> float | None:
+        """Predict the load time in seconds, ``None`` if there are no timings yet."""
+        cost = self._costs.get(key)
+        if cost is None:
+            return None
+
+        per_byte, per_load = cost
+        if content_length and per_byte is not None:
+            return per_byte * content_length
+        return per_load
+
+    def should_offload(self, key: int, content_length: int | None) -> bool:
+        """Check if the load should run in the executor."""
+        if self.min_content_length is not None and content_length and content_length >= self.min_content_length:
+            return True
+
+        if self.max_inline_seconds is None:
+            return False
+
+        estimate = self.estimate(key, content_length)
+        return estimate is not None and estimate >= self.max_inline_seconds
+
+    def record(self, key: int, content_length: int | None, seconds: float) -> None:
+        """Update the cost estimate with the timing of a load."""
+        per_byte = seconds / content_length if content_length else None
+
+        cost = self._costs.get(key)
+        if cost is not None:
+            alpha = self.smoothing
+            last_per_byte, last_per_load = cost
+            seconds = last_per_load + alpha * (seconds - last_per_load)
+            if per_byte is None:
+                per_byte = last_per_byte
+            elif last_per_byte is not None:
+                per_byte = last_per_byte + alpha * (per_byte - last_per_byte)
+
+        self._costs[key] = (per_byte, seconds)
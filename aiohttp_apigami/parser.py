@@ -0,0 +1,274 @@
+"""Request parser used by the validation middleware."""
+
+import json
+from collections.abc import AsyncIterator, Callable
+from typing import Any, NoReturn
+
+import marshmallow as m
+from aiohttp import StreamReader, web
+from multidict import MultiDict, MultiDictProxy
+from webargs import core
+from webargs.aiohttpparser import AIOHTTPParser, is_json_request
+
+from .constants import APISPEC_FORM_DATA, APISPEC_JSON_BODY, APISPEC_MAX_BODY_SIZE, APISPEC_PARSER
+from .process_pool import ERROR, INVALID_JSON, ValidationProcessPool
+from .streaming import NotAJSONArray, iter_json_array
+from .typedefs import ErrorHandler
+
+JSONLoads = Callable[[bytes], Any]
+JSONDecoder = str | JSONLoads
+
+
+def get_json_loads(decoder: JSONDecoder) -> JSONLoads:
+    """
+    Resolve JSON decoder into a function decoding request body bytes.
+
+    The decoder is either a callable, or one of the names:
+    ``"json"`` (standard library), ``"orjson"`` or ``"msgspec"``.
+    Decoders must raise ``ValueError`` on invalid JSON.
+    """
+    if callable(decoder):
+        return decoder
+
+    if decoder == "json":
+        return json.loads
+
+    # Imported only when selected, as the setup of most apps never uses them
+    if decoder == "orjson":
+        try:
+            import orjson
+        except ImportError:
+            raise RuntimeError(
+                "orjson is required for `orjson` JSON decoder. Install it with `pip install orjson`."
+            ) from None
+        return orjson.loads
+
+    if decoder == "msgspec":
+        try:
+            import msgspec
+        except ImportError:
+            raise RuntimeError(
+                "msgspec is required for `msgspec` JSON decoder. Install it with `pip install msgspec`."
+            ) from None
+        return msgspec.json.decode
+
+    raise ValueError(f"Invalid `json_decoder`: {decoder!r}")
+
+
+class ApigamiParser(AIOHTTPParser):
+    """aiohttp request parser with a pluggable JSON decoder."""
+
+    def __init__(
+        self,
+        *,
+        json_loads: JSONLoads = json.loads,
+        error_handler: ErrorHandler | None = None,
+        **kwargs: Any,
+    ) -> None:
+        super().__init__(error_handler=error_handler, **kwargs)
+        self.json_loads = json_loads
+
+    async def load_json(self, req: web.Request, schema: m.Schema) -> Any:
+        """
+        Return a parsed json payload from the request, decoded from the body bytes.
+
+        The decoded payload is cached in the request, see :func:`request_json`.
+        """
+        if APISPEC_JSON_BODY in req:
+            return req[APISPEC_JSON_BODY]
+
+        if not (req.body_exists and is_json_request(req)):
+            return core.missing
+
+        body = await req.read()
+        if not body:
+            return core.missing
+        check_body_size(req, len(body))
+
+        try:
+            data = self.json_loads(body)
+        except ValueError as exc:  # also covers UnicodeDecodeError
+            return self._handle_invalid_json_error(exc, req)  # type: ignore[arg-type]
+
+        req[APISPEC_JSON_BODY] = data
+        return data
+
+    async def load_form(self, req: web.Request, schema: m.Schema) -> Any:
+        """Return the form data of the request, read within the route limit, see :func:`read_form`."""
+        return self._makeproxy(await read_form(req), schema)
+
+    async def load_files(self, req: web.Request, schema: m.Schema) -> Any:  # type: ignore[override]
+        """Return uploaded files from the request as a MultiDictProxy."""
+        # Form data is parsed once and cached, so it is shared with the `form` location
+        post_data = await read_form(req)
+        files = MultiDict((key, value) for key, value in post_data.items() if isinstance(value, web.FileField))
+        return self._makeproxy(files, schema)
+
+    # `async_parse` split into steps, so the schema load may run outside the event loop
+
+    async def load_location_data(self, req: web.Request, schema: m.Schema, location: str) -> Any:
+        """Load the raw data of the location from the request."""
+        return await self._async_load_location_data(schema=schema, req=req, location=location)
+
+    def load_schema(self, location_data: Any, req: web.Request, schema: m.Schema, location: str) -> Any:
+        """
+        Deserialize and validate the location data with the schema.
+
+        It doesn't touch the event loop, so it is safe to call in an executor.
+        """
+        # Pass None as `unknown` to use the schema`s setting instead.
+        return self._process_location_data(location_data, schema, req, location, unknown=None, validators=[])
+
+    async def handle_validation_error(
+        self, error: m.ValidationError, req: web.Request, schema: m.Schema, location: str
+    ) -> NoReturn:
+        """Pass the validation error to the error handler, which must raise."""
+        await self._async_on_validation_error(error, req, schema, location, error_status_code=None, error_headers=None)
+        raise ValueError("_on_validation_error hook did not raise an exception") from error
+
+    async def load_json_in_process(self, req: web.Request, schema: m.Schema, pool: ValidationProcessPool) -> Any:
+        """
+        Deserialize and validate the json payload in the process pool.
+
+        The body bytes are decoded in the worker, so the decoded body is not cached in the request.
+        """
+        body = await req.read() if req.body_exists and is_json_request(req) else b""
+        check_body_size(req, len(body))
+
+        status, result = await pool.load(schema, body)
+        if status == INVALID_JSON:
+            return self._handle_invalid_json_error(ValueError(result), req)  # type: ignore[arg-type]
+        if status == ERROR:
+            raise m.ValidationError(result)
+        return result
+
+    async def iter_json(self, req: web.Request, schema: m.Schema) -> AsyncIterator[Any]:
+        """
+        Deserialize and validate the items of the json array payload one by one,
+        as they are read from the request body.
+
+        Errors are reported for the first invalid item, keyed by its index like ``many=True`` errors.
+        """
+        if req.body_exists and is_json_request(req):
+            # Only the route limit applies, the app `client_max_size` is for the buffered bodies
+            max_size = req.get(APISPEC_MAX_BODY_SIZE)
+            stream = req.content if max_size is None else _LimitedReader(req.content, max_size)
+            items = aiter(iter_json_array(stream))
+        else:
+            items = None
+
+        index = 0
+        while True:
+            try:
+                if items is None:
+                    raise NotAJSONArray
+                item = await anext(items)
+            except StopAsyncIteration:
+                return
+            except NotAJSONArray:
+                error = m.ValidationError({"_schema": [schema.error_messages["type"]]})
+                await self.handle_validation_error(error, req, schema, "json")
+            except ValueError as exc:  # also covers UnicodeDecodeError
+                self._handle_invalid_json_error(exc, req)  # type: ignore[arg-type]
+
+            try:
+                data = schema.load(item, many=False)
+            except m.ValidationError as error:
+                error = m.ValidationError({index: error.messages})
+                await self.handle_validation_error(error, req, schema, "json")
+
+            yield data
+            index += 1
+
+
+async def read_form(req: web.Request) -> "MultiDictProxy[Any]":
+    """
+    Read the form data of the request within the route limit.
+
+    The urlencoded bodies are buffered and checked once read, like the JSON ones. The multipart bodies
+    are parsed through a clone of the request with the route limit, which aborts the upload as soon as
+    it is over the limit, with or without Content-Length. The clone consumes the body, so the parsed form
+    is cached in the request, and ``request.post()`` can't parse it again in the handler.
+    """
+    max_size = req.get(APISPEC_MAX_BODY_SIZE)
+    if max_size is None:
+        return await req.post()
+
+    if req.content_type != "multipart/form-data":
+        # The read body is cached, the form is parsed from it
+        check_body_size(req, len(await req.read()))
+        return await req.post()
+
+    if APISPEC_FORM_DATA not in req:
+        if req.client_max_size:
+            # The app limit still applies
+            max_size = min(max_size, req.client_max_size)
+        req[APISPEC_FORM_DATA] = await req.clone(client_max_size=max_size).post()
+    form: MultiDictProxy[Any] = req[APISPEC_FORM_DATA]
+    return form
+
+
+def check_body_size(req: web.Request, size: int) -> None:
+    """
+    Reject the body over the route limit. The buffered bodies without Content-Length are read
+    within the app ``client_max_size`` and checked once they are read.
+    """
+    max_size = req.get(APISPEC_MAX_BODY_SIZE)
+    if max_size is not None and size > max_size:
+        raise web.HTTPRequestEntityTooLarge(max_size=max_size, actual_size=size)
+
+
+class _LimitedReader:
+    """Body stream reader aborting the read if the body is over the size limit"""
+
+    __slots__ = ("_max_size", "_size", "_stream")
+
+    def __init__(self, stream: StreamReader, max_size: int):
+        self._stream = stream
+        self._max_size = max_size
+        self._size = 0
+
+    async def read(self, n: int = -1) -> bytes:
+        chunk = await self._stream.read(n)
+        self._size += len(chunk)
+        if self._size > self._max_size:
+            raise web.HTTPRequestEntityTooLarge(max_size=self._max_size, actual_size=self._size)
+        return chunk
+
+
+async def request_json(request: web.Request) -> Any:
+    """
+    Return the decoded JSON body of the request.
+
+    The body is decoded at most once per request: if the ``json`` location was already
+    validated, the same object decoded by the validation middleware is returned,
+    otherwise the body is decoded with the app JSON decoder and cached.
+    Use it in handlers instead of ``await request.json()`` to avoid decoding the body twice.
+
+    Usage:
+
+    .. code-block:: python
+
+        @json_schema(RequestSchema)
+        async def handler(request):
+            raw_body = await request_json(request)
+            ...
+
+    """
+    if APISPEC_JSON_BODY in request:
+        return request[APISPEC_JSON_BODY]
+
+    parser = request.app.get(APISPEC_PARSER)
+    if not isinstance(parser, ApigamiParser):
+        # The app is not set up, the body is decoded with the standard decoder
+        parser = _default_parser
+
+    try:
+        data = parser.json_loads(await request.read())
+    except ValueError as exc:  # also covers UnicodeDecodeError
+        parser._handle_invalid_json_error(exc, request)  # type: ignore[arg-type]
+    request[APISPEC_JSON_BODY] = data
+    return data
+
+
+_default_parser = ApigamiParser()
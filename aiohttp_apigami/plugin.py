@@ -1,11 +1,12 @@
 import copy
+from collections.abc import Mapping
 from typing import Any
 
 import marshmallow as m
 from apispec.core import VALID_METHODS
 from apispec.ext.marshmallow import MarshmallowPlugin
 
-from aiohttp_apigami.constants import API_SPEC_ATTR
+from aiohttp_apigami.handler_spec import get_handler_spec
 from aiohttp_apigami.typedefs import HandlerType
 from aiohttp_apigami.utils import get_path_keys
 
@@ -142,7 +143,7 @@ class ApigamiPlugin(MarshmallowPlugin):
         # Add example for all OpenAPI versions
         self._add_example(schema_instance=schema_instance, parameters=body_parameters, example=schema.get("example"))
 
-    def _get_method_operation(self, handler_spec: dict[str, Any]) -> dict[str, Any]:
+    def _get_method_operation(self, handler_spec: Mapping[str, Any]) -> dict[str, Any]:
         """
         Process request schemas for OpenAPI spec. Returns operation object.
 
@@ -180,7 +181,7 @@ class ApigamiPlugin(MarshmallowPlugin):
 
         return operation
 
-    def _process_responses(self, handler_spec: dict[str, Any], method_operation: dict[str, Any]) -> None:
+    def _process_responses(self, handler_spec: Mapping[str, Any], method_operation: dict[str, Any]) -> None:
         """
         Process response schemas for OpenAPI spec.
 
@@ -212,7 +213,7 @@ class ApigamiPlugin(MarshmallowPlugin):
         method_operation["responses"].update(responses)
 
     @staticmethod
-    def _process_extra_options(handler_spec: dict[str, Any], method_operation: dict[str, Any]) -> None:
+    def _process_extra_options(handler_spec: Mapping[str, Any], method_operation: dict[str, Any]) -> None:
         """
         Process extra options for OpenAPI spec.
 
@@ -291,8 +292,8 @@ class ApigamiPlugin(MarshmallowPlugin):
         assert handler is not None, "Missing 'handler' parameter"
 
         # Do nothing if is spec is not enabled
-        handler_spec = getattr(handler, API_SPEC_ATTR, {})
-        if not handler_spec:
+        handler_spec = get_handler_spec(handler)
+        if handler_spec is None:
             return path
 
         # Check if method is valid for the current OpenAPI version
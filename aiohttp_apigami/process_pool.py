@@ -0,0 +1,113 @@
+"""Validation of the ``json`` location in a pool of worker processes."""
+
+import asyncio
+import json
+import os
+from collections.abc import Callable
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.context import BaseContext
+from typing import Any
+
+import marshmallow as m
+
+# Statuses of the worker results
+OK = "ok"
+ERROR = "error"
+INVALID_JSON = "invalid_json"
+
+# Worker process state, set up by the pool initializer
+_worker_schemas: list[m.Schema] = []
+_worker_json_loads: Callable[[bytes], Any] = json.loads
+
+
+def _init_worker(schemas: list[m.Schema], json_loads: Callable[[bytes], Any]) -> None:
+    global _worker_json_loads
+    _worker_schemas[:] = schemas
+    _worker_json_loads = json_loads
+
+
+def _warm_up() -> int:
+    return os.getpid()
+
+
+def _load(index: int, schema: m.Schema | None, body: bytes) -> tuple[str, Any]:
+    """Decode the body and load it with the schema, in the worker process."""
+    if schema is None:
+        schema = _worker_schemas[index]
+
+    if body:
+        try:
+            data = _worker_json_loads(body)
+        except ValueError as e:  # also covers UnicodeDecodeError
+            return INVALID_JSON, str(e)
+    else:
+        # Same as an empty location in webargs
+        data = {}
+
+    try:
+        return OK, schema.load(data)
+    except m.ValidationError as e:
+        return ERROR, e.messages
+
+
+class ValidationProcessPool:
+    """
+    Process pool validating the ``json`` location of the ``process_pool=True`` schemas.
+
+    The raw body bytes are sent to a worker, which decodes and loads them with the schema
+    and sends back the validated data or the validation errors. The workers are started
+    and pre-warmed with the schemas on the app startup, and stopped on the app cleanup.
+    Schemas of routes added after the startup are sent to the workers with each request.
+
+    The validated data must be picklable, and so must be the schemas and the JSON decoder
+    if the multiprocessing start method is not ``fork``.
+
+    :param max_workers: number of worker processes, the number of CPUs by default
+    :param mp_context: multiprocessing context of the workers
+    """
+
+    __slots__ = ("_executor", "_indexes", "_schemas", "max_workers", "mp_context")
+
+    def __init__(self, max_workers: int | None = None, mp_context: BaseContext | None = None) -> None:
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.mp_context = mp_context
+        self._executor: ProcessPoolExecutor | None = None
+        self._schemas: list[m.Schema] = []
+        # Worker schema indexes keyed by schema id
+        self._indexes: dict[int, int] = {}
+
+    def add_schema(self, schema: m.Schema) -> None:
+        """Add the schema to pre-warm the workers with."""
+        if self._executor is None and id(schema) not in self._indexes:
+            self._indexes[id(schema)] = len(self._schemas)
+            self._schemas.append(schema)
+
+    async def start(self, json_loads: Callable[[bytes], Any]) -> None:
+        """Start all the worker processes."""
+        if self._executor is not None:
+            return
+
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=self.mp_context,
+            initializer=_init_worker,
+            initargs=(self._schemas, json_loads),
+        )
+        # Workers are spawned on demand, so keep them all busy to spawn them now
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(loop.run_in_executor(self._executor, _warm_up) for _ in range(self.max_workers)))
+
+    def shutdown(self) -> None:
+        """Stop the worker processes."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    async def load(self, schema: m.Schema, body: bytes) -> tuple[str, Any]:
+        """Load the body with the schema in a worker, return the status and the result."""
+        if self._executor is None:
+            raise RuntimeError("Validation process pool is not started")
+
+        index = self._indexes.get(id(schema), -1)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, _load, index, None if index >= 0 else schema, body)
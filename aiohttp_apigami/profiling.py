@@ -0,0 +1,217 @@
+"""On-demand profiling of the schema loads, controlled at runtime through an admin endpoint."""
+
+import asyncio
+import contextlib
+import cProfile
+import hmac
+import itertools
+import logging
+import os
+import re
+import threading
+import time
+from collections import Counter, deque
+from collections.abc import Callable
+from functools import partial
+from typing import Any
+
+import marshmallow as m
+from aiohttp import hdrs, web
+
+NAME_PROFILER = "apigami.profiler"
+
+logger = logging.getLogger(__name__)
+
+_UNSAFE_CHARS = re.compile(r"[^A-Za-z0-9_.-]+")
+
+
+class ProfilerSettingsSchema(m.Schema):
+    enabled = m.fields.Bool()
+    every = m.fields.Int(allow_none=True, validate=m.validate.Range(min=1))
+    threshold = m.fields.Float(allow_none=True, validate=m.validate.Range(min=0, min_inclusive=False))
+
+
+class ValidationProfiler:
+    """
+    Profiles the schema loads of the routes with ``cProfile`` and dumps the stats to a directory.
+
+    Every ``every``-th schema load of each route is profiled. A schema load slower than ``threshold``
+    seconds has already run, so the next load of the route is profiled instead, as it is likely slow too.
+    The stats are dumped to ``<directory>/<route>-<location>-<time>-<n>.prof`` files,
+    to be inspected with ``pstats``, ``snakeviz`` and the like. The stats are written in the default executor
+    of the loop, and only the ``max_dumps`` most recent files are kept, the older ones are deleted.
+
+    The settings can be changed at runtime with the admin endpoint, see ``handler``.
+
+    :param directory: directory to dump the stats to, created if needed
+    :param every: profile every N-th schema load of each route, disabled if ``None``
+    :param threshold: profile the next schema load of the routes with a load slower than this, in seconds
+    :param enabled: whether the profiling is enabled
+    :param token: bearer token of the admin endpoint, the endpoint rejects all requests if ``None``
+    :param max_dumps: number of the most recent stats files kept in the directory and listed by the admin endpoint
+    """
+
+    __slots__ = (
+        "_armed",
+        "_counts",
+        "_lock",
+        "_pending",
+        "_profiling",
+        "_sequence",
+        "directory",
+        "dumps",
+        "enabled",
+        "every",
+        "max_dumps",
+        "threshold",
+        "token",
+    )
+
+    def __init__(
+        self,
+        directory: str | os.PathLike[str],
+        *,
+        every: int | None = None,
+        threshold: float | None = None,
+        enabled: bool = True,
+        token: str | None = None,
+        max_dumps: int = 100,
+    ) -> None:
+        errors = ProfilerSettingsSchema().validate({"every": every, "threshold": threshold})
+        if errors:
+            raise ValueError(f"Invalid profiler settings: {errors}")
+        if max_dumps < 1:
+            raise ValueError("`max_dumps` must be positive")
+
+        self.directory = os.fspath(directory)
+        self.every = every
+        self.threshold = threshold
+        self.enabled = enabled
+        self.token = token
+        self.max_dumps = max_dumps
+        self.dumps: deque[str] = deque()
+        self._counts: Counter[str] = Counter()
+        # Routes to profile the next schema load of
+        self._armed: set[str] = set()
+        self._sequence = itertools.count()
+        # The stats are written, and the old files deleted, in the executor threads
+        self._lock = threading.Lock()
+        self._pending: set[asyncio.Future[None]] = set()
+        # The profilers are process-wide since Python 3.12, a single load is profiled at a time
+        self._profiling = threading.Lock()
+
+    def wrap(self, operation: str, location: str, load: Callable[..., Any]) -> Callable[..., Any]:
+        """Wrap the schema load of the route, to profile or time it"""
+        if not self.enabled:
+            return load
+
+        self._counts[operation] += 1
+        if operation in self._armed or (self.every is not None and self._counts[operation] % self.every == 0):
+            self._armed.discard(operation)
+            return partial(self._profile, operation, location, load)
+
+        if self.threshold is not None:
+            return partial(self._time, operation, load)
+        return load
+
+    def _time(self, operation: str, load: Callable[..., Any], *args: Any) -> Any:
+        start = time.perf_counter()
+        try:
+            return load(*args)
+        finally:
+            if self.threshold is not None and time.perf_counter() - start > self.threshold:
+                self._armed.add(operation)
+
+    def _profile(self, operation: str, location: str, load: Callable[..., Any], *args: Any) -> Any:
+        if not self._profiling.acquire(blocking=False):
+            # Another load is being profiled, in an executor thread
+            return load(*args)
+
+        try:
+            profile = cProfile.Profile()
+            try:
+                profile.enable()
+            except ValueError:
+                # Another profiling tool is active
+                return load(*args)
+
+            try:
+                return load(*args)
+            finally:
+                profile.disable()
+                self._dump(profile, f"{operation}-{location}")
+        finally:
+            self._profiling.release()
+
+    def _dump(self, profile: cProfile.Profile, name: str) -> None:
+        filename = f"{_UNSAFE_CHARS.sub('_', name)}-{time.strftime('%Y%m%dT%H%M%S')}-{next(self._sequence)}.prof"
+        path = os.path.join(self.directory, filename)
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # Already off the loop, the schema load is offloaded to an executor
+            self._write(profile, path)
+            return
+
+        future = loop.run_in_executor(None, self._write, profile, path)
+        self._pending.add(future)
+        future.add_done_callback(self._pending.discard)
+
+    def _write(self, profile: cProfile.Profile, path: str) -> None:
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            profile.dump_stats(path)
+        except OSError:
+            logger.exception("Failed to dump the profile stats to %s", path)
+            return
+
+        with self._lock:
+            self.dumps.append(path)
+            stale = [self.dumps.popleft() for _ in range(len(self.dumps) - self.max_dumps)]
+        for stale_path in stale:
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(stale_path)
+
+    async def wait(self) -> None:
+        """Wait for the scheduled stats dumps to complete"""
+        if self._pending:
+            await asyncio.gather(*self._pending, return_exceptions=True)
+
+    def settings(self) -> dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "every": self.every,
+            "threshold": self.threshold,
+            "directory": self.directory,
+            "dumps": list(self.dumps),
+        }
+
+    def _is_authorized(self, request: web.Request) -> bool:
+        if self.token is None:
+            return False
+        scheme, _, token = request.headers.get(hdrs.AUTHORIZATION, "").partition(" ")
+        return scheme.lower() == "bearer" and hmac.compare_digest(token.encode(), self.token.encode())
+
+    async def handler(self, request: web.Request) -> web.Response:
+        """
+        Admin endpoint, authorized with the ``Authorization: Bearer <token>`` header.
+
+        ``GET`` returns the settings and the recent stats files,
+        ``POST`` updates the settings from a JSON object with ``enabled``, ``every`` and ``threshold``.
+        """
+        if not self._is_authorized(request):
+            raise web.HTTPUnauthorized(headers={hdrs.WWW_AUTHENTICATE: "Bearer"})
+
+        if request.method == hdrs.METH_POST:
+            try:
+                settings = ProfilerSettingsSchema().load(await request.json())
+            except ValueError:
+                return web.json_response({"json": ["Invalid JSON body."]}, status=400)
+            except m.ValidationError as e:
+                return web.json_response(e.messages, status=422)
+
+            for name, value in settings.items():
+                setattr(self, name, value)
+            self._armed.clear()
+
+        return web.json_response(self.settings())
@@ -0,0 +1,104 @@
+"""Sampled validation of the responses against the declared response schemas."""
+
+import asyncio
+import json
+import logging
+import random
+from collections import Counter
+from collections.abc import Mapping
+from concurrent.futures import Executor
+from functools import partial
+from typing import Any
+
+import marshmallow as m
+from aiohttp import web
+
+from .metrics import operation_name
+
+logger = logging.getLogger(__name__)
+
+# Route and status code
+SampleKey = tuple[str, int]
+# Response schemas with their sample rates, keyed by status code
+ResponseSchemas = Mapping[int, tuple[m.Schema, float | None]]
+
+
+def _check(schema: m.Schema, body: bytes) -> Any:
+    """Return the errors of the response body, ``None`` if it matches the schema"""
+    try:
+        data = json.loads(body)
+    except ValueError as e:
+        return f"Invalid JSON: {e}"
+
+    try:
+        # Unknown fields are excluded, so dump-only fields don't fail the check
+        schema.load(data, unknown=m.EXCLUDE)
+    except m.ValidationError as e:
+        return e.messages
+    except Exception as e:
+        return f"{type(e).__name__}: {e}"
+    return None
+
+
+class ResponseSampler:
+    """
+    Checks a sample of the JSON responses against the response schema of their status code.
+
+    The sampled response body is decoded and loaded with the schema in an executor,
+    in the background, so the check doesn't delay the response. Mismatches are logged
+    and counted by route and status code.
+
+    :param rate: share of the responses to check, ``0.001`` checks one of a thousand.
+                 Routes may override it with ``response_schema(..., sample_rate=...)``.
+    :param executor: executor to run the checks in, the loop default executor if ``None``
+    """
+
+    __slots__ = ("_pending", "checked", "executor", "mismatches", "rate")
+
+    def __init__(self, rate: float = 0.001, *, executor: Executor | None = None) -> None:
+        if not 0 <= rate <= 1:
+            raise ValueError(f"Invalid `rate`: {rate!r}, must be in [0, 1]")
+
+        self.rate = rate
+        self.executor = executor
+        self.checked: Counter[SampleKey] = Counter()
+        self.mismatches: Counter[SampleKey] = Counter()
+        self._pending: set[asyncio.Future[Any]] = set()
+
+    def sample(self, request: web.Request, response: web.StreamResponse, schemas: ResponseSchemas) -> None:
+        """Schedule the check of the response, if it is sampled"""
+        entry = schemas.get(response.status)
+        if entry is None:
+            return
+
+        schema, rate = entry
+        if random.random() >= (self.rate if rate is None else rate):
+            return
+
+        # Only complete JSON bodies can be checked
+        if not isinstance(response, web.Response) or response.content_type != "application/json":
+            return
+        body = response.body
+        if not isinstance(body, bytes):
+            return
+
+        route = operation_name(request)
+        future = asyncio.get_running_loop().run_in_executor(self.executor, _check, schema, body)
+        self._pending.add(future)
+        future.add_done_callback(partial(self._done, (route, response.status)))
+
+    def _done(self, key: SampleKey, future: "asyncio.Future[Any]") -> None:
+        self._pending.discard(future)
+        if future.cancelled():
+            return
+
+        self.checked[key] += 1
+        errors = future.result()
+        if errors is not None:
+            self.mismatches[key] += 1
+            logger.warning("Response of `%s` with status %d doesn't match the schema: %s", *key, errors)
+
+    async def wait(self) -> None:
+        """Wait for the scheduled checks to complete"""
+        if self._pending:
+            await asyncio.gather(*self._pending, return_exceptions=True)
@@ -1,21 +1,25 @@
 from collections.abc import Iterator
+from typing import TYPE_CHECKING
 
 from aiohttp import web
 from aiohttp.hdrs import METH_ALL
-from apispec import APISpec
 
-from .constants import API_SPEC_ATTR
 from .data import RouteData
+from .handler_spec import HandlerSpec, get_handler_spec
 from .typedefs import HandlerType
 from .utils import get_path, is_class_based_view
+from .validation import ValidationPlans
+
+if TYPE_CHECKING:
+    from apispec import APISpec
 
 
 class RouteProcessor:
-    """Processes aiohttp routes to extract OpenAPI data."""
+    """Processes aiohttp routes to extract OpenAPI data. Only registering the routes requires the spec."""
 
     __slots__ = ("_prefix", "_spec")
 
-    def __init__(self, spec: APISpec, prefix: str = ""):
+    def __init__(self, spec: "APISpec | None" = None, prefix: str = ""):
         self._spec = spec
         self._prefix = prefix
 
@@ -28,7 +32,7 @@ class RouteProcessor:
 
     @staticmethod
     def _has_spec(handler: HandlerType) -> bool:
-        return hasattr(handler, API_SPEC_ATTR)
+        return get_handler_spec(handler) is not None
 
     def _iter_routes(self, app: web.Application) -> Iterator[RouteData]:
         for route in app.router.routes():
@@ -59,11 +63,41 @@ class RouteProcessor:
 
                 yield RouteData(method=method, path=path, handler=handler)
 
-    def register_routes(self, app: web.Application) -> None:
-        """Register all routes from the application."""
-        for route in self._iter_routes(app):
+    def get_routes(self, app: web.Application) -> list[RouteData]:
+        """Get all routes with spec data from the application."""
+        return list(self._iter_routes(app))
+
+    def register_routes(self, app: web.Application, routes: list[RouteData] | None = None) -> None:
+        """Register all routes from the application, or only the given ones."""
+        for route in self._iter_routes(app) if routes is None else routes:
             self.register_route(route)
 
     def register_route(self, route: RouteData) -> None:
         """Register a single route. It will be processed by AiohttpPlugin."""
+        if self._spec is None:
+            raise RuntimeError("Routes can't be registered without a spec")
         self._spec.path(path=route.path, method=route.method, handler=route.handler)
+
+    def register_plans(self, app: web.Application, plans: ValidationPlans) -> None:
+        """Compile validation plans for all routes from the application."""
+        for route in app.router.routes():
+            handler = route.handler
+
+            # Class based views have a plan per implemented method
+            if is_class_based_view(handler):
+                for method_name, method_func in self._get_implemented_methods(handler):
+                    # Views must return responses, so their results are never serialized
+                    self._compile_plan(plans, (route, method_name.upper()), get_handler_spec(method_func), False)
+
+            # Function based views have a single plan
+            else:
+                self._compile_plan(plans, (route, route.method), get_handler_spec(handler))
+
+    @staticmethod
+    def _compile_plan(
+        plans: ValidationPlans, key: tuple[web.AbstractRoute, str], spec: HandlerSpec | None, serialize: bool = True
+    ) -> None:
+        if spec is None:
+            plans.compile(key, None)
+        else:
+            plans.compile(key, spec.validation, spec.serialized_response if serialize else None, spec.response_schemas)
@@ -0,0 +1,207 @@
+"""Compiled serialization of handler results with the response schema."""
+
+import json
+from collections.abc import Callable
+from typing import Any
+
+import marshmallow as m
+from aiohttp import web
+
+JSONDumps = Callable[[Any], bytes]
+JSONEncoder = str | JSONDumps
+Dumper = Callable[[Any], Any]
+
+_missing = m.missing
+
+
+def _json_dumps(obj: Any) -> bytes:
+    return json.dumps(obj).encode("utf-8")
+
+
+def get_json_dumps(encoder: JSONEncoder) -> JSONDumps:
+    """
+    Resolve JSON encoder into a function encoding response data to bytes.
+
+    The encoder is either a callable, or one of the names:
+    ``"json"`` (standard library), ``"orjson"`` or ``"msgspec"``.
+    """
+    if callable(encoder):
+        return encoder
+
+    if encoder == "json":
+        return _json_dumps
+
+    # Imported on demand, to keep them out of the import of the decorators and the middleware
+    if encoder == "orjson":
+        try:
+            import orjson
+        except ImportError:
+            raise RuntimeError(
+                "orjson is required for `orjson` JSON encoder. Install it with `pip install orjson`."
+            ) from None
+        return orjson.dumps
+
+    if encoder == "msgspec":
+        try:
+            import msgspec
+        except ImportError:
+            raise RuntimeError(
+                "msgspec is required for `msgspec` JSON encoder. Install it with `pip install msgspec`."
+            ) from None
+        return msgspec.json.encode
+
+    raise ValueError(f"Invalid `json_encoder`: {encoder!r}")
+
+
+def _get_value(obj: Any, key: str) -> Any:
+    """Same as the default marshmallow accessor for a non-dotted key"""
+    if type(obj) is dict:
+        value = obj.get(key, _missing)
+        return getattr(obj, key, _missing) if value is _missing else value
+
+    if not hasattr(obj, "__getitem__"):
+        return getattr(obj, key, _missing)
+
+    try:
+        return obj[key]
+    except (KeyError, IndexError, TypeError, AttributeError):
+        return getattr(obj, key, _missing)
+
+
+def _text(value: Any) -> str:
+    return value.decode("utf-8") if isinstance(value, bytes) else str(value)
+
+
+def _nullable(convert: Callable[[Any], Any]) -> Callable[[Any], Any]:
+    return lambda value: None if value is None else convert(value)
+
+
+def _boolean(field: m.fields.Boolean) -> Callable[[Any], Any]:
+    truthy, falsy = field.truthy, field.falsy
+
+    def convert(value: Any) -> Any:
+        if value is None:
+            return None
+        try:
+            if value in truthy:
+                return True
+            if value in falsy:
+                return False
+        except TypeError:
+            pass
+        return bool(value)
+
+    return convert
+
+
+def _compile_field(field: m.fields.Field, stack: tuple[type[m.Schema], ...]) -> Callable[[Any], Any] | None:
+    """Compile a converter of the field value, ``None`` if the field needs the generic `serialize`"""
+    field_type = type(field)
+
+    # Exact types only, subclasses may override `_serialize`
+    if field_type is m.fields.Raw:
+        return lambda value: value
+    if field_type is m.fields.String:
+        return _nullable(_text)
+    if field_type is m.fields.Integer and not field.as_string:  # type: ignore[attr-defined]
+        return _nullable(int)
+    if field_type is m.fields.Float and not field.as_string:  # type: ignore[attr-defined]
+        return _nullable(float)
+    if field_type is m.fields.Boolean:
+        return _boolean(field)  # type: ignore[arg-type]
+
+    if field_type is m.fields.Nested:
+        nested_schema = field.schema  # type: ignore[attr-defined]
+        nested = _compile_schema(nested_schema, stack, many=nested_schema.many or field.many)  # type: ignore[attr-defined]
+        return None if nested is None else _nullable(nested)
+
+    if field_type is m.fields.List:
+        inner = _compile_field(field.inner, stack)  # type: ignore[attr-defined]
+        if inner is None:
+            return None
+        return _nullable(lambda value: [inner(item) for item in value])
+
+    return None
+
+
+def _is_compilable(schema_cls: type[m.Schema], stack: tuple[type[m.Schema], ...]) -> bool:
+    hooks = getattr(schema_cls, "_hooks", {})
+    return not (
+        schema_cls in stack  # self-referencing schema
+        or hooks.get("pre_dump")
+        or hooks.get("post_dump")
+        or schema_cls.get_attribute is not m.Schema.get_attribute
+    )
+
+
+def _make_dump(steps: list[tuple[str, str, str, m.fields.Field, Any]], get_attribute: Any) -> Dumper:
+    def dump(obj: Any) -> dict[str, Any]:
+        ret = {}
+        for key, name, attr, field, convert in steps:
+            if convert is None:
+                value = field.serialize(name, obj, accessor=get_attribute)
+                if value is _missing:
+                    continue
+            else:
+                value = _get_value(obj, attr)
+                if value is _missing:
+                    default = field.dump_default
+                    value = default() if callable(default) else default
+                    if value is _missing:
+                        continue
+                value = convert(value)
+            ret[key] = value
+        return ret
+
+    return dump
+
+
+def _compile_schema(schema: m.Schema, stack: tuple[type[m.Schema], ...], many: bool) -> Dumper | None:
+    """Compile a dumper of the schema, ``None`` if the schema needs the generic `dump`"""
+    schema_cls = type(schema)
+    if not _is_compilable(schema_cls, stack):
+        return None
+
+    stack = (*stack, schema_cls)
+    steps = []
+    for name, field in schema.dump_fields.items():
+        attr = name if field.attribute is None else field.attribute
+        key = name if field.data_key is None else field.data_key
+        convert = None
+        if field._CHECK_ATTRIBUTE and "." not in attr:
+            convert = _compile_field(field, stack)
+        steps.append((key, name, attr, field, convert))
+
+    dump = _make_dump(steps, schema.get_attribute)
+
+    if many:
+        return lambda objs: [dump(obj) for obj in objs]
+    return dump
+
+
+def compile_dumper(schema: m.Schema) -> Dumper:
+    """
+    Compile a function serializing objects with the schema, equivalent to ``schema.dump``.
+
+    Accessors and converters of the common fields are resolved once, so serialization doesn't
+    go through the generic marshmallow machinery per object. Schemas with dump hooks
+    or a custom ``get_attribute`` fall back to ``schema.dump``, and so do the fields
+    that are not simple (dotted attributes, custom or method fields).
+    """
+    dumper = _compile_schema(schema, (), many=schema.many)
+    return schema.dump if dumper is None else dumper
+
+
+class ResponseSerializer:
+    """Serializer of the handler results into JSON responses."""
+
+    __slots__ = ("dump", "dumps", "status")
+
+    def __init__(self, schema: m.Schema, status: int, dumps: JSONDumps):
+        self.dump = compile_dumper(schema)
+        self.dumps = dumps
+        self.status = status
+
+    def make_response(self, obj: Any) -> web.Response:
+        """Serialize the object into a response"""
+        return web.Response(body=self.dumps(self.dump(obj)), status=self.status, content_type="application/json")
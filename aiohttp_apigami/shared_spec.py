@@ -0,0 +1,165 @@
+"""Encoded OpenAPI spec shared by the worker processes of a host through a memory-mapped file."""
+
+import json
+import logging
+import mmap
+import os
+import struct
+import tempfile
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any
+
+from .data import EncodedSpec
+
+try:
+    import fcntl
+
+except ImportError:  # pragma: no cover
+    fcntl = None  # type: ignore[assignment]
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"APIGAMI-SPEC"
+# Bump to invalidate the files written by older versions of the format
+SHARED_FORMAT_VERSION = 1
+
+IDENTITY = "identity"
+
+# Size of the JSON header, which follows the magic
+_HEADER_SIZE = struct.Struct(">I")
+
+
+def write_shared_spec(
+    path: str | os.PathLike[str], fingerprint: str, encoded: EncodedSpec, compressed: bool = False
+) -> None:
+    """
+    Atomically write the encoded spec and its compressed variants to the file.
+
+    The file is a JSON header with the fingerprint, the ETag and the offsets of the bodies,
+    followed by the bodies, so the workers serve them from the mapped pages as they are.
+    """
+    bodies = {IDENTITY: encoded.body, **encoded.variants}
+    parts = {}
+    offset = 0
+    for name, body in bodies.items():
+        parts[name] = [offset, len(body)]
+        offset += len(body)
+    header = json.dumps(
+        {
+            "format": SHARED_FORMAT_VERSION,
+            "fingerprint": fingerprint,
+            "etag": encoded.etag,
+            "compressed": compressed,
+            "parts": parts,
+        }
+    ).encode("utf-8")
+
+    directory = Path(path).parent
+    directory.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".apispec-", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(MAGIC + _HEADER_SIZE.pack(len(header)) + header)
+            for body in bodies.values():
+                f.write(body)
+        # Workers which have mapped the previous file keep serving it
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def _read_header(mapping: mmap.mmap) -> tuple[dict[str, Any], int]:
+    """Header of the mapped file and the offset of the bodies"""
+    start = len(MAGIC) + _HEADER_SIZE.size
+    if mapping[: len(MAGIC)] != MAGIC or len(mapping) < start:
+        raise ValueError("not a shared spec file")
+
+    (size,) = _HEADER_SIZE.unpack(mapping[len(MAGIC) : start])
+    header = json.loads(mapping[start : start + size])
+    if not isinstance(header, dict) or header.get("format") != SHARED_FORMAT_VERSION:
+        raise ValueError("unsupported format")
+    return header, start + size
+
+
+def open_shared_spec(path: str | os.PathLike[str], fingerprint: str, compressed: bool = False) -> EncodedSpec | None:
+    """Map the spec file to memory, if it matches the fingerprint. The bodies are views of the mapping."""
+    try:
+        with open(path, "rb") as f:
+            mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        logger.warning("Failed to map shared API spec %s: %s", path, e)
+        return None
+
+    try:
+        header, start = _read_header(mapping)
+    except ValueError as e:
+        mapping.close()
+        logger.warning("Failed to read shared API spec %s: %s", path, e)
+        return None
+
+    if header.get("fingerprint") != fingerprint or header.get("compressed") != compressed:
+        mapping.close()
+        logger.info("Shared API spec %s is outdated", path)
+        return None
+
+    view = memoryview(mapping)
+    bodies = {name: view[start + offset : start + offset + size] for name, (offset, size) in header["parts"].items()}
+    return EncodedSpec(body=bodies.pop(IDENTITY), etag=header["etag"], variants=bodies)
+
+
+@contextmanager
+def _lock(path: str | os.PathLike[str]) -> Iterator[None]:
+    """Exclusive lock of the spec file, so one process builds it while the others wait"""
+    lock_path = f"{os.fspath(path)}.lock"
+    lock_file = None
+    try:
+        Path(lock_path).parent.mkdir(parents=True, exist_ok=True)
+        lock_file = open(lock_path, "ab")
+    except OSError as e:
+        logger.warning("Failed to lock shared API spec %s: %s", path, e)
+
+    # Without the lock the processes may build the spec at the same time, the file is replaced atomically anyway
+    if lock_file is None:
+        yield
+        return
+
+    with lock_file:
+        if fcntl is not None:
+            # Released when the file is closed
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        yield
+
+
+def load_or_build_shared_spec(
+    path: str | os.PathLike[str], fingerprint: str, build: Callable[[], EncodedSpec], compressed: bool = False
+) -> EncodedSpec:
+    """
+    Map the spec file, building and writing it first if it is missing or outdated.
+
+    One process builds the spec at a time, the others wait for it and map the written file.
+    If the file can't be written, the built spec is served from the process memory.
+    """
+    shared = open_shared_spec(path, fingerprint, compressed)
+    if shared is not None:
+        return shared
+
+    with _lock(path):
+        # Written by another process while this one was waiting for the lock
+        shared = open_shared_spec(path, fingerprint, compressed)
+        if shared is not None:
+            return shared
+
+        encoded = build()
+        try:
+            write_shared_spec(path, fingerprint, encoded, compressed)
+        except OSError as e:
+            logger.warning("Failed to write shared API spec %s: %s", path, e)
+            return encoded
+
+    shared = open_shared_spec(path, fingerprint, compressed)
+    return encoded if shared is None else shared
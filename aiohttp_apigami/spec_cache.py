@@ -0,0 +1,198 @@
+"""Persistent on-disk cache of the generated OpenAPI spec."""
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from collections.abc import Iterable, Mapping
+from importlib import metadata
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+import marshmallow as m
+
+from .data import RouteData
+from .handler_spec import get_handler_spec
+
+if TYPE_CHECKING:
+    from apispec import APISpec
+
+logger = logging.getLogger(__name__)
+
+# Bump to invalidate caches written by older versions of the cache format
+CACHE_FORMAT_VERSION = 1
+
+# Field attributes that are either back references or irrelevant for the spec
+_SKIP_FIELD_ATTRS = frozenset({"name", "parent", "root", "error_messages"})
+
+_DISTRIBUTIONS = ("aiohttp-apigami", "apispec", "marshmallow")
+
+
+def _qualname(obj: Any) -> str:
+    module = getattr(obj, "__module__", None) or type(obj).__module__
+    name = getattr(obj, "__qualname__", None) or type(obj).__qualname__
+    return f"{module}.{name}"
+
+
+def _describe(value: Any, stack: tuple[type, ...] = ()) -> Any:
+    """Build a deterministic JSON-serializable description of the value."""
+    if value is None or isinstance(value, bool | int | float | str):
+        return value
+    if isinstance(value, m.Schema):
+        return _describe_schema(value, stack)
+    if isinstance(value, m.fields.Field):
+        return _describe_field(value, stack)
+    if isinstance(value, type):
+        return _qualname(value)
+    if isinstance(value, Mapping):
+        return {str(k): _describe(v, stack) for k, v in value.items()}
+    if isinstance(value, list | tuple):
+        return [_describe(v, stack) for v in value]
+    if isinstance(value, set | frozenset):
+        return sorted((_describe(v, stack) for v in value), key=repr)
+    if callable(value) and hasattr(value, "__qualname__"):
+        return _qualname(value)
+    if type(value).__repr__ is object.__repr__:  # type: ignore[comparison-overlap]
+        # The default repr has the memory address, which changes on every start
+        return _describe_object(value, stack)
+    return repr(value)
+
+
+def _describe_object(value: Any, stack: tuple[type, ...]) -> Any:
+    """Describe an object without a repr by its type and its attributes"""
+    value_cls = type(value)
+    if value_cls in stack:
+        # Self-referencing object, the class name is enough
+        return _qualname(value_cls)
+    if not hasattr(value, "__dict__"):
+        logger.warning("%r can't be described for the API spec cache, its changes are not detected", value)
+        return _qualname(value_cls)
+    return {"type": _qualname(value_cls), "attrs": _describe(vars(value), (*stack, value_cls))}
+
+
+def _describe_field(field: m.fields.Field, stack: tuple[type, ...]) -> dict[str, Any]:
+    description: dict[str, Any] = {"type": _qualname(type(field))}
+    for attr, value in vars(field).items():
+        if attr.startswith("_") or attr in _SKIP_FIELD_ATTRS:
+            continue
+        if attr == "nested" and isinstance(field, m.fields.Nested):
+            # `nested` may be a lambda or a class name, so describe the resolved schema instead
+            value = field.schema
+        description[attr] = _describe(value, stack)
+    return description
+
+
+def _describe_schema(schema: m.Schema, stack: tuple[type, ...]) -> dict[str, Any] | str:
+    schema_cls = type(schema)
+    if schema_cls in stack:
+        # Self-referencing schema, the class name is enough
+        return _qualname(schema_cls)
+
+    stack = (*stack, schema_cls)
+    return {
+        "type": _qualname(schema_cls),
+        "many": schema.many,
+        "partial": _describe(schema.partial, stack),
+        "only": _describe(schema.only, stack),
+        "exclude": _describe(schema.exclude, stack),
+        "unknown": schema.unknown,
+        "load_only": _describe(schema.load_only, stack),
+        "dump_only": _describe(schema.dump_only, stack),
+        "meta": _describe_meta(schema_cls, stack),
+        "fields": {name: _describe_field(field, stack) for name, field in schema.fields.items()},
+    }
+
+
+def _describe_meta(schema_cls: type[m.Schema], stack: tuple[type, ...]) -> dict[str, Any]:
+    """
+    All the ``Meta`` options, inherited ones included. apispec reads ``title``, ``description``,
+    ``exclude``, ``dump_only``, ``fields`` and ``additional`` from the class itself, not from the schema options.
+    """
+    meta = getattr(schema_cls, "Meta", None)
+    if meta is None:
+        return {}
+    return {name: _describe(getattr(meta, name), stack) for name in dir(meta) if not name.startswith("_")}
+
+
+def _versions() -> dict[str, str | None]:
+    versions: dict[str, str | None] = {}
+    for distribution in _DISTRIBUTIONS:
+        try:
+            versions[distribution] = metadata.version(distribution)
+        except metadata.PackageNotFoundError:
+            versions[distribution] = None
+    return versions
+
+
+def spec_fingerprint(routes: Iterable[RouteData], spec: "APISpec") -> str:
+    """
+    Calculate a fingerprint of everything the generated spec depends on.
+
+    It covers the route table, the handlers spec metadata with the schemas,
+    the APISpec options and plugins, and the versions of the spec generating packages.
+    """
+    description = {
+        "format": CACHE_FORMAT_VERSION,
+        "versions": _versions(),
+        "spec": {
+            "title": spec.title,
+            "version": spec.version,
+            "openapi_version": str(spec.openapi_version),
+            "options": _describe(spec.options),
+            "plugins": [
+                {
+                    "type": _qualname(type(plugin)),
+                    "schema_name_resolver": _describe(getattr(plugin, "schema_name_resolver", None)),
+                }
+                for plugin in spec.plugins
+            ],
+        },
+        "routes": [
+            {
+                "method": route.method,
+                "path": route.path,
+                "handler": _qualname(route.handler),
+                "spec": _describe(get_handler_spec(route.handler) or {}),
+            }
+            for route in routes
+        ],
+    }
+    encoded = json.dumps(description, sort_keys=True, default=_describe).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def load_cached_spec(path: str | os.PathLike[str], fingerprint: str) -> dict[str, Any] | None:
+    """Load the spec from the cache file if it matches the fingerprint."""
+    try:
+        with open(path, encoding="utf-8") as f:
+            cached = json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        logger.warning("Failed to read API spec cache %s: %s", path, e)
+        return None
+
+    if not isinstance(cached, dict) or cached.get("fingerprint") != fingerprint:
+        logger.info("API spec cache %s is outdated", path)
+        return None
+
+    spec: dict[str, Any] = cached["spec"]
+    return spec
+
+
+def store_cached_spec(path: str | os.PathLike[str], fingerprint: str, spec: dict[str, Any]) -> None:
+    """Atomically write the spec with its fingerprint to the cache file."""
+    directory = Path(path).parent
+    try:
+        directory.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".apispec-", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump({"fingerprint": fingerprint, "spec": spec}, f)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+    except OSError as e:
+        logger.warning("Failed to write API spec cache %s: %s", path, e)
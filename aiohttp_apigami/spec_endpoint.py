@@ -0,0 +1,12 @@
+from aiohttp import web
+
+from .constants import APISPEC_ENCODED_SPEC
+
+# Clients may keep the spec, but have to revalidate it with the ETag before use
+SPEC_CACHE_CONTROL = "no-cache"
+
+
+async def spec_handler(request: web.Request) -> web.Response:
+    """Serve the pre-serialized OpenAPI spec with conditional GET support."""
+    encoded_spec = request.app[APISPEC_ENCODED_SPEC]
+    return encoded_spec.make_response(request, content_type="application/json", cache_control=SPEC_CACHE_CONTROL)
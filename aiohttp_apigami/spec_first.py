@@ -0,0 +1,421 @@
+"""
+Validation of the spec-first services, bound to the app routes from an existing OpenAPI document.
+
+The JSON Schemas of the document are compiled to marshmallow schemas, so the requests are validated
+by the same validation plans as the ones of the decorated handlers. The compiled subset of JSON Schema:
+``type`` (``null`` and ``nullable`` included), ``format`` of the dates, UUIDs and emails, ``enum``,
+``required``, ``default``, ``properties``, ``additionalProperties``, ``items``, ``allOf``,
+the length, item and range limits and ``pattern``. ``oneOf``, ``anyOf`` and ``not`` are not validated.
+"""
+
+import logging
+import re
+from collections.abc import Callable, Iterator, Mapping
+from typing import Any, cast
+
+import marshmallow as m
+from aiohttp import web
+from aiohttp.hdrs import METH_ALL
+
+from .utils import get_path, is_class_based_view
+from .validation import ValidationPlans, ValidationSchema
+
+logger = logging.getLogger(__name__)
+
+# Request locations of the parameters, they are put into the request under the location name
+PARAMETER_LOCATIONS = {"path": "match_info", "query": "querystring", "header": "headers", "cookie": "cookies"}
+FORM_CONTENT_TYPES = ("application/x-www-form-urlencoded", "multipart/form-data")
+
+STRING_FORMATS: dict[str, type[m.fields.Field]] = {
+    "date-time": m.fields.DateTime,
+    "date": m.fields.Date,
+    "time": m.fields.Time,
+    "uuid": m.fields.UUID,
+    "email": m.fields.Email,
+}
+
+# Schema reference and whether the schema is compiled for the responses and for the JSON bodies
+_SchemaKey = tuple[str, bool, bool]
+
+
+class _Pattern(m.validate.Regexp):
+    """JSON Schema patterns are not anchored, they match anywhere in the string"""
+
+    def __call__(self, value: Any) -> Any:
+        if self.regex.search(value) is None:
+            raise m.ValidationError(self._format_error(value))
+        return value
+
+
+class _StrictFloat(m.fields.Float):
+    """JSON numbers only, the strings of numbers are invalid"""
+
+    def _validated(self, value: Any) -> float:
+        if isinstance(value, str):
+            raise self.make_error("invalid", input=value)
+        return super()._validated(value)
+
+
+class _StrictBoolean(m.fields.Boolean):
+    """JSON booleans only, the strings and the numbers are invalid"""
+
+    def _deserialize(self, value: Any, attr: str | None, data: Mapping[str, Any] | None, **kwargs: Any) -> bool:
+        if value is not True and value is not False:
+            raise self.make_error("invalid", input=value)
+        return value
+
+
+def _make_schema(name: str, fields: Mapping[str, m.fields.Field], unknown: str) -> type[m.Schema]:
+    # Not registered in the class registry, the names of the document schemas may clash with the app ones
+    meta = type("Meta", (), {"unknown": unknown, "register": False})
+    return type(name, (m.Schema,), {**fields, "Meta": meta})
+
+
+def is_json_content_type(content_type: str) -> bool:
+    return content_type == "application/json" or content_type.endswith("+json")
+
+
+class SchemaCompiler:
+    """
+    Compiles the JSON Schemas of an OpenAPI document, of version 2.0 or 3.x, to marshmallow schemas.
+
+    The schemas of the request bodies are strict about the types, the parameters are converted from strings.
+    The ``readOnly`` properties are left out of the request schemas, the ``writeOnly`` ones of the response schemas.
+    """
+
+    __slots__ = ("_document", "_schemas")
+
+    def __init__(self, document: Mapping[str, Any]):
+        self._document = document
+        # Compiled referenced schemas, `None` while they are compiled, so the recursive ones refer to themselves
+        self._schemas: dict[_SchemaKey, type[m.Schema] | None] = {}
+
+    def resolve(self, obj: Mapping[str, Any]) -> Mapping[str, Any]:
+        """Follow the references of the document, only the local ones are supported"""
+        seen = set()
+        while "$ref" in obj:
+            ref = obj["$ref"]
+            if not ref.startswith("#/"):
+                raise ValueError(f"Only local references are supported, got {ref!r}")
+            if ref in seen:
+                raise ValueError(f"Circular reference {ref!r}")
+            seen.add(ref)
+
+            target: Any = self._document
+            for part in ref[2:].split("/"):
+                part = part.replace("~1", "/").replace("~0", "~")
+                try:
+                    target = target[part]
+                except (KeyError, TypeError):
+                    raise ValueError(f"Invalid reference {ref!r}") from None
+            obj = target
+        return obj
+
+    def schema(self, json_schema: Mapping[str, Any], response: bool = False, strict: bool = True) -> type[m.Schema]:
+        """Compile an object schema to a schema class"""
+        json_schema = self._merge(self.resolve(json_schema))
+        required = set(json_schema.get("required", ()))
+
+        fields = {}
+        for name, prop in json_schema.get("properties", {}).items():
+            resolved = self.resolve(prop)
+            if resolved.get("writeOnly" if response else "readOnly"):
+                continue
+            fields[name] = self.field(prop, name in required, response, strict)
+
+        # Additional properties are allowed by default, and kept in the loaded data
+        unknown = m.RAISE if json_schema.get("additionalProperties") is False else m.INCLUDE
+        return _make_schema(str(json_schema.get("title", "DocumentSchema")), fields, unknown)
+
+    def field(
+        self, json_schema: Mapping[str, Any], required: bool = False, response: bool = False, strict: bool = True
+    ) -> m.fields.Field:
+        """Compile a property schema to a field"""
+        resolved = self._merge(self.resolve(json_schema))
+        schema_type = resolved.get("type")
+        nullable = bool(resolved.get("nullable") or resolved.get("x-nullable"))
+        if isinstance(schema_type, list):
+            # OpenAPI 3.1 types may be lists, with `null` for the nullable ones
+            nullable = nullable or "null" in schema_type
+            types = [t for t in schema_type if t != "null"]
+            schema_type = types[0] if len(types) == 1 else None
+
+        kwargs: dict[str, Any] = {"required": required, "allow_none": nullable, "validate": self._validators(resolved)}
+        if not required and "default" in resolved:
+            kwargs["load_default"] = resolved["default"]
+
+        if schema_type == "object" or (schema_type is None and "properties" in resolved):
+            return self._object_field(json_schema, resolved, response, strict, kwargs)
+        if schema_type == "array":
+            items = resolved.get("items")
+            inner = m.fields.Raw() if items is None else self.field(items, False, response, strict)
+            return m.fields.List(inner, **kwargs)
+        if schema_type == "string":
+            return STRING_FORMATS.get(resolved.get("format", ""), m.fields.String)(**kwargs)
+        if schema_type == "integer":
+            return m.fields.Integer(strict=strict, **kwargs)
+        if schema_type == "number":
+            return (_StrictFloat if strict else m.fields.Float)(**kwargs)
+        if schema_type == "boolean":
+            return (_StrictBoolean if strict else m.fields.Boolean)(**kwargs)
+        return m.fields.Raw(**kwargs)
+
+    def _object_field(
+        self,
+        json_schema: Mapping[str, Any],
+        resolved: Mapping[str, Any],
+        response: bool,
+        strict: bool,
+        kwargs: dict[str, Any],
+    ) -> m.fields.Field:
+        if "properties" not in resolved:
+            additional = resolved.get("additionalProperties")
+            values = self.field(additional, False, response, strict) if isinstance(additional, Mapping) else None
+            return m.fields.Dict(values=values, **kwargs)
+
+        ref = json_schema.get("$ref")
+        if ref is None:
+            return m.fields.Nested(self.schema(resolved, response, strict), **kwargs)
+
+        key = (ref, response, strict)
+        if key not in self._schemas:
+            self._schemas[key] = None
+            self._schemas[key] = self.schema(resolved, response, strict)
+
+        def nested() -> m.Schema:
+            # The recursive schemas are compiled by the time the field is used
+            return cast(type[m.Schema], self._schemas[key])()
+
+        return m.fields.Nested(nested, **kwargs)
+
+    def _merge(self, json_schema: Mapping[str, Any]) -> Mapping[str, Any]:
+        """Merge the ``allOf`` schemas, the properties and the required lists are combined"""
+        if "allOf" not in json_schema:
+            return json_schema
+
+        merged: dict[str, Any] = {key: value for key, value in json_schema.items() if key != "allOf"}
+        properties = dict(merged.get("properties", {}))
+        required = list(merged.get("required", ()))
+        for sub_schema in json_schema["allOf"]:
+            sub_schema = self._merge(self.resolve(sub_schema))
+            properties.update(sub_schema.get("properties", {}))
+            required.extend(sub_schema.get("required", ()))
+            for key, value in sub_schema.items():
+                merged.setdefault(key, value)
+        if properties:
+            merged["properties"] = properties
+            merged.setdefault("type", "object")
+        if required:
+            merged["required"] = required
+        return merged
+
+    @staticmethod
+    def _validators(json_schema: Mapping[str, Any]) -> list[Callable[[Any], Any]]:
+        validators: list[Callable[[Any], Any]] = []
+        if "enum" in json_schema:
+            validators.append(m.validate.OneOf(json_schema["enum"]))
+
+        min_length = json_schema.get("minLength", json_schema.get("minItems"))
+        max_length = json_schema.get("maxLength", json_schema.get("maxItems"))
+        if min_length is not None or max_length is not None:
+            validators.append(m.validate.Length(min=min_length, max=max_length))
+
+        if "pattern" in json_schema:
+            validators.append(_Pattern(re.compile(json_schema["pattern"])))
+
+        minimum, maximum = json_schema.get("minimum"), json_schema.get("maximum")
+        exclusive_minimum = json_schema.get("exclusiveMinimum", False)
+        exclusive_maximum = json_schema.get("exclusiveMaximum", False)
+        # OpenAPI 3.0 exclusive limits are flags of the limits, 3.1 ones are the limits themselves
+        if not isinstance(exclusive_minimum, bool):
+            minimum, exclusive_minimum = exclusive_minimum, True
+        if not isinstance(exclusive_maximum, bool):
+            maximum, exclusive_maximum = exclusive_maximum, True
+        if minimum is not None or maximum is not None:
+            validators.append(
+                m.validate.Range(
+                    min=minimum, max=maximum, min_inclusive=not exclusive_minimum, max_inclusive=not exclusive_maximum
+                )
+            )
+        return validators
+
+    def request_steps(self, path_item: Mapping[str, Any], operation: Mapping[str, Any]) -> list[ValidationSchema]:
+        """Validation steps of the operation parameters and request body"""
+        parameters: dict[tuple[str, str], Mapping[str, Any]] = {}
+        # The operation parameters override the path ones
+        for parameter in [*path_item.get("parameters", ()), *operation.get("parameters", ())]:
+            parameter = self.resolve(parameter)
+            parameters[parameter["in"], parameter["name"]] = parameter
+
+        steps = []
+        for location, put_into in PARAMETER_LOCATIONS.items():
+            fields = {
+                name: self._parameter_field(parameter)
+                for (param_location, name), parameter in parameters.items()
+                if param_location == location
+            }
+            if fields:
+                # The other headers, cookies and query parameters are not described
+                schema = _make_schema("ParametersSchema", fields, m.EXCLUDE)()
+                steps.append(ValidationSchema(schema, location=put_into, put_into=put_into))
+
+        body = self._body_step(operation, parameters)
+        if body is not None:
+            steps.append(body)
+        return steps
+
+    def _parameter_field(self, parameter: Mapping[str, Any]) -> m.fields.Field:
+        # Swagger 2.0 parameters have the schema keywords themselves
+        json_schema = parameter.get("schema", parameter)
+        # Path parameters are always required
+        required = bool(parameter.get("required")) or parameter["in"] == "path"
+        return self.field(json_schema, required, strict=False)
+
+    def _body_step(
+        self, operation: Mapping[str, Any], parameters: Mapping[tuple[str, str], Mapping[str, Any]]
+    ) -> ValidationSchema | None:
+        # Swagger 2.0 bodies are parameters
+        form_fields = {
+            name: self._parameter_field(parameter)
+            for (location, name), parameter in parameters.items()
+            if location == "formData"
+        }
+        if form_fields:
+            return ValidationSchema(_make_schema("FormSchema", form_fields, m.EXCLUDE)(), location="form")
+        for (location, _), parameter in parameters.items():
+            if location == "body":
+                return self._body_validation(parameter["schema"], "json")
+
+        request_body = self.resolve(operation.get("requestBody", {}))
+        for content_type, media_type in request_body.get("content", {}).items():
+            if "schema" not in media_type:
+                continue
+            if is_json_content_type(content_type):
+                return self._body_validation(media_type["schema"], "json")
+            if content_type in FORM_CONTENT_TYPES:
+                return self._body_validation(media_type["schema"], "form", strict=False)
+        return None
+
+    def _body_validation(
+        self, json_schema: Mapping[str, Any], location: str, strict: bool = True
+    ) -> ValidationSchema | None:
+        schema = self.body_schema(json_schema, strict=strict)
+        if schema is None:
+            logger.warning(
+                "Request body schema %r is not an object or an array of objects, it is not validated", json_schema
+            )
+            return None
+        return ValidationSchema(schema, location=location)
+
+    def body_schema(
+        self, json_schema: Mapping[str, Any], response: bool = False, strict: bool = True
+    ) -> m.Schema | None:
+        """Schema of an object body, or of an array of objects, ``None`` for the other bodies"""
+        resolved = self.resolve(json_schema)
+        if resolved.get("type") == "array" and "items" in resolved:
+            items = self._merge(self.resolve(resolved["items"]))
+            if "properties" in items:
+                return self.schema(items, response, strict)(many=True)
+        elif "properties" in self._merge(resolved):
+            return self.schema(resolved, response, strict)()
+        return None
+
+    def response_schemas(self, operation: Mapping[str, Any]) -> dict[int, tuple[m.Schema, float | None]]:
+        """Schemas of the JSON responses, by status code, to check the sampled responses against"""
+        schemas: dict[int, tuple[m.Schema, float | None]] = {}
+        for code, response in operation.get("responses", {}).items():
+            if not str(code).isdigit():
+                # Ranges and the default response
+                continue
+            response = self.resolve(response)
+            json_schema = response.get("schema")
+            for content_type, media_type in response.get("content", {}).items():
+                if is_json_content_type(content_type) and "schema" in media_type:
+                    json_schema = media_type["schema"]
+                    break
+            schema = None if json_schema is None else self.body_schema(json_schema, response=True)
+            if schema is not None:
+                schemas[int(code)] = (schema, None)
+        return schemas
+
+
+def iter_operations(document: Mapping[str, Any]) -> Iterator[tuple[str, str, Mapping[str, Any], Mapping[str, Any]]]:
+    """Path, upper-case method, path item and operation of the document operations"""
+    for path, path_item in document.get("paths", {}).items():
+        for method in METH_ALL:
+            operation = path_item.get(method.lower())
+            if operation is not None:
+                yield path, method, path_item, operation
+
+
+def _iter_route_methods(app: web.Application) -> Iterator[tuple[str, str, Any, tuple[str, ...]]]:
+    """
+    Path, upper-case method, plan key and operation IDs of the app routes.
+
+    Only the explicit names are operation IDs, the route names and ``View.method`` of the class-based views.
+    The handler names are not, generic ones like ``index`` would bind the routes to unrelated operations.
+    """
+    for route in app.router.routes():
+        path = get_path(route)
+        if path is None:
+            continue
+
+        handler = route.handler
+        if is_class_based_view(handler):
+            for method in METH_ALL:
+                method_func = getattr(handler, method.lower(), None)
+                if method_func is not None:
+                    names = (route.name, method_func.__qualname__)
+                    yield path, method, (route, method), tuple(name for name in names if name)
+        elif route.method in METH_ALL:
+            yield path, route.method, (route, route.method), (route.name,) if route.name else ()
+
+
+def _match_operation_id(
+    operation_ids: Mapping[str, list[tuple[str, str]]], names: tuple[str, ...], method: str, default: tuple[str, str]
+) -> tuple[str, str]:
+    """Key of the only operation with the method and one of the operation IDs, the default one otherwise"""
+    matches = {key for name in names for key in operation_ids.get(name, ()) if key[1] == method}
+    if len(matches) > 1:
+        logger.warning(
+            "Route %s %s matches the operations %s by operationId, none is bound",
+            method,
+            default[0],
+            ", ".join(f"{match_method} {match_path}" for match_path, match_method in sorted(matches)),
+        )
+    return matches.pop() if len(matches) == 1 else default
+
+
+def bind_document(app: web.Application, document: Mapping[str, Any], plans: ValidationPlans, prefix: str = "") -> int:
+    """
+    Compile the validation plans of the app routes from the operations of the document, return their number.
+
+    Routes are matched to the operations by the path and the method, the document paths are the route paths
+    with the prefix. The unmatched routes are matched by the ``operationId`` of an operation with the same method,
+    which is the route name, or ``View.method`` for the class-based views. The ambiguous matches are logged.
+    """
+    compiler = SchemaCompiler(document)
+    operations = {}
+    operation_ids: dict[str, list[tuple[str, str]]] = {}
+    for path, method, path_item, operation in iter_operations(document):
+        operations[path, method] = (path_item, operation)
+        if "operationId" in operation:
+            operation_ids.setdefault(operation["operationId"], []).append((path, method))
+
+    bound = set()
+    for path, method, key, names in _iter_route_methods(app):
+        operation_key = (prefix + path, method)
+        if operation_key not in operations:
+            operation_key = _match_operation_id(operation_ids, names, method, operation_key)
+        if operation_key not in operations:
+            continue
+
+        path_item, operation = operations[operation_key]
+        steps = compiler.request_steps(path_item, operation)
+        response_schemas = compiler.response_schemas(operation)
+        plans.compile(key, steps if steps or response_schemas else None, response_schemas=response_schemas)
+        bound.add(operation_key)
+
+    for path, method in operations.keys() - bound:
+        logger.warning("Operation %s %s of the API spec has no route", method, path)
+    return len(bound)
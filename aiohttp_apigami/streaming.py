@@ -0,0 +1,186 @@
+"""Incremental decoding of JSON arrays from a byte stream."""
+
+import codecs
+import json
+import re
+from collections.abc import AsyncIterator
+from typing import Any, Protocol
+
+CHUNK_SIZE = 64 * 1024
+
+_WHITESPACE = " \t\n\r"
+_CLOSING = {"{": "}", "[": "]"}
+# Numbers, `true`, `false` and `null`
+_SCALAR = re.compile(r"[+\-.0-9Eaeflnrstu]*")
+# Content of the containers between the brackets: scalars, delimiters and complete strings
+_PLAIN = re.compile(r'(?:[ \t\n\r,:+\-.0-9Eaeflnrstu]+|"[^"\\]*(?:\\.[^"\\]*)*")*', re.DOTALL)
+# Rest of a string split between the chunks
+_STRING_CHARS = re.compile(r'[^"\\]*')
+_decoder = json.JSONDecoder()
+
+
+class AsyncReader(Protocol):
+    async def read(self, n: int = -1) -> bytes: ...
+
+
+class NotAJSONArray(Exception):
+    """The stream doesn't contain a JSON array"""
+
+
+class _ValueScanner:
+    """
+    Finds the end of a JSON value in the text chunks, tracking the nesting and the strings between the chunks,
+    so every chunk is scanned once and the value is decoded once it is complete.
+
+    Characters which can't be a part of a JSON value are rejected as soon as they are read.
+    The rest of the syntax is checked when the complete value is decoded.
+    """
+
+    __slots__ = ("escaped", "in_string", "scalar", "stack")
+
+    def __init__(self) -> None:
+        self.stack: list[str] = []
+        self.in_string = False
+        self.escaped = False
+        self.scalar: bool | None = None
+
+    def feed(self, text: str, pos: int) -> int | None:
+        """Scan the text from the position, return the end of the value or ``None`` if it continues"""
+        if self.scalar is None:
+            self.scalar = text[pos] not in '{["'
+            if text[pos] == '"':
+                # Strings are scanned by the string state, the containers scan the complete strings at once
+                self.in_string = True
+                pos += 1
+        if self.scalar:
+            end = _SCALAR.match(text, pos).end()  # type: ignore[union-attr]
+            return None if end == len(text) else end
+
+        size = len(text)
+        while pos < size:
+            pos = self._scan_string(text, pos) if self.in_string else self._scan_container(text, pos)
+            if not self.in_string and not self.stack:
+                return pos
+        return None
+
+    def _scan_string(self, text: str, pos: int) -> int:
+        if self.escaped:
+            self.escaped = False
+            return pos + 1
+
+        pos = _STRING_CHARS.match(text, pos).end()  # type: ignore[union-attr]
+        if pos < len(text):
+            if text[pos] == "\\":
+                self.escaped = True
+            else:
+                self.in_string = False
+            pos += 1
+        return pos
+
+    def _scan_container(self, text: str, pos: int) -> int:
+        pos = _PLAIN.match(text, pos).end()  # type: ignore[union-attr]
+        if pos == len(text):
+            return pos
+
+        char = text[pos]
+        if char == '"':
+            self.in_string = True
+        elif char in _CLOSING:
+            self.stack.append(_CLOSING[char])
+        elif self.stack and self.stack[-1] == char:
+            self.stack.pop()
+        else:
+            raise json.JSONDecodeError(f"Unexpected {char!r}", text, pos)
+        return pos + 1
+
+
+class _TextBuffer:
+    """Decoded text of the stream, keeping only the part that is not consumed yet"""
+
+    __slots__ = ("_decoder", "_stream", "chunk_size", "eof", "pos", "text")
+
+    def __init__(self, stream: AsyncReader, chunk_size: int):
+        self._stream = stream
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        self.chunk_size = chunk_size
+        self.text = ""
+        self.pos = 0
+        self.eof = False
+
+    async def read_more(self) -> None:
+        chunk = await self._stream.read(self.chunk_size)
+        self.eof = not chunk
+        self.text = self.text[self.pos :] + self._decoder.decode(chunk, final=self.eof)
+        self.pos = 0
+
+    async def peek(self) -> str:
+        """Skip whitespace and return the next character, an empty string at the end of the stream"""
+        while True:
+            text, pos = self.text, self.pos
+            while pos < len(text) and text[pos] in _WHITESPACE:
+                pos += 1
+            self.pos = pos
+
+            if pos < len(text):
+                return text[pos]
+            if self.eof:
+                return ""
+            await self.read_more()
+
+    async def decode_value(self) -> Any:
+        if not await self.peek():
+            raise json.JSONDecodeError("Expecting value", self.text, self.pos)
+
+        # The chunks of the value are collected and joined once, instead of appending each chunk to the buffer
+        scanner = _ValueScanner()
+        parts = []
+        end = scanner.feed(self.text, self.pos)
+        while end is None:
+            parts.append(self.text[self.pos :])
+            self.pos = len(self.text)
+            if self.eof:
+                if not scanner.scalar:
+                    raise json.JSONDecodeError("Unterminated value", "".join(parts), 0)
+                end = self.pos
+                break
+            await self.read_more()
+            end = scanner.feed(self.text, 0) if self.text else None
+        parts.append(self.text[self.pos : end])
+        self.pos = end
+
+        text = "".join(parts)
+        value, value_end = _decoder.raw_decode(text)
+        if value_end != len(text):
+            raise json.JSONDecodeError("Extra data", text, value_end)
+        return value
+
+
+async def iter_json_array(stream: AsyncReader, chunk_size: int = CHUNK_SIZE) -> AsyncIterator[Any]:
+    """
+    Decode a JSON array from the stream incrementally, yielding the items as soon as they are read.
+
+    Only the item being decoded is kept in memory, not the whole array.
+    Raises ``NotAJSONArray`` if the stream is empty or doesn't start with an array,
+    and ``ValueError`` (``json.JSONDecodeError`` or ``UnicodeDecodeError``) if it is not valid JSON.
+    """
+    buffer = _TextBuffer(stream, chunk_size)
+
+    if await buffer.peek() != "[":
+        raise NotAJSONArray
+    buffer.pos += 1
+
+    if await buffer.peek() == "]":
+        buffer.pos += 1
+    else:
+        while True:
+            yield await buffer.decode_value()
+
+            char = await buffer.peek()
+            buffer.pos += 1
+            if char == "]":
+                break
+            if char != ",":
+                raise json.JSONDecodeError("Expecting ',' delimiter", buffer.text, buffer.pos - 1)
+
+    if await buffer.peek():
+        raise json.JSONDecodeError("Extra data", buffer.text, buffer.pos)
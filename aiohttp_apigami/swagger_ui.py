@@ -1,10 +1,15 @@
+import asyncio
 import enum
+import mimetypes
 import os
+from functools import partial
 from pathlib import Path
 from string import Template
 
 from aiohttp import web
 
+from .compression import PrecompressedBody
+
 # Constants
 SWAGGER_UI_STATIC_FILES = Path(__file__).parent / "swagger_ui"
 SWAGGER_UI_VERSION_PATH = SWAGGER_UI_STATIC_FILES / "VERSION"
@@ -14,6 +19,10 @@ NAME_SWAGGER_SPEC = "swagger.spec"
 NAME_SWAGGER_DOCS = "swagger.docs"
 NAME_SWAGGER_STATIC = "swagger.static"
 
+# Only text assets benefit from compression
+COMPRESSIBLE_SUFFIXES = frozenset({".css", ".html", ".js"})
+STATIC_CACHE_CONTROL = "no-cache"
+
 
 @enum.unique
 class LayoutOption(str, enum.Enum):
@@ -24,26 +33,96 @@ class LayoutOption(str, enum.Enum):
 class SwaggerUIManager:
     """Manages the Swagger UI setup and rendering."""
 
-    __slots__ = ("_index_page", "_layout", "_static_path", "_url")
+    __slots__ = ("_assets", "_index_body", "_index_page", "_layout", "_precompress", "_static_path", "_url")
 
-    def __init__(self, url: str, static_path: str = "/static/swagger", layout: LayoutOption = LayoutOption.Standalone):
+    def __init__(
+        self,
+        url: str,
+        static_path: str = "/static/swagger",
+        layout: LayoutOption = LayoutOption.Standalone,
+        precompress: bool = False,
+    ):
         self._url = url
         self._static_path = static_path
         self._layout = layout
+        self._precompress = precompress
         self._index_page: str | None = None
+        self._index_body: PrecompressedBody | None = None
+        self._assets: dict[str, PrecompressedBody] = {}
 
     def setup(self, app: web.Application, swagger_path: str) -> None:
         """Set up Swagger UI routes."""
         # Add static files route
-        app.router.add_static(self._static_path, SWAGGER_UI_STATIC_FILES, name=NAME_SWAGGER_STATIC)
+        if self._precompress:
+            self._setup_precompressed_static(app, SWAGGER_UI_STATIC_FILES)
+        else:
+            app.router.add_static(self._static_path, SWAGGER_UI_STATIC_FILES, name=NAME_SWAGGER_STATIC)
 
         # Add the Swagger UI view
-        async def swagger_view(_: web.Request) -> web.Response:
+        async def swagger_view(request: web.Request) -> web.Response:
+            if self._precompress:
+                index_body = self._get_index_body(app)
+                return index_body.make_response(request, content_type="text/html", cache_control=STATIC_CACHE_CONTROL)
             index_page = self._get_index_page(app, SWAGGER_UI_STATIC_FILES)
             return web.Response(text=index_page, content_type="text/html")
 
         app.router.add_get(swagger_path, swagger_view, name=NAME_SWAGGER_DOCS)
 
+    def warm_up(self, app: web.Application) -> None:
+        """Render the index page ahead of the first request. The app routes must have their final prefixes."""
+        self._get_index_page(app, SWAGGER_UI_STATIC_FILES)
+
+    def _setup_precompressed_static(self, app: web.Application, static_files: Path) -> None:
+        """Serve static files from memory with precompressed variants instead of ``add_static``."""
+        files = {path.name: path for path in static_files.iterdir() if path.is_file()}
+
+        async def static_view(request: web.Request) -> web.Response:
+            filename = request.match_info["filename"]
+            if filename not in files:
+                raise web.HTTPNotFound()
+
+            content_type = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+            asset = self._get_asset(files[filename])
+            return asset.make_response(request, content_type=content_type, cache_control=STATIC_CACHE_CONTROL)
+
+        static_path = self._static_path.rstrip("/")
+        app.router.add_get(f"{static_path}/{{filename}}", static_view, name=NAME_SWAGGER_STATIC)
+
+        async def _compress(app_: web.Application) -> None:
+            await self._compress_assets(app_, files)
+
+        app.on_startup.append(_compress)
+
+    async def _compress_assets(self, app: web.Application, files: dict[str, Path]) -> None:
+        """
+        Compress the static files and the index page on startup, in the default executor,
+        as compressing the bundles takes a few hundred milliseconds.
+        """
+        loop = asyncio.get_running_loop()
+        # Rendered on the loop, it reads the app routes
+        index_page = self._get_index_page(app, SWAGGER_UI_STATIC_FILES).encode("utf-8")
+        self._index_body = await loop.run_in_executor(
+            None, partial(PrecompressedBody.from_bytes, index_page, compress=True)
+        )
+        for name, path in files.items():
+            if name not in self._assets:
+                self._assets[name] = await loop.run_in_executor(None, _read_asset, path)
+
+    def _get_asset(self, path: Path) -> PrecompressedBody:
+        """Get the static asset with its compressed variants, built on startup."""
+        asset = self._assets.get(path.name)
+        if asset is None:
+            # Not compressed yet, served as is rather than compressed on the loop
+            return PrecompressedBody.from_bytes(path.read_bytes())
+        return asset
+
+    def _get_index_body(self, app: web.Application) -> PrecompressedBody:
+        """Get the index page with its compressed variants, built on startup."""
+        if self._index_body is None:
+            index_page = self._get_index_page(app, SWAGGER_UI_STATIC_FILES)
+            return PrecompressedBody.from_bytes(index_page.encode("utf-8"))
+        return self._index_body
+
     def _get_index_page(self, app: web.Application, static_files: Path) -> str:
         """Get or generate the Swagger UI index page HTML."""
         if self._index_page is not None:
@@ -63,3 +142,8 @@ class SwaggerUIManager:
 
         assert self._index_page is not None  # for mypy
         return self._index_page
+
+
+def _read_asset(path: Path) -> PrecompressedBody:
+    """Read the static file, with the compressed variants of the text ones"""
+    return PrecompressedBody.from_bytes(path.read_bytes(), compress=path.suffix in COMPRESSIBLE_SUFFIXES)
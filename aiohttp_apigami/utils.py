@@ -1,16 +1,14 @@
 from dataclasses import is_dataclass
 from inspect import isclass
 from string import Formatter
-from typing import Any, TypeVar, get_origin
+from typing import TypeVar, get_origin
 
 import marshmallow as m
 from aiohttp import web
 from aiohttp.abc import AbstractView
 from aiohttp.typedefs import Handler
 
-from .constants import API_SPEC_ATTR, SCHEMAS_ATTR
 from .typedefs import IDataclass, SchemaType
-from .validation import ValidationSchema
 
 try:
     import marshmallow_recipe as mr
@@ -18,7 +16,6 @@ try:
 except ImportError:  # pragma: no cover
     mr = None  # type: ignore
 
-T = TypeVar("T")
 TDataclass = TypeVar("TDataclass", bound=IDataclass)
 
 
@@ -42,26 +39,6 @@ def is_class_based_view(handler: Handler | type[AbstractView]) -> bool:
     return issubclass(handler, web.View)
 
 
-def get_or_set_apispec(func: T) -> dict[str, Any]:
-    func_apispec: dict[str, Any]
-    if hasattr(func, API_SPEC_ATTR):
-        func_apispec = getattr(func, API_SPEC_ATTR)
-    else:
-        func_apispec = {"schemas": [], "responses": {}, "parameters": []}
-        setattr(func, API_SPEC_ATTR, func_apispec)
-    return func_apispec
-
-
-def get_or_set_schemas(func: T) -> list[ValidationSchema]:
-    func_schemas: list[ValidationSchema]
-    if hasattr(func, SCHEMAS_ATTR):
-        func_schemas = getattr(func, SCHEMAS_ATTR)
-    else:
-        func_schemas = []
-        setattr(func, SCHEMAS_ATTR, func_schemas)
-    return func_schemas
-
-
 def resolve_schema_instance(schema: SchemaType | type[TDataclass]) -> m.Schema:
     if isinstance(schema, type) and issubclass(schema, m.Schema):
         return schema()
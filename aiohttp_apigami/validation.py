@@ -1,10 +1,301 @@
+import asyncio
+import logging
+import time
+from collections.abc import Hashable, Sequence
 from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any
 
 import marshmallow as m
+from aiohttp import hdrs, web
 
+from .constants import APISPEC_MAX_BODY_SIZE
+from .metrics import PhaseTimer, ValidationMetrics, operation_name
+from .offload import BODY_LOCATIONS, OffloadPolicy
+from .serialization import JSONDumps, ResponseSerializer, get_json_dumps
 
-@dataclass
+if TYPE_CHECKING:
+    # Not imported at runtime, so the validation middleware doesn't import webargs, multiprocessing and cProfile
+    from .parser import ApigamiParser
+    from .process_pool import ValidationProcessPool
+    from .profiling import ValidationProfiler
+    from .response_validation import ResponseSampler, ResponseSchemas
+
+logger = logging.getLogger(__name__)
+
+_missing: Any = object()
+
+
+@dataclass(slots=True)
 class ValidationSchema:
     schema: m.Schema
     location: str
     put_into: str | None = None
+    process_pool: bool = False
+    stream: bool = False
+    max_body_size: int | None = None
+
+
+class ValidationPlan:
+    """Prebuilt validation steps of a single handler method."""
+
+    __slots__ = (
+        "data_name",
+        "max_body_size",
+        "metrics",
+        "offload_policy",
+        "parser",
+        "process_pool",
+        "profiler",
+        "response_sampler",
+        "response_schemas",
+        "serializer",
+        "server_timing",
+        "steps",
+    )
+
+    def __init__(
+        self,
+        steps: Sequence[ValidationSchema],
+        parser: "ApigamiParser",
+        data_name: str,
+        offload_policy: OffloadPolicy | None = None,
+        process_pool: "ValidationProcessPool | None" = None,
+        serializer: ResponseSerializer | None = None,
+        response_sampler: "ResponseSampler | None" = None,
+        response_schemas: "ResponseSchemas | None" = None,
+        metrics: ValidationMetrics | None = None,
+        server_timing: bool = False,
+        profiler: "ValidationProfiler | None" = None,
+    ):
+        self.steps = tuple(steps)
+        self.parser = parser
+        self.data_name = data_name
+        self.offload_policy = offload_policy
+        self.process_pool = process_pool
+        self.serializer = serializer
+        self.response_sampler = response_sampler
+        self.response_schemas = response_schemas or {}
+        self.metrics = metrics
+        self.server_timing = server_timing
+        self.profiler = profiler
+        # The strictest limit of all the steps applies to the whole body
+        limits = [step.max_body_size for step in self.steps if step.max_body_size is not None]
+        self.max_body_size = min(limits, default=None)
+
+    async def validate(self, request: web.Request, timer: PhaseTimer | None = None) -> None:
+        """
+        Parse and validate request data, and store it in the request object.
+        The durations of the validation phases are recorded in the timer, if given.
+        """
+        if self.max_body_size is not None:
+            limit_body_size(request, self.max_body_size)
+
+        result = _missing
+        for step in self.steps:
+            # Parse and validate request data using the schema
+            data = await self._parse(request, step, timer)
+
+            # If put_into is specified, store the validated data in a specific key
+            if step.put_into:
+                request[step.put_into] = data
+
+            # Otherwise, store the validated data in the default key
+            elif data and result is _missing:
+                result = data
+            else:
+                logger.error("Multiple schemas provided, but no put_into specified. Using the first one only.")
+
+        # For backward compatibility, if no validated data is provided, use the list
+        request[self.data_name] = [] if result is _missing else result
+
+    @property
+    def timed(self) -> bool:
+        """Whether the durations of the request phases are recorded"""
+        return self.metrics is not None or self.server_timing
+
+    def record_timings(self, request: web.Request, timer: PhaseTimer) -> None:
+        """Add the phase durations of the request to the metrics"""
+        if self.metrics is not None:
+            self.metrics.observe(operation_name(request), timer)
+
+    def add_server_timing(self, response: web.StreamResponse, timer: PhaseTimer) -> None:
+        """Add the phase durations to the ``Server-Timing`` header, if it is enabled and the headers are not sent yet"""
+        if self.server_timing and not response.prepared:
+            response.headers.add(hdrs.SERVER_TIMING, timer.server_timing())
+
+    def sample_response(self, request: web.Request, response: web.StreamResponse) -> None:
+        """Pass the response to the response sampler, if there is a schema to check it against"""
+        if self.response_sampler is not None and self.response_schemas:
+            self.response_sampler.sample(request, response, self.response_schemas)
+
+    async def _parse(self, request: web.Request, step: ValidationSchema, timer: PhaseTimer | None = None) -> Any:
+        if step.stream:
+            # Items are validated while the handler iterates over them
+            return self.parser.iter_json(request, step.schema)
+
+        try:
+            if timer is None:
+                return await self._load(request, step)
+            return await self._load_timed(request, step, timer)
+        except m.ValidationError as error:
+            if timer is not None:
+                timer.failure = step.location
+            await self.parser.handle_validation_error(error, request, step.schema, step.location)
+
+    async def _load(self, request: web.Request, step: ValidationSchema) -> Any:
+        if step.process_pool and self.process_pool is not None:
+            return await self.parser.load_json_in_process(request, step.schema, self.process_pool)
+
+        location_data = await self.parser.load_location_data(request, step.schema, step.location)
+        return await self._load_schema(request, step, location_data)
+
+    async def _load_timed(self, request: web.Request, step: ValidationSchema, timer: PhaseTimer) -> Any:
+        """Same as ``_load``, recording the durations of the phases"""
+        location = step.location
+        if location == "json" and request.body_exists:
+            # The body is cached by aiohttp, so the parser doesn't read it again.
+            # Form bodies are parsed while they are read, so their reading is a part of decoding.
+            with timer.measure("read", location):
+                await request.read()
+
+        if step.process_pool and self.process_pool is not None:
+            # Decoded and loaded in a worker process
+            with timer.measure("load", location):
+                return await self.parser.load_json_in_process(request, step.schema, self.process_pool)
+
+        with timer.measure("decode", location):
+            location_data = await self.parser.load_location_data(request, step.schema, location)
+        with timer.measure("load", location):
+            return await self._load_schema(request, step, location_data)
+
+    async def _load_schema(self, request: web.Request, step: ValidationSchema, location_data: Any) -> Any:
+        load = self.parser.load_schema
+        if self.profiler is not None:
+            load = self.profiler.wrap(operation_name(request), step.location, load)
+
+        policy = self.offload_policy
+        if policy is None:
+            return load(location_data, request, step.schema, step.location)
+
+        key = id(step)
+        content_length = request.content_length if step.location in BODY_LOCATIONS else None
+        args = (load, location_data, request, step.schema, step.location)
+        if policy.should_offload(key, content_length):
+            loop = asyncio.get_running_loop()
+            data, seconds = await loop.run_in_executor(policy.executor, _timed, *args)
+        else:
+            data, seconds = _timed(*args)
+        policy.record(key, content_length, seconds)
+        return data
+
+
+def limit_body_size(request: web.Request, max_size: int) -> None:
+    """
+    Reject the request if its Content-Length is over the limit.
+    The bodies without Content-Length are checked by the parser while they are read.
+    """
+    content_length = request.content_length
+    if content_length is not None and content_length > max_size:
+        raise web.HTTPRequestEntityTooLarge(max_size=max_size, actual_size=content_length)
+
+    request[APISPEC_MAX_BODY_SIZE] = max_size
+
+
+def _timed(func: Any, *args: Any) -> tuple[Any, float]:
+    """Call the function, return its result and the duration in seconds"""
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+class ValidationPlans:
+    """
+    Validation plans of the app handlers.
+
+    Plans are keyed by ``(route, method)``, where route is the app route matched by the request
+    and method is the upper-case HTTP method, as the routes of the class-based views serve all the methods.
+    A handler mounted on several routes gets a plan per route.
+    A ``None`` plan means the handler has nothing to validate.
+    """
+
+    __slots__ = (
+        "_data_name",
+        "_json_dumps",
+        "_metrics",
+        "_offload_policy",
+        "_parser",
+        "_plans",
+        "_process_pool",
+        "_profiler",
+        "_response_sampler",
+        "_server_timing",
+    )
+
+    def __init__(
+        self,
+        parser: "ApigamiParser",
+        data_name: str,
+        offload_policy: OffloadPolicy | None = None,
+        process_pool: "ValidationProcessPool | None" = None,
+        json_dumps: JSONDumps | None = None,
+        response_sampler: "ResponseSampler | None" = None,
+        metrics: ValidationMetrics | None = None,
+        server_timing: bool = False,
+        profiler: "ValidationProfiler | None" = None,
+    ):
+        self._parser = parser
+        self._data_name = data_name
+        self._offload_policy = offload_policy
+        self._process_pool = process_pool
+        self._json_dumps = json_dumps or get_json_dumps("json")
+        self._response_sampler = response_sampler
+        self._metrics = metrics
+        self._server_timing = server_timing
+        self._profiler = profiler
+        self._plans: dict[Hashable, ValidationPlan | None] = {}
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._plans
+
+    def __len__(self) -> int:
+        return len(self._plans)
+
+    def get(self, key: Hashable, default: Any = None) -> ValidationPlan | None:
+        return self._plans.get(key, default)
+
+    def compile(
+        self,
+        key: Hashable,
+        schemas: Sequence[ValidationSchema] | None,
+        response: tuple[m.Schema, int] | None = None,
+        response_schemas: "ResponseSchemas | None" = None,
+    ) -> ValidationPlan | None:
+        """
+        Build and store the validation plan for the handler method,
+        with the serializer of the response schema and status code if given,
+        and the response schemas to check the sampled responses against.
+        """
+        if schemas is None:
+            plan = None
+        else:
+            serializer = None if response is None else ResponseSerializer(*response, dumps=self._json_dumps)
+            plan = ValidationPlan(
+                schemas,
+                self._parser,
+                self._data_name,
+                self._offload_policy,
+                self._process_pool,
+                serializer,
+                self._response_sampler,
+                response_schemas if self._response_sampler is not None else None,
+                self._metrics,
+                self._server_timing,
+                self._profiler,
+            )
+            if self._process_pool is not None:
+                for step in plan.steps:
+                    if step.process_pool:
+                        self._process_pool.add_schema(step.schema)
+
+        self._plans[key] = plan
+        return plan
@@ -0,0 +1,92 @@
+"""Warm-up of the request schemas, so the first requests don't pay for the lazy initialization."""
+
+import datetime
+import decimal
+import logging
+import uuid
+from collections.abc import Iterable
+from typing import Any
+
+import marshmallow as m
+
+from .handler_spec import HandlerSpec, get_handler_spec
+from .typedefs import HandlerType
+
+logger = logging.getLogger(__name__)
+
+# Nested schemas may refer to themselves
+_MAX_DEPTH = 5
+
+_VALUES: tuple[tuple[type[m.fields.Field], Any], ...] = (
+    (m.fields.UUID, str(uuid.UUID(int=0))),
+    (m.fields.String, ""),
+    (m.fields.Boolean, False),
+    (m.fields.Integer, 0),
+    (m.fields.Decimal, decimal.Decimal(0)),
+    (m.fields.Number, 0.0),
+    (m.fields.DateTime, datetime.datetime(2000, 1, 1).isoformat()),
+    (m.fields.Date, datetime.date(2000, 1, 1).isoformat()),
+    (m.fields.Time, datetime.time().isoformat()),
+    (m.fields.TimeDelta, 0),
+    (m.fields.Mapping, {}),
+)
+
+
+def _field_value(field: m.fields.Field, depth: int) -> Any:
+    if isinstance(field, m.fields.Nested):
+        if depth >= _MAX_DEPTH:
+            return None
+        # Resolves the nested schema, which is done lazily on the first use. Its `many` is set by the field.
+        return minimal_payload(field.schema, depth + 1)
+    if isinstance(field, m.fields.List):
+        return [_field_value(field.inner, depth)]
+    if isinstance(field, m.fields.Tuple):
+        return [_field_value(inner, depth) for inner in field.tuple_fields]
+    for field_class, value in _VALUES:
+        if isinstance(field, field_class):
+            return value
+    return None
+
+
+def minimal_payload(schema: m.Schema, depth: int = 0) -> Any:
+    """Synthesize the input data of the schema, with a value of the field type for every field"""
+    data = {field.data_key or name: _field_value(field, depth) for name, field in schema.load_fields.items()}
+    return [data] if schema.many else data
+
+
+def warm_up_schema(schema: m.Schema, examples: Iterable[Any] = ()) -> None:
+    """Load the examples and a synthesized payload with the schema, ignoring the errors"""
+    for payload in (*examples, minimal_payload(schema)):
+        try:
+            schema.load(payload)
+        except m.ValidationError:
+            pass
+        except Exception as e:
+            # Schema hooks may not expect the synthesized data, the warm-up must not fail the startup
+            logger.debug("Warm-up of %s failed: %r", type(schema).__name__, e)
+
+
+def _get_examples(spec: HandlerSpec) -> dict[int, list[Any]]:
+    """Examples of the handler request schemas, keyed by the schema id"""
+    examples: dict[int, list[Any]] = {}
+    for entry in spec.schemas:
+        example = {key: value for key, value in entry.get("example", {}).items() if key != "add_to_refs"}
+        if example:
+            examples.setdefault(id(entry["schema"]), []).append(example)
+    return examples
+
+
+def warm_up_handlers(handlers: Iterable[HandlerType]) -> int:
+    """Warm up the request schemas of the handlers, return the number of the warmed up schemas"""
+    warmed_up: set[int] = set()
+    for handler in handlers:
+        spec = get_handler_spec(handler)
+        if spec is None:
+            continue
+        examples = _get_examples(spec)
+        for step in spec.validation:
+            if id(step.schema) in warmed_up:
+                continue
+            warm_up_schema(step.schema, examples.get(id(step.schema), ()))
+            warmed_up.add(id(step.schema))
+    return len(warmed_up)
@@ -0,0 +1 @@
+"""Benchmarks of aiohttp-apigami. Run them with ``make bench`` or ``python -m benchmarks.<name>``."""
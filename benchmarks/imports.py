@@ -0,0 +1,71 @@
+"""
+Import time benchmark.
+
+Every statement is timed in fresh interpreters, as the modules are cached after the first import.
+The ``validation`` statement also sets up an app with ``validation_only``, which must not import the spec stack.
+The baseline imports aiohttp and marshmallow, which every app imports anyway.
+
+Usage::
+
+    python -m benchmarks.imports -n 20 --budget 50
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+
+from .runner import environment
+
+BASELINE = "import aiohttp.web, marshmallow"
+STATEMENTS = {
+    "baseline": BASELINE,
+    "package": f"{BASELINE}; import aiohttp_apigami",
+    "decorators": f"{BASELINE}; from aiohttp_apigami import request_schema, docs, validation_middleware",
+    "setup": f"{BASELINE}; from aiohttp_apigami import setup_aiohttp_apispec",
+    # Set up without building a spec, apispec and the plugin are not imported
+    "validation": (
+        f"{BASELINE}; from aiohttp_apigami import setup_aiohttp_apispec; "
+        "setup_aiohttp_apispec(aiohttp.web.Application(), validation_only=True, in_place=True)"
+    ),
+    "version": f"{BASELINE}; from aiohttp_apigami import __version__",
+}
+
+_TIMER = "import time; start = time.perf_counter(); {statement}; print(time.perf_counter() - start)"
+
+
+def time_import(statement: str, runs: int) -> list[float]:
+    """Durations of the statement in seconds, each in a new interpreter"""
+    durations = []
+    for _ in range(runs):
+        output = subprocess.check_output([sys.executable, "-c", _TIMER.format(statement=statement)], text=True)
+        durations.append(float(output))
+    return durations
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", "--runs", type=int, default=10, help="interpreters per statement")
+    parser.add_argument(
+        "--budget", type=float, help="fail if importing the decorators takes longer than the baseline plus this, in ms"
+    )
+    args = parser.parse_args()
+
+    sys.stdout.write(", ".join(f"{k}={v}" for k, v in environment().items()) + "\n\n")
+    sys.stdout.write(f"{'statement':<12} {'median ms':>10} {'min ms':>8} {'over baseline ms':>17}\n")
+
+    medians = {}
+    for name, statement in STATEMENTS.items():
+        durations = time_import(statement, args.runs)
+        medians[name] = statistics.median(durations) * 1000
+        over = medians[name] - medians["baseline"]
+        sys.stdout.write(f"{name:<12} {medians[name]:>10.1f} {min(durations) * 1000:>8.1f} {over:>17.1f}\n")
+
+    if args.budget is not None and medians["decorators"] - medians["baseline"] > args.budget:
+        sys.stdout.write(f"\nImporting the decorators is over the budget of {args.budget} ms\n")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,140 @@
+"""Load generator for the request benchmarks against an in-process aiohttp test server."""
+
+import argparse
+import asyncio
+import json
+import platform
+import statistics
+import sys
+import time
+from collections.abc import Callable, Iterable, Sequence
+from dataclasses import asdict, dataclass
+from importlib import metadata
+from typing import Any
+
+from aiohttp import web
+from aiohttp.test_utils import TestClient, TestServer
+
+_DISTRIBUTIONS = ("aiohttp", "aiohttp-apigami", "marshmallow", "webargs", "marshmallow-recipe")
+
+
+@dataclass(frozen=True, slots=True, kw_only=True)
+class Scenario:
+    """A request sent over and over. ``make_kwargs`` builds the ``ClientSession.request`` arguments."""
+
+    name: str
+    method: str
+    path: str
+    make_kwargs: Callable[[], dict[str, Any]] = dict
+    status: int = 200
+
+
+@dataclass(frozen=True, slots=True, kw_only=True)
+class Result:
+    name: str
+    requests: int
+    rps: float
+    p50_ms: float
+    p99_ms: float
+
+
+async def _run(
+    client: "TestClient[web.Request, web.Application]", scenario: Scenario, requests: int, concurrency: int
+) -> Result:
+    latencies: list[float] = []
+    remaining = requests
+
+    async def worker() -> None:
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            start = time.perf_counter()
+            async with client.request(scenario.method, scenario.path, **scenario.make_kwargs()) as res:
+                await res.read()
+            latencies.append(time.perf_counter() - start)
+            if res.status != scenario.status:
+                raise RuntimeError(f"{scenario.name}: expected status {scenario.status}, got {res.status}")
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    quantiles = statistics.quantiles(latencies, n=100, method="inclusive") if len(latencies) > 1 else latencies * 99
+    return Result(
+        name=scenario.name,
+        requests=len(latencies),
+        rps=len(latencies) / elapsed,
+        p50_ms=quantiles[49] * 1000,
+        p99_ms=quantiles[98] * 1000,
+    )
+
+
+async def run_scenarios(
+    app: web.Application,
+    scenarios: Iterable[Scenario],
+    *,
+    requests: int = 2000,
+    warmup: int = 100,
+    concurrency: int = 10,
+) -> list[Result]:
+    """Run the scenarios one by one against the app, after a warm-up round each."""
+    results = []
+    async with TestClient(TestServer(app)) as client:
+        for scenario in scenarios:
+            if warmup:
+                await _run(client, scenario, warmup, concurrency)
+            results.append(await _run(client, scenario, requests, concurrency))
+    return results
+
+
+def environment() -> dict[str, str | None]:
+    """Versions of the interpreter and the packages the results depend on"""
+    env: dict[str, str | None] = {"python": platform.python_version(), "platform": platform.platform()}
+    for distribution in _DISTRIBUTIONS:
+        try:
+            env[distribution] = metadata.version(distribution)
+        except metadata.PackageNotFoundError:
+            env[distribution] = None
+    return env
+
+
+def format_results(results: Sequence[Result]) -> str:
+    width = max([len("scenario"), *(len(r.name) for r in results)])
+    lines = [f"{'scenario':<{width}} {'requests':>8} {'req/s':>10} {'p50 ms':>8} {'p99 ms':>8}"]
+    lines.extend(f"{r.name:<{width}} {r.requests:>8} {r.rps:>10.0f} {r.p50_ms:>8.3f} {r.p99_ms:>8.3f}" for r in results)
+    return "\n".join(lines)
+
+
+def make_parser(description: str) -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("-n", "--requests", type=int, default=2000, help="requests per scenario")
+    parser.add_argument("-w", "--warmup", type=int, default=100, help="warm-up requests per scenario")
+    parser.add_argument("-c", "--concurrency", type=int, default=10, help="concurrent client connections")
+    parser.add_argument("-k", "--filter", default="", help="run only the scenarios with the substring in the name")
+    parser.add_argument("--json", dest="json_path", help="also write the results to a JSON file")
+    return parser
+
+
+def main(description: str, make_app: Callable[[], web.Application], scenarios: Sequence[Scenario]) -> int:
+    """Command line entry point of a benchmark module"""
+    args = make_parser(description).parse_args()
+    selected = [s for s in scenarios if args.filter in s.name]
+
+    results = asyncio.run(
+        run_scenarios(
+            make_app(),
+            selected,
+            requests=args.requests,
+            warmup=args.warmup,
+            concurrency=args.concurrency,
+        )
+    )
+
+    env = environment()
+    sys.stdout.write(", ".join(f"{k}={v}" for k, v in env.items()) + "\n\n")
+    sys.stdout.write(format_results(results) + "\n")
+
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump({"environment": env, "results": [asdict(r) for r in results]}, f, indent=2)
+    return 0
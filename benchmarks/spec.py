@@ -0,0 +1,225 @@
+"""
+Spec generation benchmark for large route tables.
+
+Synthesizes apps with function handlers and class-based views, shared and unique schemas
+and examples, spread across sub-apps, and builds their specs for OpenAPI 2.0 and 3.0.x.
+Reports the build time, the peak memory of the build, the memory kept after it and the size of the spec.
+With ``--validation-only``, measures the setup of the validation without the specs for comparison,
+and with ``--compact``, the memory kept with the spec data of the apps released after the build.
+
+Usage::
+
+    python -m benchmarks.spec --routes 100 1000 10000 50000 --openapi-version 3.0.3
+"""
+
+import argparse
+import gc
+import json
+import sys
+import time
+import tracemalloc
+from collections.abc import Sequence
+from dataclasses import asdict, dataclass
+from typing import Any
+
+from aiohttp import web
+from marshmallow import Schema, fields
+
+from aiohttp_apigami import docs, request_schema, response_schema, setup_aiohttp_apispec
+from aiohttp_apigami.constants import APISPEC_ENCODED_SPEC
+
+from .runner import environment
+
+ROUTES = (100, 1000, 10000, 50000)
+OPENAPI_VERSIONS = ("2.0", "3.0.3")
+# Large apps are usually split into sub-apps, each with its own spec
+ROUTES_PER_APP = 1000
+
+
+class SharedRequestSchema(Schema):
+    id = fields.Int(required=True)
+    name = fields.Str(required=True, metadata={"description": "Name"})
+    tags = fields.List(fields.Str())
+
+
+class SharedResponseSchema(Schema):
+    id = fields.Int(required=True)
+    name = fields.Str()
+    created = fields.DateTime()
+
+
+class QuerySchema(Schema):
+    limit = fields.Int(load_default=10)
+    offset = fields.Int(load_default=0)
+
+
+@dataclass(frozen=True, slots=True, kw_only=True)
+class Result:
+    routes: int
+    openapi_version: str
+    build_seconds: float
+    peak_memory_bytes: int | None
+    # Still allocated after the build, while the apps are alive
+    retained_memory_bytes: int | None
+    spec_bytes: int
+
+
+def _unique_schema(i: int) -> type[Schema]:
+    """A schema with a name of its own, so it gets its own definition in the spec"""
+    schema: type[Schema] = Schema.from_dict(
+        {"id": fields.Int(required=True), f"field_{i}": fields.Str(), "nested": fields.Nested(SharedRequestSchema)},
+        name=f"Unique{i}Schema",
+    )
+    return schema
+
+
+async def _handler(request: web.Request) -> web.Response:
+    return web.Response(text="ok")
+
+
+def _function_handler(i: int) -> Any:
+    """A new handler function per route, as the decorators store the spec data on the function"""
+
+    async def handler(request: web.Request) -> web.Response:
+        return await _handler(request)
+
+    handler = response_schema(SharedResponseSchema, 200, description="Item")(handler)
+    kind = i % 3
+    if kind == 0:
+        # Shared schemas
+        handler = request_schema(SharedRequestSchema)(handler)
+    elif kind == 1:
+        # Unique schemas
+        handler = request_schema(_unique_schema(i))(handler)
+        handler = request_schema(QuerySchema, location="querystring")(handler)
+    else:
+        # Examples, in the refs and in the operation
+        example = {"id": i, "name": f"item {i}", "tags": ["a", "b"]}
+        handler = request_schema(SharedRequestSchema, example=example, add_to_refs=i % 2 == 0)(handler)
+    return docs(tags=[f"tag{i % 10}"], summary=f"Route {i}", description=f"Route number {i}")(handler)
+
+
+def _view(i: int) -> type[web.View]:
+    class ItemView(web.View):
+        @docs(tags=[f"tag{i % 10}"], summary=f"Get item {i}")
+        @request_schema(QuerySchema, location="querystring")
+        @response_schema(SharedResponseSchema, 200)
+        async def get(self) -> web.Response:
+            return await _handler(self.request)
+
+        @docs(tags=[f"tag{i % 10}"], summary=f"Update item {i}")
+        @request_schema(_unique_schema(i))
+        @response_schema(SharedResponseSchema, 200)
+        async def put(self) -> web.Response:
+            return await _handler(self.request)
+
+    return ItemView
+
+
+def make_apps(routes: int, routes_per_app: int = ROUTES_PER_APP) -> list[web.Application]:
+    """Apps with the given total number of routes. Every fourth route is a class-based view with two methods."""
+    apps = []
+    for start in range(0, routes, routes_per_app):
+        app = web.Application()
+        for i in range(start, min(start + routes_per_app, routes)):
+            if i % 4 == 3:
+                app.router.add_view(f"/items{i}/{{id}}", _view(i))
+            else:
+                app.router.add_post(f"/items{i}/{{id}}", _function_handler(i))
+        apps.append(app)
+    return apps
+
+
+def build_specs(apps: Sequence[web.Application], openapi_version: str, **options: Any) -> int:
+    """Build the specs of the apps as ``setup_aiohttp_apispec`` does at startup, returns the total spec size"""
+    for app in apps:
+        setup_aiohttp_apispec(app, in_place=True, openapi_version=openapi_version, **options)
+    return sum(len(app[APISPEC_ENCODED_SPEC].body) for app in apps if APISPEC_ENCODED_SPEC in app)
+
+
+def run(routes: int, openapi_version: str, memory: bool = True, **options: Any) -> Result:
+    apps = make_apps(routes)
+    gc.collect()
+
+    start = time.perf_counter()
+    spec_bytes = build_specs(apps, openapi_version, **options)
+    build_seconds = time.perf_counter() - start
+
+    retained_memory = peak_memory = None
+    if memory:
+        # Measured separately, tracing the allocations slows the build down
+        apps = make_apps(routes)
+        gc.collect()
+        tracemalloc.start()
+        try:
+            build_specs(apps, openapi_version, **options)
+            gc.collect()
+            retained_memory, peak_memory = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+    return Result(
+        routes=routes,
+        openapi_version=openapi_version,
+        build_seconds=build_seconds,
+        peak_memory_bytes=peak_memory,
+        retained_memory_bytes=retained_memory,
+        spec_bytes=spec_bytes,
+    )
+
+
+def _mib(size: int | None) -> str:
+    return "-" if size is None else f"{size / 1024**2:.1f}"
+
+
+def format_results(results: Sequence[Result]) -> str:
+    lines = [
+        f"{'routes':>8} {'openapi':>8} {'build s':>9} {'us/route':>9} {'peak MiB':>9} {'kept MiB':>9} {'spec KiB':>9}"
+    ]
+    for r in results:
+        peak = _mib(r.peak_memory_bytes)
+        retained = _mib(r.retained_memory_bytes)
+        lines.append(
+            f"{r.routes:>8} {r.openapi_version:>8} {r.build_seconds:>9.3f} "
+            f"{r.build_seconds / r.routes * 1e6:>9.1f} {peak:>9} {retained:>9} {r.spec_bytes / 1024:>9.0f}"
+        )
+    return "\n".join(lines)
+
+
+def make_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--routes", type=int, nargs="+", default=ROUTES, help="total numbers of routes")
+    parser.add_argument("--openapi-version", nargs="+", default=OPENAPI_VERSIONS, help="OpenAPI versions")
+    parser.add_argument(
+        "--validation-only", action="store_true", help="set up the validation only, without generating the specs"
+    )
+    parser.add_argument("--compact", action="store_true", help="release the spec data after the specs are built")
+    parser.add_argument("--no-memory", action="store_true", help="skip the peak memory measurement")
+    parser.add_argument("--json", dest="json_path", help="also write the results to a JSON file")
+    return parser
+
+
+def main() -> int:
+    args = make_parser().parse_args()
+    env = environment()
+    sys.stdout.write(", ".join(f"{k}={v}" for k, v in env.items()) + "\n\n")
+
+    results = []
+    for routes in args.routes:
+        for openapi_version in args.openapi_version:
+            options = {"validation_only": args.validation_only, "compact": args.compact}
+            results.append(run(routes, openapi_version, memory=not args.no_memory, **options))
+            # Print as we go, the large apps take a while
+            sys.stdout.write(format_results(results).splitlines()[-1] + "\n")
+            sys.stdout.flush()
+
+    sys.stdout.write("\n" + format_results(results) + "\n")
+
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump({"environment": env, "results": [asdict(r) for r in results]}, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
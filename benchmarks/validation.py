@@ -0,0 +1,248 @@
+"""
+Request validation benchmark.
+
+Covers every request location, marshmallow and dataclass schemas,
+flat, nested and ``many=True`` shapes, and small and large payloads.
+Every scenario is also run against a handler without schemas, as the baseline of the server overhead.
+
+Usage::
+
+    python -m benchmarks.validation -n 5000 -k json
+"""
+
+import sys
+import warnings
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from functools import partial
+from typing import Any
+
+from aiohttp import FormData, web
+from marshmallow import EXCLUDE, Schema, fields
+
+from aiohttp_apigami import request_schema, setup_aiohttp_apispec, validation_middleware
+
+from .runner import Scenario, main
+
+try:
+    import marshmallow_recipe
+except ImportError:  # pragma: no cover
+    marshmallow_recipe = None  # type: ignore
+
+# Payload sizes: the number of items of `many=True` schemas and the length of string values
+SIZES = {"small": (10, 10), "large": (1000, 100)}
+# The large `many=True` payload is around a megabyte
+CLIENT_MAX_SIZE = 64 * 1024**2
+
+
+class TagSchema(Schema):
+    name = fields.Str(required=True)
+    weight = fields.Float()
+
+
+class FlatSchema(Schema):
+    id = fields.Int(required=True)
+    name = fields.Str(required=True)
+    active = fields.Bool()
+    score = fields.Float()
+
+
+class NestedSchema(FlatSchema):
+    tags = fields.List(fields.Nested(TagSchema))
+    owner = fields.Nested(FlatSchema)
+
+
+class HeadersSchema(Schema):
+    class Meta:
+        unknown = EXCLUDE
+
+    x_request_id = fields.Str(data_key="X-Request-Id", required=True)
+    x_client = fields.Str(data_key="X-Client", required=True)
+
+
+class CookiesSchema(Schema):
+    class Meta:
+        unknown = EXCLUDE
+
+    session = fields.Str(required=True)
+    theme = fields.Str()
+
+
+class MatchInfoSchema(Schema):
+    id = fields.Int(required=True)
+    slug = fields.Str(required=True)
+
+
+class FilesSchema(Schema):
+    upload = fields.Raw(required=True)
+
+
+@dataclass
+class Tag:
+    name: str
+    weight: float = 0.0
+
+
+@dataclass
+class Flat:
+    id: int
+    name: str
+    active: bool = False
+    score: float = 0.0
+
+
+@dataclass
+class Nested(Flat):
+    tags: list[Tag] = field(default_factory=list)
+    owner: Flat | None = None
+
+
+def flat_payload(length: int, i: int = 0) -> dict[str, Any]:
+    return {"id": i, "name": "n" * length, "active": True, "score": 1.5}
+
+
+def nested_payload(length: int, i: int = 0) -> dict[str, Any]:
+    tags = [{"name": "t" * length, "weight": float(j)} for j in range(5)]
+    return {**flat_payload(length, i), "tags": tags, "owner": flat_payload(length, i + 1)}
+
+
+async def handler(request: web.Request) -> web.Response:
+    return web.Response(text="ok")
+
+
+def _route(schema: Any, **kwargs: Any) -> Any:
+    """A new handler function, so every route has its own schemas"""
+
+    async def route_handler(request: web.Request) -> web.Response:
+        return await handler(request)
+
+    return request_schema(schema, **kwargs)(route_handler)
+
+
+def _schemas() -> dict[str, tuple[Any, Any, Any]]:
+    """Flat, nested and nested ``many=True`` schemas by kind"""
+    schemas: dict[str, tuple[Any, Any, Any]] = {"marshmallow": (FlatSchema, NestedSchema, NestedSchema(many=True))}
+    if marshmallow_recipe is not None:
+        schemas["dataclass"] = (Flat, Nested, marshmallow_recipe.schema(Nested, many=True))
+    return schemas
+
+
+def make_app() -> web.Application:
+    app = web.Application(middlewares=[validation_middleware], client_max_size=CLIENT_MAX_SIZE)
+    app.router.add_post("/baseline", handler)
+    app.router.add_get("/baseline", handler)
+
+    for kind, (flat, nested, many) in _schemas().items():
+        app.router.add_post(f"/{kind}/json/flat", _route(flat))
+        app.router.add_post(f"/{kind}/json/nested", _route(nested))
+        app.router.add_post(f"/{kind}/json/many", _route(many))
+        app.router.add_get(f"/{kind}/querystring", _route(flat, location="querystring"))
+        app.router.add_post(f"/{kind}/form", _route(flat, location="form"))
+
+    app.router.add_get("/marshmallow/headers", _route(HeadersSchema, location="headers"))
+    app.router.add_get("/marshmallow/cookies", _route(CookiesSchema, location="cookies"))
+    app.router.add_get("/marshmallow/match_info/{id}/{slug}", _route(MatchInfoSchema, location="match_info"))
+    app.router.add_post("/marshmallow/files", _route(FilesSchema, location="files"))
+
+    with warnings.catch_warnings():
+        # The dataclass schemas have the same names as the marshmallow ones
+        warnings.filterwarnings("ignore", message="Multiple schemas resolved to the name")
+        setup_aiohttp_apispec(app, in_place=True)
+    return app
+
+
+def _kwargs(**kwargs: Any) -> Callable[[], dict[str, Any]]:
+    """Request arguments that are the same for every request"""
+    return lambda: kwargs
+
+
+def _files(length: int) -> dict[str, Any]:
+    form = FormData()
+    form.add_field("upload", b"x" * length * 100, filename="upload.bin")
+    return {"data": form}
+
+
+def make_scenarios() -> list[Scenario]:
+    scenarios = [Scenario(name="baseline/get", method="GET", path="/baseline")]
+
+    for size, (count, length) in SIZES.items():
+        flat = flat_payload(length)
+        nested = nested_payload(length)
+        many = [nested_payload(length, i) for i in range(count)]
+        query = {key: str(value) for key, value in flat.items()}
+
+        scenarios.append(
+            Scenario(name=f"baseline/json/{size}", method="POST", path="/baseline", make_kwargs=_kwargs(json=many))
+        )
+
+        for kind in _schemas():
+            scenarios.extend(
+                [
+                    Scenario(
+                        name=f"{kind}/json/flat/{size}",
+                        method="POST",
+                        path=f"/{kind}/json/flat",
+                        make_kwargs=_kwargs(json=flat),
+                    ),
+                    Scenario(
+                        name=f"{kind}/json/nested/{size}",
+                        method="POST",
+                        path=f"/{kind}/json/nested",
+                        make_kwargs=_kwargs(json=nested),
+                    ),
+                    Scenario(
+                        name=f"{kind}/json/many/{size}",
+                        method="POST",
+                        path=f"/{kind}/json/many",
+                        make_kwargs=_kwargs(json=many),
+                    ),
+                    Scenario(
+                        name=f"{kind}/querystring/{size}",
+                        method="GET",
+                        path=f"/{kind}/querystring",
+                        make_kwargs=_kwargs(params=query),
+                    ),
+                    Scenario(
+                        name=f"{kind}/form/{size}",
+                        method="POST",
+                        path=f"/{kind}/form",
+                        make_kwargs=_kwargs(data=query),
+                    ),
+                ]
+            )
+
+        headers = {"X-Request-Id": "r" * length, "X-Client": "benchmark"}
+        cookies = {"session": "s" * length, "theme": "dark"}
+        scenarios.extend(
+            [
+                Scenario(
+                    name=f"marshmallow/headers/{size}",
+                    method="GET",
+                    path="/marshmallow/headers",
+                    make_kwargs=_kwargs(headers=headers),
+                ),
+                Scenario(
+                    name=f"marshmallow/cookies/{size}",
+                    method="GET",
+                    path="/marshmallow/cookies",
+                    make_kwargs=_kwargs(cookies=cookies),
+                ),
+                Scenario(
+                    name=f"marshmallow/match_info/{size}",
+                    method="GET",
+                    path=f"/marshmallow/match_info/1/{'m' * length}",
+                ),
+                Scenario(
+                    name=f"marshmallow/files/{size}",
+                    method="POST",
+                    path="/marshmallow/files",
+                    make_kwargs=partial(_files, length),
+                ),
+            ]
+        )
+
+    return scenarios
+
+
+if __name__ == "__main__":
+    sys.exit(main(__doc__ or "", make_app, make_scenarios()))
@@ -1,3 +1,10 @@
+from .apps import (
+    AppFactory,
+    DocsAppFactory,
+    make_app,
+    make_docs_app,
+    make_docs_handler,
+)
 from .examples import (
     example_for_request_dataclass,
     example_for_request_schema,
@@ -30,8 +37,10 @@ from .schemas import (
 )
 
 __all__ = [
+    "AppFactory",
     "BasicHandlers",
     "CookiesSchema",
+    "DocsAppFactory",
     "EchoHandlers",
     "HeaderSchema",
     "MatchInfoSchema",
@@ -50,6 +59,9 @@ __all__ = [
     "error_middleware",
     "example_for_request_dataclass",
     "example_for_request_schema",
+    "make_app",
+    "make_docs_app",
+    "make_docs_handler",
     "validated_view",
     "variable_handler",
 ]
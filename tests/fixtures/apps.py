@@ -0,0 +1,59 @@
+from collections.abc import Callable
+from typing import Any, Protocol
+
+import pytest
+from aiohttp import web
+from aiohttp.typedefs import Handler
+
+from aiohttp_apigami import docs, request_schema, setup_aiohttp_apispec, validation_middleware
+from tests.fixtures.schemas import RequestSchema
+
+
+class AppFactory(Protocol):
+    def __call__(self, *routes: web.AbstractRouteDef, setup: bool = True, **options: Any) -> web.Application: ...
+
+
+class DocsAppFactory(Protocol):
+    def __call__(self, summary: str = ..., *, setup: bool = True, **options: Any) -> web.Application: ...
+
+
+@pytest.fixture
+def make_app() -> AppFactory:
+    """
+    Return a factory of the apps with the validation middleware and the given routes,
+    set up in place with the given ``setup_aiohttp_apispec`` options, or not set up with ``setup=False``.
+    """
+
+    def factory(*routes: web.AbstractRouteDef, setup: bool = True, **options: Any) -> web.Application:
+        app = web.Application(middlewares=[validation_middleware])
+        app.router.add_routes(routes)
+        if setup:
+            setup_aiohttp_apispec(app, in_place=True, **options)
+        return app
+
+    return factory
+
+
+@pytest.fixture
+def make_docs_handler() -> Callable[..., Handler]:
+    """Return a factory of the documented handlers, a new function for each call."""
+
+    def factory(summary: str = "Test method summary") -> Handler:
+        @docs(tags=["mytag"], summary=summary)
+        @request_schema(RequestSchema)
+        async def handler(request: web.Request) -> web.Response:
+            return web.json_response({})
+
+        return handler
+
+    return factory
+
+
+@pytest.fixture
+def make_docs_app(make_app: AppFactory, make_docs_handler: Callable[..., Handler]) -> DocsAppFactory:
+    """Return a factory of the apps with a documented handler on ``POST /v1/test``, see ``make_app``."""
+
+    def factory(summary: str = "Test method summary", *, setup: bool = True, **options: Any) -> web.Application:
+        return make_app(web.post("/v1/test", make_docs_handler(summary)), setup=setup, **options)
+
+    return factory
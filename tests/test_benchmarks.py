@@ -0,0 +1,34 @@
+import pytest
+
+from aiohttp_apigami.constants import SWAGGER_DICT
+from benchmarks import spec
+from benchmarks.runner import Scenario, format_results, run_scenarios
+from benchmarks.validation import make_app, make_scenarios
+
+
+@pytest.mark.parametrize("scenario", make_scenarios(), ids=lambda s: s.name)
+async def test_validation_scenarios(scenario: Scenario) -> None:
+    # Every scenario gets the expected response, so the benchmark measures the happy path
+    results = await run_scenarios(make_app(), [scenario], requests=2, warmup=0, concurrency=1)
+    assert results[0].requests == 2
+    assert scenario.name in format_results(results)
+
+
+@pytest.mark.parametrize("openapi_version", ["2.0", "3.0.3"])
+def test_spec_benchmark(openapi_version: str) -> None:
+    result = spec.run(40, openapi_version)
+    assert result.routes == 40
+    assert result.peak_memory_bytes
+    assert result.spec_bytes > 0
+    assert "40" in spec.format_results([result])
+
+
+def test_spec_benchmark_apps() -> None:
+    apps = spec.make_apps(25, routes_per_app=10)
+    assert len(apps) == 3
+    spec.build_specs(apps, "3.0.3")
+
+    paths = [path for app in apps for path in app[SWAGGER_DICT]["paths"]]
+    assert len(paths) == 25
+    # Class-based views have two methods
+    assert sorted(apps[0][SWAGGER_DICT]["paths"]["/items3/{id}"]) == ["get", "put"]
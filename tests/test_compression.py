@@ -0,0 +1,148 @@
+import gzip
+from typing import Any
+from unittest.mock import patch
+
+import pytest
+from pytest_aiohttp.plugin import AiohttpClient
+
+from aiohttp_apigami import compression
+from aiohttp_apigami.compression import (
+    BROTLI,
+    GZIP,
+    PrecompressedBody,
+    compress_variants,
+    select_encoding,
+)
+from aiohttp_apigami.constants import APISPEC_ENCODED_SPEC, SWAGGER_DICT
+from aiohttp_apigami.swagger_ui import SWAGGER_UI_STATIC_FILES
+from tests.fixtures import AppFactory
+
+VARIANTS = {BROTLI: b"br", GZIP: b"gz"}
+DOCS_OPTIONS: dict[str, Any] = {"url": "/api/docs/swagger.json", "swagger_path": "/api/docs", "description": "a" * 1000}
+
+
+@pytest.mark.parametrize(
+    ("accept_encoding", "expected"),
+    [
+        ("", None),
+        ("identity", None),
+        ("gzip", GZIP),
+        ("gzip, deflate, br", BROTLI),
+        ("br;q=0.5, gzip", GZIP),
+        ("br;q=0, gzip;q=0", None),
+        ("*", BROTLI),
+        ("br;q=0, *", GZIP),
+        ("GZIP;Q=0.8", GZIP),
+        ("gzip;q=invalid", None),
+    ],
+)
+def test_select_encoding(accept_encoding: str, expected: str | None) -> None:
+    assert select_encoding(accept_encoding, VARIANTS) == expected
+
+
+def test_select_encoding_without_variants() -> None:
+    assert select_encoding("gzip, br", {}) is None
+
+
+def test_compress_variants_skips_incompressible_data() -> None:
+    assert compress_variants(b"x") == {}
+
+
+def test_compress_variants_without_brotli() -> None:
+    data = b"a" * 1000
+    with patch.object(compression, "brotli", None):
+        variants = compress_variants(data)
+
+    assert list(variants) == [GZIP]
+    assert gzip.decompress(variants[GZIP]) == data
+
+
+def test_compress_variants_with_brotli() -> None:
+    brotli = pytest.importorskip("brotli")
+    data = b"a" * 1000
+    variants = compress_variants(data)
+
+    assert list(variants) == [BROTLI, GZIP]
+    assert brotli.decompress(variants[BROTLI]) == data
+
+
+def test_precompressed_body_without_compression() -> None:
+    body = PrecompressedBody.from_bytes(b"a" * 1000)
+    assert body.variants == {}
+
+
+async def test_spec_gzip_variant(aiohttp_client: AiohttpClient, make_app: AppFactory) -> None:
+    app = make_app(precompress=True, **DOCS_OPTIONS)
+    client = await aiohttp_client(app)
+
+    res = await client.get("/api/docs/swagger.json", headers={"Accept-Encoding": "gzip"})
+    assert res.status == 200
+    assert res.headers["Content-Encoding"] == GZIP
+    assert res.headers["Vary"] == "Accept-Encoding"
+    assert await res.json() == app[SWAGGER_DICT]
+
+    etag = res.headers["ETag"]
+    assert etag == f'"{app[APISPEC_ENCODED_SPEC].etag}-gzip"'
+
+    res = await client.get("/api/docs/swagger.json", headers={"Accept-Encoding": "gzip", "If-None-Match": etag})
+    assert res.status == 304
+
+    # The identity representation has a different ETag
+    res = await client.get("/api/docs/swagger.json", headers={"Accept-Encoding": "identity", "If-None-Match": etag})
+    assert res.status == 200
+    assert "Content-Encoding" not in res.headers
+
+
+async def test_spec_without_precompress(aiohttp_client: AiohttpClient, make_app: AppFactory) -> None:
+    app = make_app(precompress=False, **DOCS_OPTIONS)
+    client = await aiohttp_client(app)
+
+    res = await client.get("/api/docs/swagger.json", headers={"Accept-Encoding": "gzip"})
+    assert res.status == 200
+    assert "Content-Encoding" not in res.headers
+    assert "Vary" not in res.headers
+
+
+async def test_swagger_ui_static_precompressed(aiohttp_client: AiohttpClient, make_app: AppFactory) -> None:
+    app = make_app(precompress=True, **DOCS_OPTIONS)
+    client = await aiohttp_client(app)
+
+    res = await client.get("/static/swagger/swagger-ui.css", headers={"Accept-Encoding": "gzip"})
+    assert res.status == 200
+    assert res.headers["Content-Encoding"] == GZIP
+    assert res.content_type == "text/css"
+    assert await res.read() == (SWAGGER_UI_STATIC_FILES / "swagger-ui.css").read_bytes()
+
+    # Images are served as is
+    res = await client.get("/static/swagger/favicon-16x16.png", headers={"Accept-Encoding": "gzip"})
+    assert res.status == 200
+    assert "Content-Encoding" not in res.headers
+    assert res.content_type == "image/png"
+
+    res = await client.get("/static/swagger/unknown.js")
+    assert res.status == 404
+
+
+async def test_swagger_ui_index_page_precompressed(aiohttp_client: AiohttpClient, make_app: AppFactory) -> None:
+    app = make_app(precompress=True, **DOCS_OPTIONS)
+    client = await aiohttp_client(app)
+
+    res = await client.get("/api/docs", headers={"Accept-Encoding": "gzip"})
+    assert res.status == 200
+    assert res.headers["Content-Encoding"] == GZIP
+    assert "/static/swagger/swagger-ui.css" in await res.text()
+
+
+async def test_swagger_ui_compressed_on_startup(aiohttp_client: AiohttpClient, make_app: AppFactory) -> None:
+    app = make_app(precompress=True, **DOCS_OPTIONS)
+    with patch("aiohttp_apigami.compression.compress_variants", wraps=compress_variants) as compress:
+        client = await aiohttp_client(app)
+        assert compress.call_count > 1
+
+        # Requests are served from the variants built on startup
+        compress.reset_mock()
+        res = await client.get("/static/swagger/swagger-ui-bundle.js", headers={"Accept-Encoding": "gzip"})
+        assert res.headers["Content-Encoding"] == GZIP
+        res = await client.get("/api/docs", headers={"Accept-Encoding": "gzip"})
+        assert res.headers["Content-Encoding"] == GZIP
+    compress.assert_not_called()
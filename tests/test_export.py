@@ -0,0 +1,123 @@
+import json
+from pathlib import Path
+from typing import Any
+from unittest.mock import patch
+
+import pytest
+import yaml
+from aiohttp import web
+from pytest_aiohttp.plugin import AiohttpClient
+
+from aiohttp_apigami import AiohttpApiSpec, docs, request_schema, setup_aiohttp_apispec, validation_middleware
+from aiohttp_apigami.__main__ import main
+from aiohttp_apigami.constants import APISPEC_ENCODED_SPEC, SWAGGER_DICT
+from aiohttp_apigami.export import content_hash, export_spec
+from tests.fixtures.schemas import RequestSchema
+
+
+def create_app(**options: Any) -> web.Application:
+    @docs(tags=["mytag"], summary="Test method summary")
+    @request_schema(RequestSchema)
+    async def handler(request: web.Request) -> web.Response:
+        return web.json_response({})
+
+    app = web.Application(middlewares=[validation_middleware])
+    app.router.add_post("/v1/test", handler)
+    setup_aiohttp_apispec(app, title="Test API", version="1.0.0", **options)
+    return app
+
+
+async def create_app_async() -> web.Application:
+    return create_app()
+
+
+app = create_app()
+
+
+def _expected_spec() -> dict[str, Any]:
+    spec: dict[str, Any] = create_app(in_place=True)[SWAGGER_DICT]
+    return spec
+
+
+@pytest.mark.parametrize("target", ["create_app", "create_app_async", "app"])
+def test_export_json(tmp_path: Path, target: str) -> None:
+    output = tmp_path / "spec.json"
+    assert main(["export", f"tests.test_export:{target}", "-o", str(output)]) == 0
+
+    data = output.read_bytes()
+    assert json.loads(data) == _expected_spec()
+    assert (tmp_path / "spec.json.sha256").read_text() == f"{content_hash(data)}  spec.json\n"
+
+
+def test_export_yaml(tmp_path: Path) -> None:
+    output = tmp_path / "spec.yaml"
+    assert main(["export", "tests.test_export:create_app", "-o", str(output)]) == 0
+    assert yaml.safe_load(output.read_bytes()) == _expected_spec()
+
+
+def test_export_stdout(capsys: pytest.CaptureFixture[str]) -> None:
+    assert main(["export", "tests.test_export:create_app", "--indent", "2"]) == 0
+    assert json.loads(capsys.readouterr().out) == _expected_spec()
+
+
+def test_export_registered_app() -> None:
+    assert export_spec(create_app(in_place=True, compact=True)) == _expected_spec()
+
+
+@pytest.mark.parametrize("target", ["tests.test_export", "tests.test_export:missing", "missing:app", "json:__name__"])
+def test_export_invalid_app(target: str, capsys: pytest.CaptureFixture[str]) -> None:
+    assert main(["export", target]) == 1
+    assert capsys.readouterr().err.startswith("Error:")
+
+
+def test_export_app_without_extension(capsys: pytest.CaptureFixture[str]) -> None:
+    assert main(["export", "tests.test_export:web.Application"]) == 1
+    assert "not set up" in capsys.readouterr().err
+
+
+async def test_prebuilt_spec(aiohttp_client: AiohttpClient, tmp_path: Path) -> None:
+    output = tmp_path / "spec.json"
+    main(["export", "tests.test_export:create_app", "-o", str(output)])
+
+    with patch.object(AiohttpApiSpec, "swagger_dict") as swagger_dict:
+        prebuilt_app = create_app(prebuilt_spec_path=output, precompress=True)
+        client = await aiohttp_client(prebuilt_app)
+    swagger_dict.assert_not_called()
+    assert SWAGGER_DICT not in prebuilt_app
+
+    res = await client.get("/api/docs/swagger.json", headers={"Accept-Encoding": "identity"})
+    assert res.status == 200
+    assert await res.read() == output.read_bytes()
+    assert res.headers["ETag"] == f'"{content_hash(output.read_bytes())}"'
+
+    # Validation is set up as usual
+    res = await client.post("/v1/test", json={"id": "invalid"})
+    assert res.status == 422
+
+
+def test_prebuilt_yaml_spec(tmp_path: Path) -> None:
+    output = tmp_path / "spec.yaml"
+    main(["export", "tests.test_export:create_app", "-o", str(output)])
+
+    prebuilt_app = create_app(prebuilt_spec_path=output, in_place=True)
+    assert json.loads(bytes(prebuilt_app[APISPEC_ENCODED_SPEC].body)) == _expected_spec()
+
+
+def test_prebuilt_spec_hash_mismatch(tmp_path: Path) -> None:
+    output = tmp_path / "spec.json"
+    main(["export", "tests.test_export:create_app", "-o", str(output)])
+    output.write_text("{}")
+
+    with pytest.raises(ValueError, match="Content hash"):
+        create_app(prebuilt_spec_path=output, in_place=True)
+
+    # Without the hash file the spec is loaded as it is
+    (tmp_path / "spec.json.sha256").unlink()
+    assert create_app(prebuilt_spec_path=output, in_place=True)[APISPEC_ENCODED_SPEC].body == b"{}"
+
+
+def test_prebuilt_spec_with_other_spec_files() -> None:
+    with pytest.raises(ValueError, match="`spec_cache_path` and `prebuilt_spec_path` can't be used together"):
+        create_app(spec_cache_path="spec.cache", prebuilt_spec_path="spec.json")
+    with pytest.raises(ValueError, match="prebuilt_spec_path"):
+        create_app(validation_only=True, prebuilt_spec_path="spec.json")
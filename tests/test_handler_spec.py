@@ -0,0 +1,87 @@
+from typing import Any
+
+import pytest
+from aiohttp import web
+from marshmallow import Schema, fields
+
+from aiohttp_apigami import HandlerSpec, docs, request_schema, response_schema
+from aiohttp_apigami.handler_spec import get_handler_spec, get_or_set_handler_spec
+from aiohttp_apigami.validation import ValidationSchema
+
+
+class PayloadSchema(Schema):
+    id = fields.Int()
+
+
+def test_decorators_set_one_spec() -> None:
+    async def handler(request: web.Request) -> Any:
+        return {}
+
+    decorated = docs(tags=["items"], summary="Create", responses={404: {"description": "Not found"}})(handler)
+    decorated = request_schema(PayloadSchema, put_into="payload")(decorated)
+    decorated = request_schema(PayloadSchema, location="querystring")(decorated)
+    decorated = response_schema(PayloadSchema, 201, serialize=True, sample_rate=0.5)(decorated)
+
+    spec = get_handler_spec(decorated)
+    assert isinstance(spec, HandlerSpec)
+    assert spec.locations == {"json", "querystring"}
+    assert [step.put_into for step in spec.validation] == ["payload", None]
+    assert spec.serialized_response is not None
+    assert spec.serialized_response[1] == 201
+    assert spec.response_schemas == {201: (spec.responses["201"]["schema"], 0.5)}
+
+    # Backward compatible access
+    assert decorated.__schemas__ is spec.validation  # type: ignore[attr-defined]
+    assert spec["tags"] == ["items"]
+    assert spec["responses"] is spec.responses
+    assert list(spec) == ["schemas", "responses", "parameters", "tags", "summary", "produces"]
+
+
+def test_response_schemas_from_docs() -> None:
+    @docs(responses={200: {"schema": PayloadSchema(), "description": "OK"}, 404: {"description": "Not found"}})
+    async def documented(request: web.Request) -> web.Response:
+        return web.Response()
+
+    spec = get_or_set_handler_spec(documented)
+    assert list(spec.response_schemas) == [200]
+    assert spec.serialized_response is None
+
+
+def test_mapping_updates() -> None:
+    spec = HandlerSpec()
+    spec["responses"] = {"200": {"schema": PayloadSchema(), "serialize": True}}
+    assert spec.serialized_response is not None
+    spec["summary"] = "Summary"
+    assert spec.options == {"summary": "Summary"}
+
+    del spec["summary"]
+    del spec["responses"]
+    assert spec.serialized_response is None
+    assert dict(spec) == {"schemas": [], "responses": {}, "parameters": []}
+
+
+def test_duplicate_location() -> None:
+    spec = HandlerSpec()
+    spec.add_request_schema({}, ValidationSchema(PayloadSchema(), "json"))
+    with pytest.raises(RuntimeError, match="Multiple `json` locations"):
+        spec.add_request_schema({}, ValidationSchema(PayloadSchema(), "json"))
+
+
+def test_legacy_dict() -> None:
+    async def legacy(request: web.Request) -> web.Response:
+        return web.Response()
+
+    step = ValidationSchema(PayloadSchema(), "json")
+    legacy.__apispec__ = {"schemas": [], "responses": {}, "parameters": [], "tags": ["legacy"]}  # type: ignore[attr-defined]
+    legacy.__schemas__ = [step]  # type: ignore[attr-defined]
+
+    spec = get_handler_spec(legacy)
+    assert spec is not None
+    assert spec.options == {"tags": ["legacy"]}
+    assert spec.validation == [step]
+    assert spec.locations == {"json"}
+
+    # Replaced with a typed spec once decorated
+    decorated = response_schema(PayloadSchema)(legacy)
+    assert isinstance(decorated.__apispec__, HandlerSpec)  # type: ignore[attr-defined]
+    assert decorated.__schemas__ == [step]  # type: ignore[attr-defined]
@@ -0,0 +1,55 @@
+import subprocess
+import sys
+from importlib import metadata
+
+import pytest
+
+import aiohttp_apigami
+
+SPEC_MODULES = ("apispec", "webargs", "aiohttp_apigami.core", "aiohttp_apigami.plugin", "aiohttp_apigami.swagger_ui")
+# Optional JSON libraries, imported when they are selected only
+JSON_MODULES = ("orjson", "msgspec")
+# Imported when the spec is built only
+SPEC_BUILD_MODULES = ("apispec", "aiohttp_apigami.plugin")
+
+
+def _imported_modules(statement: str) -> list[str]:
+    code = f"import sys; {statement}; print(' '.join(sorted(sys.modules)))"
+    return subprocess.check_output([sys.executable, "-c", code], text=True).split()
+
+
+def test_decorators_and_middleware_without_spec_generation() -> None:
+    modules = _imported_modules(
+        "from aiohttp_apigami import request_schema, response_schema, docs, validation_middleware"
+    )
+    assert not [name for name in (*SPEC_MODULES, *JSON_MODULES) if name in modules]
+
+
+def test_spec_generation_is_imported_on_demand() -> None:
+    modules = _imported_modules("from aiohttp_apigami import setup_aiohttp_apispec")
+    assert all(name in modules for name in SPEC_MODULES if name not in SPEC_BUILD_MODULES)
+    assert not [name for name in SPEC_BUILD_MODULES if name in modules]
+
+    modules = _imported_modules(
+        "from aiohttp import web; from aiohttp_apigami import setup_aiohttp_apispec; "
+        "setup_aiohttp_apispec(web.Application(), in_place=True)"
+    )
+    assert all(name in modules for name in SPEC_MODULES)
+
+
+def test_validation_only_without_spec_generation() -> None:
+    modules = _imported_modules(
+        "from aiohttp import web; from aiohttp_apigami import setup_aiohttp_apispec; "
+        "setup_aiohttp_apispec(web.Application(), validation_only=True, in_place=True)"
+    )
+    assert not [name for name in (*SPEC_BUILD_MODULES, *JSON_MODULES) if name in modules]
+
+
+def test_lazy_attributes() -> None:
+    assert aiohttp_apigami.__version__ == metadata.version("aiohttp-apigami")
+    assert set(aiohttp_apigami.__all__) <= set(dir(aiohttp_apigami))
+    for name in aiohttp_apigami.__all__:
+        assert getattr(aiohttp_apigami, name) is not None
+
+    with pytest.raises(AttributeError, match="unknown"):
+        aiohttp_apigami.unknown  # noqa: B018
@@ -0,0 +1,135 @@
+from typing import Any
+
+import pytest
+from aiohttp import web
+from marshmallow import Schema, fields
+from pytest_aiohttp.plugin import AiohttpClient
+
+from aiohttp_apigami import (
+    ValidationMetrics,
+    request_schema,
+    response_schema,
+    setup_aiohttp_apispec,
+)
+from aiohttp_apigami.metrics import Histogram, PhaseTimer
+from tests.fixtures import AppFactory
+
+
+class ItemSchema(Schema):
+    name = fields.Str(required=True)
+
+
+class QuerySchema(Schema):
+    limit = fields.Int()
+
+
+@request_schema(QuerySchema, location="querystring", put_into="query")
+@request_schema(ItemSchema)
+async def handler(request: web.Request) -> web.Response:
+    return web.json_response(request["data"])
+
+
+async def plain_handler(request: web.Request) -> web.Response:
+    return web.Response(text="ok")
+
+
+def test_invalid_options() -> None:
+    with pytest.raises(ValueError, match="buckets"):
+        ValidationMetrics(buckets=[1, 0.5])
+    with pytest.raises(ValueError, match="metrics_url"):
+        setup_aiohttp_apispec(web.Application(), metrics_url="/metrics")
+
+
+def test_histogram() -> None:
+    histogram = Histogram([0.1, 1])
+    for value in (0.05, 0.1, 0.5, 5):
+        histogram.observe(value)
+    assert list(histogram.cumulative()) == [(0.1, 2), (1, 3)]
+    assert histogram.count == 4
+    assert histogram.sum == pytest.approx(5.65)
+
+
+def test_observe_adds_up_locations() -> None:
+    metrics = ValidationMetrics()
+    timer = PhaseTimer()
+    timer.add("load", 0.25, "json")
+    timer.add("load", 0.5, "querystring")
+    timer.failure = "querystring"
+    metrics.observe("GET /", timer)
+
+    histogram = metrics.histogram("GET /", "load")
+    assert histogram is not None
+    assert (histogram.count, histogram.sum) == (1, 0.75)
+    assert metrics.failures == {("GET /", "querystring"): 1}
+
+
+async def test_metrics(aiohttp_client: AiohttpClient, make_app: AppFactory) -> None:
+    metrics = ValidationMetrics()
+    app = make_app(
+        web.post("/items/{id}", handler),
+        web.get("/plain", plain_handler),
+        metrics=metrics,
+        metrics_url="/api/docs/metrics",
+    )
+    client = await aiohttp_client(app)
+
+    for i in range(3):
+        res = await client.post(f"/items/{i}", json={"name": "x"}, params={"limit": 1})
+        assert res.status == 200
+    res = await client.post("/items/4", json={})
+    assert res.status == 422
+    res = await client.post("/items/5", json={"name": "x"}, params={"limit": "x"})
+    assert res.status == 422
+    await client.get("/plain")
+
+    # Route paths are labeled with the canonical path
+    for phase, count in (("read", 5), ("decode", 5), ("load", 5), ("handler", 3)):
+        histogram = metrics.histogram("POST /items/{id}", phase)
+        assert histogram is not None
+        assert histogram.count == count
+    assert metrics.failures == {("POST /items/{id}", "json"): 1, ("POST /items/{id}", "querystring"): 1}
+
+    res = await client.get("/api/docs/metrics")
+    assert res.status == 200
+    assert res.headers["Content-Type"] == "text/plain; version=0.0.4; charset=utf-8"
+    text = await res.text()
+    assert "# TYPE apigami_phase_duration_seconds histogram" in text
+    assert 'apigami_phase_duration_seconds_count{operation="POST /items/{id}",phase="handler"} 3' in text
+    assert 'apigami_phase_duration_seconds_bucket{operation="POST /items/{id}",phase="load",le="+Inf"} 5' in text
+    assert 'apigami_validation_failures_total{operation="POST /items/{id}",location="json"} 1' in text
+    # Routes without schemas are not measured
+    assert "/plain" not in text
+
+
+@pytest.mark.parametrize("serialize", [False, True])
+async def test_server_timing(aiohttp_client: AiohttpClient, make_app: AppFactory, serialize: bool) -> None:
+    @request_schema(ItemSchema)
+    @response_schema(ItemSchema, 200, serialize=serialize)
+    async def item_handler(request: web.Request) -> Any:
+        data = request["data"]
+        return data if serialize else web.json_response(data)
+
+    app = make_app(web.post("/items", item_handler), web.get("/plain", plain_handler), server_timing=True)
+    client = await aiohttp_client(app)
+
+    res = await client.post("/items", json={"name": "x"})
+    assert res.status == 200
+    names = [metric.split(";dur=")[0] for metric in res.headers["Server-Timing"].split(", ")]
+    assert names == ["read-json", "decode-json", "load-json", "handler"] + (["serialize"] if serialize else [])
+
+    # Rejected requests get the header too
+    res = await client.post("/items", json={})
+    assert res.status == 422
+    assert res.headers["Server-Timing"].startswith("read-json;dur=")
+    assert "handler" not in res.headers["Server-Timing"]
+
+    res = await client.get("/plain")
+    assert "Server-Timing" not in res.headers
+
+
+def test_server_timing_value() -> None:
+    timer = PhaseTimer()
+    timer.add("load", 0.001, "querystring")
+    timer.add("load", 0.0005, "querystring")
+    timer.add("handler", 0.25)
+    assert timer.server_timing() == "load-querystring;dur=1.500, handler;dur=250.000"
@@ -0,0 +1,122 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+import pytest
+from aiohttp import web
+from marshmallow import Schema, ValidationError, fields, validates
+from pytest_aiohttp.plugin import AiohttpClient
+
+from aiohttp_apigami import OffloadPolicy, request_schema
+from tests.fixtures import AppFactory
+
+THREADS: list[threading.Thread] = []
+
+
+class ThreadRecordingSchema(Schema):
+    id = fields.Int()
+    name = fields.Str()
+
+    @validates("name")
+    def record_thread(self, value: str, **kwargs: Any) -> None:
+        THREADS.append(threading.current_thread())
+        if value == "invalid":
+            raise ValidationError("Invalid name")
+
+
+@request_schema(ThreadRecordingSchema)
+async def handler(request: web.Request) -> web.Response:
+    return web.json_response(request["data"])
+
+
+@pytest.fixture
+def executor() -> Any:
+    THREADS.clear()
+    with ThreadPoolExecutor(max_workers=1, thread_name_prefix="offload") as executor:
+        yield executor
+
+
+def test_policy_content_length() -> None:
+    policy = OffloadPolicy(min_content_length=1000, max_inline_seconds=None)
+    assert not policy.should_offload(1, None)
+    assert not policy.should_offload(1, 999)
+    assert policy.should_offload(1, 1000)
+
+
+def test_policy_learns_cost() -> None:
+    policy = OffloadPolicy(min_content_length=None, max_inline_seconds=0.01, smoothing=0.5)
+    assert policy.estimate(1, 100) is None
+    assert not policy.should_offload(1, 100)
+
+    # 1 ms per 1000 bytes
+    policy.record(1, 1000, 0.001)
+    assert policy.estimate(1, 1000) == pytest.approx(0.001)
+    assert not policy.should_offload(1, 1000)
+    # The cost of body locations scales with the body size
+    assert policy.should_offload(1, 10_000)
+
+    # Timings are smoothed
+    policy.record(1, 1000, 0.003)
+    assert policy.estimate(1, 1000) == pytest.approx(0.002)
+
+    # Loads without a body use the per-load cost
+    policy.record(2, None, 0.02)
+    assert policy.should_offload(2, None)
+    assert not policy.should_offload(3, None)
+
+
+def test_policy_invalid_smoothing() -> None:
+    with pytest.raises(ValueError, match="smoothing"):
+        OffloadPolicy(smoothing=0)
+
+
+async def test_small_request_stays_inline(
+    aiohttp_client: AiohttpClient, make_app: AppFactory, executor: ThreadPoolExecutor
+) -> None:
+    policy = OffloadPolicy(min_content_length=1000, max_inline_seconds=None, executor=executor)
+    client = await aiohttp_client(make_app(web.post("/v1/test", handler), offload_policy=policy))
+
+    res = await client.post("/v1/test", json={"id": 1, "name": "small"})
+    assert res.status == 200
+    assert await res.json() == {"id": 1, "name": "small"}
+    assert THREADS == [threading.main_thread()]
+
+
+async def test_large_request_offloaded(
+    aiohttp_client: AiohttpClient, make_app: AppFactory, executor: ThreadPoolExecutor
+) -> None:
+    policy = OffloadPolicy(min_content_length=1000, max_inline_seconds=None, executor=executor)
+    client = await aiohttp_client(make_app(web.post("/v1/test", handler), offload_policy=policy))
+
+    name = "x" * 1000
+    res = await client.post("/v1/test", json={"id": 1, "name": name})
+    assert res.status == 200
+    assert await res.json() == {"id": 1, "name": name}
+    assert len(THREADS) == 1
+    assert THREADS[0].name.startswith("offload")
+
+
+async def test_offloaded_validation_error(
+    aiohttp_client: AiohttpClient, make_app: AppFactory, executor: ThreadPoolExecutor
+) -> None:
+    policy = OffloadPolicy(min_content_length=1, executor=executor)
+    client = await aiohttp_client(make_app(web.post("/v1/test", handler), offload_policy=policy))
+
+    res = await client.post("/v1/test", json={"id": 1, "name": "invalid"})
+    assert res.status == 422
+    assert await res.json() == {"json": {"name": ["Invalid name"]}}
+    assert THREADS[0].name.startswith("offload")
+
+
+async def test_slow_schema_offloaded(
+    aiohttp_client: AiohttpClient, make_app: AppFactory, executor: ThreadPoolExecutor
+) -> None:
+    policy = OffloadPolicy(min_content_length=None, max_inline_seconds=0.0, executor=executor)
+    client = await aiohttp_client(make_app(web.post("/v1/test", handler), offload_policy=policy))
+
+    # The first load has no timings, so it runs inline and the next ones are offloaded
+    for _ in range(2):
+        res = await client.post("/v1/test", json={"name": "slow"})
+        assert res.status == 200
+    assert THREADS[0] is threading.main_thread()
+    assert THREADS[1].name.startswith("offload")
@@ -0,0 +1,196 @@
+import json
+import sys
+from typing import Any, NoReturn
+from unittest.mock import patch
+
+import marshmallow as m
+import pytest
+from aiohttp import FormData, web
+from pytest_aiohttp.plugin import AiohttpClient
+
+from aiohttp_apigami import request_json, request_schema, setup_aiohttp_apispec, validation_middleware
+from aiohttp_apigami.constants import APISPEC_PARSER
+from aiohttp_apigami.parser import ApigamiParser, get_json_loads
+from tests.fixtures import AppFactory
+from tests.fixtures.schemas import RequestSchema
+
+
+def test_get_json_loads_by_name() -> None:
+    assert get_json_loads("json") is json.loads
+
+    orjson = pytest.importorskip("orjson")
+    assert get_json_loads("orjson") is orjson.loads
+
+    msgspec = pytest.importorskip("msgspec")
+    assert get_json_loads("msgspec") is msgspec.json.decode
+
+
+def test_get_json_loads_callable() -> None:
+    def loads(data: bytes) -> Any:
+        return json.loads(data)
+
+    assert get_json_loads(loads) is loads
+
+
+def test_get_json_loads_invalid() -> None:
+    with pytest.raises(ValueError, match="Invalid `json_decoder`: 'ujson'"):
+        get_json_loads("ujson")
+
+
+@pytest.mark.parametrize("name", ["orjson", "msgspec"])
+def test_get_json_loads_not_installed(name: str) -> None:
+    with patch.dict(sys.modules, {name: None}), pytest.raises(RuntimeError, match=f"{name} is required"):
+        get_json_loads(name)
+
+
+@request_schema(RequestSchema)
+async def echo_handler(request: web.Request) -> web.Response:
+    return web.json_response(request["data"])
+
+
+@pytest.mark.parametrize("json_decoder", ["json", "orjson", "msgspec"])
+async def test_json_decoder(aiohttp_client: AiohttpClient, make_app: AppFactory, json_decoder: str) -> None:
+    pytest.importorskip(json_decoder)
+    client = await aiohttp_client(make_app(web.post("/echo", echo_handler), json_decoder=json_decoder))
+
+    res = await client.post("/echo", json={"id": 1, "name": "max", "list_field": [1, 2]})
+    assert res.status == 200
+    assert await res.json() == {"id": 1, "name": "max", "list_field": [1, 2]}
+
+    res = await client.post("/echo", data=b"{invalid", headers={"Content-Type": "application/json"})
+    assert res.status == 400
+    assert await res.json() == {"json": ["Invalid JSON body."]}
+
+    res = await client.post("/echo", data=b"\xff\xfe", headers={"Content-Type": "application/json"})
+    assert res.status == 400
+
+    # Empty body is treated as missing data
+    res = await client.post("/echo", data=b"", headers={"Content-Type": "application/json"})
+    assert res.status == 200
+    assert await res.json() == []
+
+
+async def test_custom_json_decoder(aiohttp_client: AiohttpClient, make_app: AppFactory) -> None:
+    decoded: list[bytes] = []
+
+    def loads(data: bytes) -> Any:
+        decoded.append(data)
+        return json.loads(data)
+
+    client = await aiohttp_client(make_app(web.post("/echo", echo_handler), json_decoder=loads))
+    res = await client.post("/echo", json={"id": 1})
+    assert res.status == 200
+    assert decoded == [b'{"id": 1}']
+
+
+async def test_parser_per_app(aiohttp_client: AiohttpClient, make_app: AppFactory) -> None:
+    def error_callback(error: m.ValidationError, *args: Any, **kwargs: Any) -> NoReturn:
+        raise web.HTTPBadRequest(text="custom")
+
+    app_with_callback = make_app(web.post("/echo", echo_handler), error_callback=error_callback)
+    app_default = make_app(web.post("/echo", echo_handler))
+
+    assert isinstance(app_default[APISPEC_PARSER], ApigamiParser)
+    assert app_default[APISPEC_PARSER] is not app_with_callback[APISPEC_PARSER]
+
+    client = await aiohttp_client(app_with_callback)
+    res = await client.post("/echo", json={"id": "invalid"})
+    assert res.status == 400
+    assert await res.text() == "custom"
+
+    # The error callback of the other app doesn't leak
+    client = await aiohttp_client(app_default)
+    res = await client.post("/echo", json={"id": "invalid"})
+    assert res.status == 422
+    assert await res.json() == {"json": {"id": ["Not a valid integer."]}}
+
+
+async def test_json_body_decoded_once(aiohttp_client: AiohttpClient) -> None:
+    decoded: list[bytes] = []
+
+    def loads(data: bytes) -> Any:
+        decoded.append(data)
+        return json.loads(data)
+
+    @request_schema(RequestSchema)
+    async def handler(request: web.Request) -> web.Response:
+        body = await request_json(request)
+        assert await request_json(request) is body
+        return web.json_response({"data": request["data"], "body": body})
+
+    app = web.Application(middlewares=[validation_middleware])
+    app.router.add_post("/echo", handler)
+    setup_aiohttp_apispec(app, in_place=True, json_decoder=loads)
+
+    client = await aiohttp_client(app)
+    res = await client.post("/echo", json={"id": 1})
+    assert res.status == 200
+    assert await res.json() == {"data": {"id": 1}, "body": {"id": 1}}
+    assert len(decoded) == 1
+
+
+async def test_request_json_without_validation(aiohttp_client: AiohttpClient) -> None:
+    async def handler(request: web.Request) -> web.Response:
+        return web.json_response(await request_json(request))
+
+    app = web.Application()
+    app.router.add_post("/echo", handler)
+
+    client = await aiohttp_client(app)
+    res = await client.post("/echo", json={"id": 1})
+    assert await res.json() == {"id": 1}
+
+
+@pytest.mark.parametrize("setup", [True, False])
+@pytest.mark.parametrize("body", [b"", b"{invalid", b"\xff"])
+async def test_request_json_invalid_body(aiohttp_client: AiohttpClient, setup: bool, body: bytes) -> None:
+    async def handler(request: web.Request) -> web.Response:
+        return web.json_response(await request_json(request))
+
+    app = web.Application()
+    app.router.add_post("/echo", handler)
+    if setup:
+        setup_aiohttp_apispec(app, in_place=True)
+
+    client = await aiohttp_client(app)
+    res = await client.post("/echo", data=body, headers={"Content-Type": "application/json"})
+    assert res.status == 400
+    assert await res.json() == {"json": ["Invalid JSON body."]}
+
+
+class FilesSchema(m.Schema):
+    upload = m.fields.Raw(required=True)
+
+
+class FormSchema(m.Schema):
+    class Meta:
+        unknown = m.EXCLUDE
+
+    name = m.fields.Str(required=True)
+
+
+async def test_files_location(aiohttp_client: AiohttpClient) -> None:
+    @request_schema(FormSchema, location="form", put_into="form")
+    @request_schema(FilesSchema, location="files", put_into="files")
+    async def handler(request: web.Request) -> web.Response:
+        upload = request["files"]["upload"]
+        return web.json_response(
+            {"name": request["form"]["name"], "filename": upload.filename, "content": upload.file.read().decode()}
+        )
+
+    app = web.Application(middlewares=[validation_middleware])
+    app.router.add_post("/upload", handler)
+    setup_aiohttp_apispec(app, in_place=True)
+    client = await aiohttp_client(app)
+
+    form = FormData()
+    form.add_field("name", "max")
+    form.add_field("upload", b"file content", filename="test.txt")
+    res = await client.post("/upload", data=form)
+    assert res.status == 200
+    assert await res.json() == {"name": "max", "filename": "test.txt", "content": "file content"}
+
+    # Plain form fields are not files
+    res = await client.post("/upload", data={"name": "max", "upload": "not a file"})
+    assert res.status == 422
+    assert await res.json() == {"files": {"upload": ["Missing data for required field."]}}
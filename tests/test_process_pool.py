@@ -0,0 +1,106 @@
+import os
+from typing import Any
+
+import pytest
+from aiohttp import web
+from marshmallow import Schema, fields, post_load
+from pytest_aiohttp.plugin import AiohttpClient
+
+from aiohttp_apigami import ValidationProcessPool, request_schema
+from aiohttp_apigami.process_pool import ERROR, INVALID_JSON, OK
+from tests.fixtures import AppFactory
+
+
+class BulkSchema(Schema):
+    id = fields.Int(required=True)
+
+    @post_load
+    def add_pid(self, data: dict[str, Any], **kwargs: Any) -> dict[str, Any]:
+        data["pid"] = os.getpid()
+        return data
+
+
+@request_schema(BulkSchema(many=True), process_pool=True)
+async def bulk_handler(request: web.Request) -> web.Response:
+    return web.json_response(request["data"])
+
+
+@request_schema(BulkSchema(many=True))
+async def inline_handler(request: web.Request) -> web.Response:
+    return web.json_response(request["data"])
+
+
+def test_process_pool_json_location_only() -> None:
+    with pytest.raises(ValueError, match="`json` location only"):
+        request_schema(BulkSchema, location="querystring", process_pool=True)
+
+
+async def test_process_pool_validation(aiohttp_client: AiohttpClient, make_app: AppFactory) -> None:
+    pool = ValidationProcessPool(max_workers=1)
+    client = await aiohttp_client(
+        make_app(web.post("/bulk", bulk_handler), web.post("/inline", inline_handler), process_pool=pool)
+    )
+
+    res = await client.post("/bulk", json=[{"id": 1}, {"id": "2"}])
+    assert res.status == 200
+    data = await res.json()
+    assert [item["id"] for item in data] == [1, 2]
+    assert data[0]["pid"] != os.getpid()
+
+    # Routes without process_pool=True are validated inline
+    res = await client.post("/inline", json=[{"id": 1}])
+    assert res.status == 200
+    assert (await res.json())[0]["pid"] == os.getpid()
+
+
+async def test_process_pool_errors(aiohttp_client: AiohttpClient, make_app: AppFactory) -> None:
+    pool = ValidationProcessPool(max_workers=1)
+    client = await aiohttp_client(
+        make_app(web.post("/bulk", bulk_handler), web.post("/inline", inline_handler), process_pool=pool)
+    )
+
+    res = await client.post("/bulk", json=[{"id": 1}, {"id": "x"}])
+    assert res.status == 422
+    assert await res.json() == {"json": {"1": {"id": ["Not a valid integer."]}}}
+
+    res = await client.post("/bulk", data=b"[{", headers={"Content-Type": "application/json"})
+    assert res.status == 400
+    assert await res.json() == {"json": ["Invalid JSON body."]}
+
+
+async def test_process_pool_not_configured(aiohttp_client: AiohttpClient, make_app: AppFactory) -> None:
+    client = await aiohttp_client(
+        make_app(web.post("/bulk", bulk_handler), web.post("/inline", inline_handler), process_pool=None)
+    )
+
+    res = await client.post("/bulk", json=[{"id": 1}])
+    assert res.status == 200
+    assert (await res.json())[0]["pid"] == os.getpid()
+
+
+async def test_process_pool_load() -> None:
+    pool = ValidationProcessPool(max_workers=1)
+    schema = BulkSchema()
+    pool.add_schema(schema)
+
+    with pytest.raises(RuntimeError, match="not started"):
+        await pool.load(schema, b"{}")
+
+    await pool.start(lambda body: {"id": len(body)})
+    try:
+        # Schemas not known at the start are sent with the request
+        for s in (schema, BulkSchema()):
+            status, result = await pool.load(s, b"abc")
+            assert status == OK
+            assert result["id"] == 3
+
+        assert (await pool.load(schema, b""))[0] == ERROR
+    finally:
+        pool.shutdown()
+
+    pool = ValidationProcessPool(max_workers=1)
+    await pool.start(lambda body: body.decode("ascii"))
+    try:
+        assert (await pool.load(schema, "é".encode()))[0] == INVALID_JSON
+    finally:
+        pool.shutdown()
@@ -0,0 +1,161 @@
+import cProfile
+import os
+import pstats
+import time
+from pathlib import Path
+from typing import Any
+from unittest.mock import patch
+
+import pytest
+from aiohttp import web
+from marshmallow import Schema, fields, pre_load
+from pytest_aiohttp.plugin import AiohttpClient
+
+from aiohttp_apigami import ValidationProfiler, request_schema, setup_aiohttp_apispec
+from tests.fixtures import AppFactory
+
+TOKEN = "secret"
+AUTH = {"Authorization": f"Bearer {TOKEN}"}
+
+
+class ItemSchema(Schema):
+    name = fields.Str(required=True)
+
+    @pre_load
+    def slow_down(self, data: Any, **kwargs: Any) -> Any:
+        if data.get("name") == "slow":
+            time.sleep(0.02)
+        return data
+
+
+@request_schema(ItemSchema)
+async def handler(request: web.Request) -> web.Response:
+    return web.json_response(request["data"])
+
+
+def test_invalid_options(tmp_path: Path) -> None:
+    with pytest.raises(ValueError, match="every"):
+        ValidationProfiler(tmp_path, every=0)
+    with pytest.raises(ValueError, match="threshold"):
+        ValidationProfiler(tmp_path, threshold=-1)
+    with pytest.raises(ValueError, match="max_dumps"):
+        ValidationProfiler(tmp_path, max_dumps=0)
+    with pytest.raises(ValueError, match="profiler_url"):
+        setup_aiohttp_apispec(web.Application(), profiler=ValidationProfiler(tmp_path), profiler_url="/profiler")
+
+
+async def test_profile_every(aiohttp_client: AiohttpClient, make_app: AppFactory, tmp_path: Path) -> None:
+    profiler = ValidationProfiler(tmp_path / "stats", every=2, token=TOKEN)
+    client = await aiohttp_client(
+        make_app(web.post("/items/{id}", handler), profiler=profiler, profiler_url="/api/docs/profiler")
+    )
+
+    for i in range(5):
+        res = await client.post(f"/items/{i}", json={"name": "x"})
+        assert res.status == 200
+
+    # The stats are written in the executor
+    await profiler.wait()
+    assert len(profiler.dumps) == 2
+    for path in profiler.dumps:
+        assert os.path.basename(path).startswith("POST_items_id_-json-")
+        stats = pstats.Stats(path)
+        assert any(func[2] == "slow_down" for func in stats.stats)  # type: ignore[attr-defined]
+
+
+async def test_profile_after_slow_load(aiohttp_client: AiohttpClient, make_app: AppFactory, tmp_path: Path) -> None:
+    profiler = ValidationProfiler(tmp_path, threshold=0.01, token=TOKEN)
+    client = await aiohttp_client(
+        make_app(web.post("/items/{id}", handler), profiler=profiler, profiler_url="/api/docs/profiler")
+    )
+
+    await client.post("/items/1", json={"name": "x"})
+    assert not profiler.dumps
+    # The slow load arms the profiling of the next load of the route
+    await client.post("/items/1", json={"name": "slow"})
+    assert not profiler.dumps
+    await client.post("/items/2", json={"name": "x"})
+    await profiler.wait()
+    assert len(profiler.dumps) == 1
+    await client.post("/items/2", json={"name": "x"})
+    await profiler.wait()
+    assert len(profiler.dumps) == 1
+
+
+async def test_rotate_dumps(aiohttp_client: AiohttpClient, make_app: AppFactory, tmp_path: Path) -> None:
+    profiler = ValidationProfiler(tmp_path, every=1, max_dumps=2, token=TOKEN)
+    client = await aiohttp_client(
+        make_app(web.post("/items/{id}", handler), profiler=profiler, profiler_url="/api/docs/profiler")
+    )
+
+    for i in range(5):
+        await client.post(f"/items/{i}", json={"name": "x"})
+        await profiler.wait()
+
+    # The older files are deleted
+    assert len(profiler.dumps) == 2
+    assert sorted(str(path) for path in tmp_path.iterdir()) == sorted(profiler.dumps)
+
+
+async def test_overlapping_profiles(aiohttp_client: AiohttpClient, make_app: AppFactory, tmp_path: Path) -> None:
+    profiler = ValidationProfiler(tmp_path, every=1, token=TOKEN)
+    client = await aiohttp_client(
+        make_app(web.post("/items/{id}", handler), profiler=profiler, profiler_url="/api/docs/profiler")
+    )
+
+    # A load is being profiled in another thread, the load runs without the profiler
+    with profiler._profiling:
+        res = await client.post("/items/1", json={"name": "x"})
+        assert res.status == 200
+
+    # Another profiling tool is active
+    with patch.object(cProfile.Profile, "enable", side_effect=ValueError("Another profiling tool is already active")):
+        res = await client.post("/items/1", json={"name": "x"})
+        assert res.status == 200
+
+    await profiler.wait()
+    assert not profiler.dumps
+
+    res = await client.post("/items/1", json={"name": "x"})
+    assert res.status == 200
+    await profiler.wait()
+    assert len(profiler.dumps) == 1
+
+
+async def test_admin_endpoint(aiohttp_client: AiohttpClient, make_app: AppFactory, tmp_path: Path) -> None:
+    profiler = ValidationProfiler(tmp_path, enabled=False, token=TOKEN)
+    client = await aiohttp_client(
+        make_app(web.post("/items/{id}", handler), profiler=profiler, profiler_url="/api/docs/profiler")
+    )
+
+    res = await client.get("/api/docs/profiler")
+    assert res.status == 401
+    res = await client.get("/api/docs/profiler", headers={"Authorization": "Bearer wrong"})
+    assert res.status == 401
+
+    res = await client.get("/api/docs/profiler", headers=AUTH)
+    assert res.status == 200
+    assert await res.json() == {
+        "enabled": False,
+        "every": None,
+        "threshold": None,
+        "directory": str(tmp_path),
+        "dumps": [],
+    }
+
+    res = await client.post("/api/docs/profiler", headers=AUTH, json={"every": 0})
+    assert res.status == 422
+    assert "every" in await res.json()
+    res = await client.post("/api/docs/profiler", headers=AUTH, data="{")
+    assert res.status == 400
+
+    await client.post("/items/1", json={"name": "x"})
+    res = await client.post("/api/docs/profiler", headers=AUTH, json={"enabled": True, "every": 1})
+    assert res.status == 200
+    assert (await res.json())["every"] == 1
+
+    await client.post("/items/1", json={"name": "x"})
+    await profiler.wait()
+    res = await client.get("/api/docs/profiler", headers=AUTH)
+    assert (await res.json())["dumps"] == list(profiler.dumps)
+    assert len(profiler.dumps) == 1
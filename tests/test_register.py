@@ -1,8 +1,25 @@
+from typing import Any
+from unittest.mock import patch
+
 import pytest
 from aiohttp import web
-
-from aiohttp_apigami import AiohttpApiSpec, docs, request_schema, setup_aiohttp_apispec
-from aiohttp_apigami.constants import APISPEC_PARSER, APISPEC_VALIDATED_DATA_NAME
+from pytest_aiohttp.plugin import AiohttpClient
+
+from aiohttp_apigami import (
+    AiohttpApiSpec,
+    docs,
+    request_schema,
+    response_schema,
+    setup_aiohttp_apispec,
+    validation_middleware,
+)
+from aiohttp_apigami.constants import (
+    APISPEC_ENCODED_SPEC,
+    APISPEC_PARSER,
+    APISPEC_VALIDATED_DATA_NAME,
+    APISPEC_VALIDATION_PLANS,
+    SWAGGER_DICT,
+)
 from aiohttp_apigami.core import OpenApiVersion
 from aiohttp_apigami.swagger_ui import NAME_SWAGGER_SPEC
 from tests.fixtures.schemas import RequestSchema
@@ -418,3 +435,88 @@ async def test_setup_aiohttp_apispec_with_subapps() -> None:
     # If a new route needs to be added after setup:
     # 1. Either use in_place=False to register routes on startup
     # 2. Or manually re-register all routes by calling setup again
+
+
+@pytest.mark.parametrize("in_place", [True, False])
+async def test_setup_aiohttp_apispec_validation_only(aiohttp_client: AiohttpClient, in_place: bool) -> None:
+    """Test that the validation only mode validates requests without generating the spec."""
+
+    @request_schema(RequestSchema)
+    async def handler(request: web.Request) -> web.Response:
+        return web.json_response(request["data"])
+
+    app = web.Application(middlewares=[validation_middleware])
+    app.router.add_post("/test", handler)
+    api_spec = setup_aiohttp_apispec(app, in_place=in_place, validation_only=True)
+    client = await aiohttp_client(app)
+
+    assert APISPEC_VALIDATION_PLANS in app
+    assert SWAGGER_DICT not in app
+    assert APISPEC_ENCODED_SPEC not in app
+    # No APISpec is created until it is accessed
+    assert api_spec._spec is None
+    assert api_spec.swagger_dict()["paths"] == {}
+
+    res = await client.post("/test", json={"id": 1, "name": "name"})
+    assert res.status == 200
+    res = await client.post("/test", json={"id": "x"})
+    assert res.status == 422
+    res = await client.get("/api/docs/swagger.json")
+    assert res.status == 404
+
+
+def test_setup_aiohttp_apispec_validation_only_without_spec() -> None:
+    @request_schema(RequestSchema)
+    async def handler(request: web.Request) -> web.Response:
+        return web.json_response(request["data"])
+
+    app = web.Application()
+    app.router.add_post("/test", handler)
+    with patch.object(AiohttpApiSpec, "_make_spec") as make_spec:
+        setup_aiohttp_apispec(app, in_place=True, validation_only=True, warm_up=True, compact=True)
+    make_spec.assert_not_called()
+    assert any(plan is not None for plan in app[APISPEC_VALIDATION_PLANS]._plans.values())
+
+
+def test_setup_aiohttp_apispec_validation_only_with_docs_options() -> None:
+    with pytest.raises(ValueError, match="validation_only"):
+        setup_aiohttp_apispec(web.Application(), validation_only=True, swagger_path="/api/docs")
+
+
+@pytest.mark.parametrize("in_place", [True, False])
+async def test_setup_aiohttp_apispec_compact(aiohttp_client: AiohttpClient, in_place: bool) -> None:
+    """Test that the spec data is released after the spec is built, without affecting the validation."""
+
+    # Shared by the apps, as the module-level handlers of an app factory
+    @docs(summary="Test")
+    @request_schema(RequestSchema)
+    @response_schema(RequestSchema, 200, serialize=True)
+    async def handler(request: web.Request) -> Any:
+        return request["data"]
+
+    def make_app(compact: bool) -> tuple[web.Application, AiohttpApiSpec]:
+        app = web.Application(middlewares=[validation_middleware])
+        app.router.add_post("/test", handler)
+        return app, setup_aiohttp_apispec(app, in_place=in_place, compact=compact)
+
+    app, api_spec = make_app(compact=True)
+    client = await aiohttp_client(app)
+    res = await client.get("/api/docs/swagger.json")
+    compacted_spec = await res.json()
+    assert SWAGGER_DICT not in app
+    assert api_spec.swagger_dict()["paths"] == {}
+
+    # The docs data of the shared handler is kept for the apps built afterwards
+    app, _ = make_app(compact=True)
+    res = await (await aiohttp_client(app)).get("/api/docs/swagger.json")
+    assert await res.json() == compacted_spec
+    app, _ = make_app(compact=False)
+    res = await (await aiohttp_client(app)).get("/api/docs/swagger.json")
+    assert await res.json() == compacted_spec
+    assert compacted_spec["paths"]["/test"]["post"]["summary"] == "Test"
+
+    res = await client.post("/test", json={"id": 1, "name": "name"})
+    assert res.status == 200
+    assert (await res.json())["id"] == 1
+    res = await client.post("/test", json={"id": "x"})
+    assert res.status == 422
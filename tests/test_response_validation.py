@@ -0,0 +1,96 @@
+from typing import Any
+
+import pytest
+from aiohttp import web
+from marshmallow import Schema, fields
+from pytest_aiohttp.plugin import AiohttpClient
+
+from aiohttp_apigami import ResponseSampler, response_schema
+from tests.fixtures import AppFactory
+
+
+class ResultSchema(Schema):
+    id = fields.Int(required=True)
+    name = fields.Str()
+
+
+class ErrorSchema(Schema):
+    error = fields.Str(required=True)
+
+
+@response_schema(ResultSchema, 200)
+@response_schema(ErrorSchema, 400)
+async def handler(request: web.Request) -> web.Response:
+    if "error" in request.query:
+        return web.json_response({"message": request.query["error"]}, status=400)
+    return web.json_response({"id": request.query.get("id", "1"), "extra": True})
+
+
+@response_schema(ResultSchema, 200, sample_rate=0)
+async def unsampled_handler(request: web.Request) -> web.Response:
+    return web.json_response({})
+
+
+class ResultView(web.View):
+    @response_schema(ResultSchema, 200)
+    async def get(self) -> web.Response:
+        return web.Response(text="not json")
+
+
+def test_invalid_rates() -> None:
+    with pytest.raises(ValueError, match="rate"):
+        ResponseSampler(rate=1.5)
+    with pytest.raises(ValueError, match="sample_rate"):
+        response_schema(ResultSchema, sample_rate=-1)
+
+
+async def test_sampled_responses(
+    aiohttp_client: AiohttpClient, make_app: AppFactory, caplog: pytest.LogCaptureFixture
+) -> None:
+    sampler = ResponseSampler(rate=1)
+    client = await aiohttp_client(
+        make_app(
+            web.get("/items/{id}", handler),
+            web.get("/unsampled", unsampled_handler),
+            web.view("/view", ResultView),
+            response_sampler=sampler,
+        )
+    )
+
+    for params in ({"id": "2"}, {"id": "x"}, {"error": "bad"}):
+        res = await client.get("/items/1", params=params)
+        assert res.status in (200, 400)
+    await sampler.wait()
+
+    assert sampler.checked == {("GET /items/{id}", 200): 2, ("GET /items/{id}", 400): 1}
+    assert sampler.mismatches == {("GET /items/{id}", 200): 1, ("GET /items/{id}", 400): 1}
+    assert "Response of `GET /items/{id}` with status 200 doesn't match the schema" in caplog.text
+    assert "'error': ['Missing data for required field.']" in caplog.text
+
+    # Non-JSON responses are not checked
+    res = await client.get("/view")
+    assert res.status == 200
+    await sampler.wait()
+    assert sum(sampler.checked.values()) == 3
+
+
+async def test_sample_rate(aiohttp_client: AiohttpClient, make_app: AppFactory, monkeypatch: Any) -> None:
+    sampler = ResponseSampler(rate=0.5)
+    client = await aiohttp_client(
+        make_app(
+            web.get("/items/{id}", handler),
+            web.get("/unsampled", unsampled_handler),
+            web.view("/view", ResultView),
+            response_sampler=sampler,
+        )
+    )
+
+    monkeypatch.setattr("aiohttp_apigami.response_validation.random.random", lambda: 0.7)
+    await client.get("/items/1")
+    monkeypatch.setattr("aiohttp_apigami.response_validation.random.random", lambda: 0.3)
+    await client.get("/items/1")
+    # The route rate overrides the sampler rate
+    await client.get("/unsampled")
+    await sampler.wait()
+
+    assert sampler.checked == {("GET /items/{id}", 200): 1}
@@ -0,0 +1,197 @@
+import datetime
+import json
+import sys
+from dataclasses import dataclass, field
+from typing import Any
+from unittest.mock import patch
+
+import pytest
+from aiohttp import web
+from marshmallow import Schema, fields, post_dump
+from pytest_aiohttp.plugin import AiohttpClient
+
+from aiohttp_apigami import response_schema, setup_aiohttp_apispec, validation_middleware
+from aiohttp_apigami.serialization import compile_dumper, get_json_dumps
+
+
+class TagSchema(Schema):
+    name = fields.Str()
+    active = fields.Bool(dump_default=True)
+
+
+class NodeSchema(Schema):
+    name = fields.Str()
+    children = fields.List(fields.Nested(lambda: NodeSchema()))
+
+
+class HookSchema(Schema):
+    name = fields.Str()
+
+    @post_dump
+    def upper(self, data: dict[str, Any], **kwargs: Any) -> dict[str, Any]:
+        data["name"] = data["name"].upper()
+        return data
+
+
+class ItemSchema(Schema):
+    id = fields.Int()
+    name = fields.Str(data_key="title")
+    price = fields.Float(allow_none=True)
+    count = fields.Int(as_string=True)
+    raw = fields.Raw()
+    secret = fields.Str(load_only=True)
+    renamed = fields.Str(attribute="other_name")
+    tags = fields.List(fields.Nested(TagSchema))
+    main_tag = fields.Nested(TagSchema, only=("name",))
+    hooked = fields.Nested(HookSchema, many=True)
+    node = fields.Nested(NodeSchema)
+    scores = fields.List(fields.Int())
+    created = fields.DateTime()
+    dotted = fields.Str(attribute="meta.label")
+    method = fields.Method("get_method")
+    constant = fields.Constant("const")
+    default = fields.Str(dump_default=lambda: "default")
+
+    def get_method(self, obj: Any) -> str:
+        return "method"
+
+
+@dataclass
+class Tag:
+    name: str
+    active: Any = True
+
+
+@dataclass
+class Item:
+    id: Any
+    name: Any
+    price: Any = None
+    count: int = 0
+    raw: Any = None
+    secret: str = "secret"
+    other_name: str = "other"
+    tags: list[Tag] = field(default_factory=list)
+    main_tag: Tag | None = None
+    hooked: list[dict[str, str]] = field(default_factory=list)
+    node: dict[str, Any] | None = None
+    scores: list[Any] | None = None
+    created: datetime.datetime | None = None
+    meta: dict[str, str] = field(default_factory=lambda: {"label": "label"})
+
+
+ITEMS: list[Any] = [
+    Item(id=1, name="one"),
+    Item(
+        id="2",
+        name=b"two",
+        price=1,
+        count=3,
+        raw={"a": [1]},
+        tags=[Tag("x"), Tag("y", active="false"), Tag("z", active=[])],
+        main_tag=Tag("main"),
+        hooked=[{"name": "hook"}],
+        node={"name": "root", "children": [{"name": "leaf", "children": []}]},
+        scores=[1, "2", None],
+        created=datetime.datetime(2024, 1, 2, 3, 4, 5),
+    ),
+    {"id": 3, "name": "dict", "tags": [{"name": "t"}], "items": 1},
+    {},
+]
+
+
+@pytest.mark.parametrize("obj", ITEMS)
+def test_compiled_dumper_matches_dump(obj: Any) -> None:
+    schema = ItemSchema()
+    assert compile_dumper(schema)(obj) == schema.dump(obj)
+
+
+def test_compiled_dumper_many() -> None:
+    schema = ItemSchema(many=True)
+    assert compile_dumper(schema)(ITEMS) == schema.dump(ITEMS)
+
+    schema = ItemSchema(many=True, only=("id", "tags"))
+    assert compile_dumper(schema)(ITEMS) == schema.dump(ITEMS)
+
+
+def test_compiled_dumper_fallback() -> None:
+    schema = HookSchema()
+    assert compile_dumper(schema) == schema.dump
+
+
+def test_get_json_dumps() -> None:
+    assert get_json_dumps("json")({"a": 1}) == b'{"a": 1}'
+    assert json.loads(get_json_dumps("orjson")({"a": 1})) == {"a": 1}
+    assert json.loads(get_json_dumps("msgspec")({"a": 1})) == {"a": 1}
+
+    def dumps(obj: Any) -> bytes:
+        return b"{}"
+
+    assert get_json_dumps(dumps) is dumps
+
+    with pytest.raises(ValueError, match="json_encoder"):
+        get_json_dumps("unknown")
+
+
+@pytest.mark.parametrize("name", ["orjson", "msgspec"])
+def test_get_json_dumps_not_installed(name: str) -> None:
+    with patch.dict(sys.modules, {name: None}), pytest.raises(RuntimeError, match=f"{name} is required"):
+        get_json_dumps(name)
+
+
+def test_multiple_serialized_responses() -> None:
+    with pytest.raises(RuntimeError, match="Multiple serialized responses"):
+
+        @response_schema(TagSchema, 200, serialize=True)
+        @response_schema(TagSchema, 201, serialize=True)
+        async def handler(request: web.Request) -> web.Response:
+            return web.json_response({})
+
+
+@response_schema(TagSchema(many=True), 201, serialize=True)
+@response_schema(TagSchema, 400)
+async def list_handler(request: web.Request) -> Any:
+    if "error" in request.query:
+        return web.json_response({"name": "error"}, status=400)
+    return [Tag("a"), Tag("b", active=0)]
+
+
+@response_schema(TagSchema, serialize=True)
+async def dict_handler(request: web.Request) -> Any:
+    return {"name": "dict", "unknown": 1}
+
+
+@pytest.mark.parametrize("json_encoder", ["json", "orjson"])
+async def test_serialized_response(aiohttp_client: AiohttpClient, json_encoder: str) -> None:
+    app = web.Application(middlewares=[validation_middleware])
+    app.router.add_get("/tags", list_handler)
+    app.router.add_get("/dict", dict_handler)
+    setup_aiohttp_apispec(app, in_place=True, json_encoder=json_encoder)
+    # Plans of routes added later are compiled on the first request
+    app.router.add_get("/late", list_handler)
+    client = await aiohttp_client(app)
+
+    for path in ("/tags", "/late"):
+        res = await client.get(path)
+        assert res.status == 201
+        assert res.content_type == "application/json"
+        assert await res.json() == [{"name": "a", "active": True}, {"name": "b", "active": False}]
+
+    res = await client.get("/dict")
+    assert res.status == 200
+    assert await res.json() == {"name": "dict", "active": True}
+
+    # Responses returned by the handler are passed as is
+    res = await client.get("/tags", params={"error": "1"})
+    assert res.status == 400
+    assert await res.json() == {"name": "error"}
+
+
+def test_serialized_response_not_in_spec() -> None:
+    app = web.Application()
+    app.router.add_get("/tags", list_handler)
+    setup_aiohttp_apispec(app, in_place=True)
+
+    responses = app["swagger_dict"]["paths"]["/tags"]["get"]["responses"]
+    assert set(responses) == {"201", "400"}
+    assert "serialize" not in responses["201"]
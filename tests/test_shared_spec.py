@@ -0,0 +1,146 @@
+import gzip
+import json
+import logging
+import multiprocessing
+import time
+from pathlib import Path
+from typing import Any
+from unittest.mock import patch
+
+import pytest
+from pytest_aiohttp.plugin import AiohttpClient
+
+from aiohttp_apigami import AiohttpApiSpec
+from aiohttp_apigami.constants import APISPEC_ENCODED_SPEC, SWAGGER_DICT
+from aiohttp_apigami.data import EncodedSpec
+from aiohttp_apigami.shared_spec import load_or_build_shared_spec, open_shared_spec, write_shared_spec
+from tests.fixtures import DocsAppFactory
+
+
+async def test_spec_shared_between_apps(
+    aiohttp_client: AiohttpClient, tmp_path: Path, make_docs_app: DocsAppFactory
+) -> None:
+    path = tmp_path / "spec.bin"
+    expected = make_docs_app()
+
+    first = make_docs_app(shared_spec_path=path)
+    assert path.exists()
+    assert SWAGGER_DICT not in first
+
+    # The next workers map the file instead of building the spec
+    with patch.object(AiohttpApiSpec, "swagger_dict") as swagger_dict:
+        app = make_docs_app(shared_spec_path=path)
+    swagger_dict.assert_not_called()
+
+    encoded = app[APISPEC_ENCODED_SPEC]
+    assert isinstance(encoded.body, memoryview)
+    assert encoded.body == expected[APISPEC_ENCODED_SPEC].body
+    assert encoded.etag == expected[APISPEC_ENCODED_SPEC].etag
+
+    client = await aiohttp_client(app)
+    res = await client.get("/api/docs/swagger.json")
+    assert res.status == 200
+    assert await res.json() == expected[SWAGGER_DICT]
+
+    res = await client.get("/api/docs/swagger.json", headers={"If-None-Match": f'"{encoded.etag}"'})
+    assert res.status == 304
+
+
+async def test_precompressed_variants(
+    aiohttp_client: AiohttpClient, tmp_path: Path, make_docs_app: DocsAppFactory
+) -> None:
+    path = tmp_path / "spec.bin"
+    make_docs_app(shared_spec_path=path)
+    content = path.read_bytes()
+
+    # Compressed variants are not in the file yet
+    app = make_docs_app(shared_spec_path=path, precompress=True)
+    assert path.read_bytes() != content
+    assert "gzip" in app[APISPEC_ENCODED_SPEC].variants
+
+    client = await aiohttp_client(make_docs_app(shared_spec_path=path, precompress=True))
+    res = await client.get("/api/docs/swagger.json", headers={"Accept-Encoding": "gzip"}, auto_decompress=False)
+    assert res.headers["Content-Encoding"] == "gzip"
+    assert json.loads(gzip.decompress(await res.read())) == json.loads(bytes(app[APISPEC_ENCODED_SPEC].body))
+
+
+def test_outdated_file_is_rebuilt(tmp_path: Path, make_docs_app: DocsAppFactory) -> None:
+    path = tmp_path / "spec.bin"
+    make_docs_app(shared_spec_path=path)
+
+    app = make_docs_app("Other summary", shared_spec_path=path)
+    assert json.loads(bytes(app[APISPEC_ENCODED_SPEC].body))["paths"]["/v1/test"]["post"]["summary"] == "Other summary"
+    assert b"Other summary" in path.read_bytes()
+
+
+def test_invalid_file_is_rebuilt(
+    tmp_path: Path, caplog: pytest.LogCaptureFixture, make_docs_app: DocsAppFactory
+) -> None:
+    path = tmp_path / "spec.bin"
+    path.write_bytes(b"garbage")
+
+    with caplog.at_level(logging.WARNING):
+        app = make_docs_app(shared_spec_path=path)
+    assert "Failed to read shared API spec" in caplog.text
+    assert isinstance(app[APISPEC_ENCODED_SPEC].body, memoryview)
+
+
+def test_unwritable_file_is_served_from_memory(
+    tmp_path: Path, caplog: pytest.LogCaptureFixture, make_docs_app: DocsAppFactory
+) -> None:
+    with patch("aiohttp_apigami.shared_spec.write_shared_spec", side_effect=OSError("read-only")):
+        app = make_docs_app(shared_spec_path=tmp_path / "spec.bin")
+
+    assert "Failed to write shared API spec" in caplog.text
+    assert isinstance(app[APISPEC_ENCODED_SPEC].body, bytes)
+
+
+def test_open_shared_spec(tmp_path: Path) -> None:
+    path = tmp_path / "spec.bin"
+    encoded = EncodedSpec.from_dict({"paths": {}}, compress=True)
+    write_shared_spec(path, "fingerprint", encoded, compressed=True)
+
+    shared = open_shared_spec(path, "fingerprint", compressed=True)
+    assert shared == encoded
+    assert list(shared.variants) == list(encoded.variants)
+
+    assert open_shared_spec(path, "other", compressed=True) is None
+    assert open_shared_spec(path, "fingerprint") is None
+    assert open_shared_spec(tmp_path / "missing.bin", "fingerprint") is None
+
+
+def _load_in_worker(path: Path, builds: Path) -> None:
+    def build() -> EncodedSpec:
+        with builds.open("a") as f:
+            f.write("build\n")
+        # Long enough for the other workers to wait for the lock
+        time.sleep(0.2)
+        return EncodedSpec.from_dict({"paths": {}})
+
+    load_or_build_shared_spec(path, "fingerprint", build)
+
+
+def test_spec_built_once_by_concurrent_workers(tmp_path: Path) -> None:
+    path, builds = tmp_path / "spec.bin", tmp_path / "builds.txt"
+    context = multiprocessing.get_context("fork")
+    workers = [context.Process(target=_load_in_worker, args=(path, builds)) for _ in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(timeout=30)
+        assert worker.exitcode == 0
+
+    assert builds.read_text() == "build\n"
+    assert open_shared_spec(path, "fingerprint") is not None
+
+
+@pytest.mark.parametrize(
+    "options",
+    [
+        {"validation_only": True},
+        {"spec_cache_path": "spec.json"},
+    ],
+)
+def test_invalid_options(tmp_path: Path, options: dict[str, Any], make_docs_app: DocsAppFactory) -> None:
+    with pytest.raises(ValueError, match="shared_spec_path"):
+        make_docs_app(shared_spec_path=tmp_path / "spec.bin", **options)
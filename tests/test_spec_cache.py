@@ -0,0 +1,150 @@
+import json
+from pathlib import Path
+from typing import Any
+from unittest.mock import patch
+
+import pytest
+from aiohttp import web
+from marshmallow import Schema, fields
+
+from aiohttp_apigami import AiohttpApiSpec, request_schema
+from aiohttp_apigami.constants import SWAGGER_DICT
+from aiohttp_apigami.spec_cache import _describe, load_cached_spec, spec_fingerprint, store_cached_spec
+from tests.fixtures import DocsAppFactory
+
+
+class SelfReferencingSchema(Schema):
+    name = fields.Str()
+    children = fields.List(fields.Nested(lambda: SelfReferencingSchema()))
+
+
+def _fingerprint(app: web.Application, **options: Any) -> str:
+    api_spec = AiohttpApiSpec(title="Test API", version="1.0.0", **options)
+    return spec_fingerprint(api_spec._route_processor.get_routes(app), api_spec.spec)
+
+
+def test_fingerprint_is_stable(make_docs_app: DocsAppFactory) -> None:
+    assert _fingerprint(make_docs_app(setup=False)) == _fingerprint(make_docs_app(setup=False))
+
+
+def test_fingerprint_changes(make_docs_app: DocsAppFactory) -> None:
+    fingerprint = _fingerprint(make_docs_app(setup=False))
+
+    # Handler metadata
+    assert _fingerprint(make_docs_app("Other summary", setup=False)) != fingerprint
+
+    # APISpec options
+    assert _fingerprint(make_docs_app(setup=False), openapi_version="3.0.3") != fingerprint
+    assert _fingerprint(make_docs_app(setup=False), prefix="/api") != fingerprint
+
+    # Route table
+    app = make_docs_app(setup=False)
+    app.router.add_put("/v1/test", next(iter(app.router.routes())).handler)
+    assert _fingerprint(app) != fingerprint
+
+
+def test_fingerprint_schema_meta() -> None:
+    def make_app(**meta: Any) -> web.Application:
+        schema = type(
+            "MetaSchema", (Schema,), {"name": fields.Str(), "Meta": type("Meta", (), {"register": False, **meta})}
+        )
+
+        @request_schema(schema)
+        async def handler(request: web.Request) -> web.Response:
+            return web.json_response({})
+
+        app = web.Application()
+        app.router.add_post("/v1/meta", handler)
+        return app
+
+    fingerprint = _fingerprint(make_app(description="Pet"))
+    assert _fingerprint(make_app(description="Pet")) == fingerprint
+    # Written into the spec by apispec
+    assert _fingerprint(make_app(description="Other pet")) != fingerprint
+    assert _fingerprint(make_app(description="Pet", title="Pet")) != fingerprint
+
+
+def test_fingerprint_self_referencing_schema() -> None:
+    @request_schema(SelfReferencingSchema)
+    async def handler(request: web.Request) -> web.Response:
+        return web.json_response({})
+
+    app = web.Application()
+    app.router.add_post("/v1/tree", handler)
+    assert _fingerprint(app) == _fingerprint(app)
+
+
+class Marker:
+    def __init__(self, value: Any):
+        self.value = value
+
+
+class SlottedMarker:
+    __slots__ = ("value",)
+
+
+def test_describe_objects_without_repr(caplog: pytest.LogCaptureFixture) -> None:
+    # Described without the memory address of the default repr
+    assert _describe(Marker(1)) == _describe(Marker(1))
+    assert _describe(Marker(1)) != _describe(Marker(2))
+    assert "0x" not in json.dumps(_describe(Marker(Marker("nested"))))
+
+    # Self-referencing objects
+    marker = Marker(None)
+    marker.value = marker
+    assert _describe(marker) == _describe(marker)
+
+    assert _describe(SlottedMarker()) == _describe(SlottedMarker())
+    assert "can't be described for the API spec cache" in caplog.text
+
+
+def test_load_cached_spec(tmp_path: Path) -> None:
+    path = tmp_path / "cache" / "spec.json"
+    assert load_cached_spec(path, "fingerprint") is None
+
+    store_cached_spec(path, "fingerprint", {"swagger": "2.0"})
+    assert load_cached_spec(path, "fingerprint") == {"swagger": "2.0"}
+    assert load_cached_spec(path, "other") is None
+
+    # No temporary files are left
+    assert [p.name for p in path.parent.iterdir()] == ["spec.json"]
+
+
+def test_load_cached_spec_corrupted(tmp_path: Path, caplog: pytest.LogCaptureFixture) -> None:
+    path = tmp_path / "spec.json"
+    path.write_text("{not json")
+
+    assert load_cached_spec(path, "fingerprint") is None
+    assert "Failed to read API spec cache" in caplog.text
+
+
+def test_store_cached_spec_error(tmp_path: Path, caplog: pytest.LogCaptureFixture) -> None:
+    path = tmp_path / "spec.json"
+    with patch("aiohttp_apigami.spec_cache.os.replace", side_effect=OSError("read-only")):
+        store_cached_spec(path, "fingerprint", {})
+
+    assert "Failed to write API spec cache" in caplog.text
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_register_with_spec_cache(tmp_path: Path, make_docs_app: DocsAppFactory) -> None:
+    path = tmp_path / "spec.json"
+
+    # The first start generates the spec and writes the cache
+    app = make_docs_app(setup=False)
+    AiohttpApiSpec(app=app, title="Test API", version="1.0.0", in_place=True, spec_cache_path=path)
+    assert "/v1/test" in app[SWAGGER_DICT]["paths"]
+    assert json.loads(path.read_text())["spec"] == app[SWAGGER_DICT]
+
+    # The next start loads the spec without generating it
+    app = make_docs_app(setup=False)
+    with patch("aiohttp_apigami.route_processor.RouteProcessor.register_route") as register_route:
+        AiohttpApiSpec(app=app, title="Test API", version="1.0.0", in_place=True, spec_cache_path=path)
+    register_route.assert_not_called()
+    assert app[SWAGGER_DICT] == json.loads(path.read_text())["spec"]
+
+    # Changed routes invalidate the cache
+    app = make_docs_app("Changed summary", setup=False)
+    AiohttpApiSpec(app=app, title="Test API", version="1.0.0", in_place=True, spec_cache_path=path)
+    assert app[SWAGGER_DICT]["paths"]["/v1/test"]["post"]["summary"] == "Changed summary"
+    assert json.loads(path.read_text())["spec"] == app[SWAGGER_DICT]
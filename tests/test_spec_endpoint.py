@@ -0,0 +1,60 @@
+import hashlib
+import json
+
+from pytest_aiohttp.plugin import AiohttpClient
+
+from aiohttp_apigami.constants import APISPEC_ENCODED_SPEC, SWAGGER_DICT
+from aiohttp_apigami.data import EncodedSpec
+from aiohttp_apigami.spec_endpoint import SPEC_CACHE_CONTROL
+from tests.fixtures import DocsAppFactory
+
+
+def test_encoded_spec_from_dict() -> None:
+    spec = {"swagger": "2.0", "paths": {}}
+    encoded = EncodedSpec.from_dict(spec)
+
+    assert json.loads(bytes(encoded.body)) == spec
+    assert encoded.etag == hashlib.sha256(encoded.body).hexdigest()
+    assert EncodedSpec.from_dict(dict(spec)) == encoded
+
+
+def test_spec_encoded_once_on_register(make_docs_app: DocsAppFactory) -> None:
+    app = make_docs_app(url="/api/docs/swagger.json")
+
+    encoded = app[APISPEC_ENCODED_SPEC]
+    assert json.loads(bytes(encoded.body)) == app[SWAGGER_DICT]
+
+
+async def test_spec_served_from_encoded_bytes(aiohttp_client: AiohttpClient, make_docs_app: DocsAppFactory) -> None:
+    app = make_docs_app(url="/api/docs/swagger.json")
+    client = await aiohttp_client(app)
+
+    res = await client.get("/api/docs/swagger.json")
+    assert res.status == 200
+    assert res.content_type == "application/json"
+    assert res.headers["ETag"] == f'"{app[APISPEC_ENCODED_SPEC].etag}"'
+    assert res.headers["Cache-Control"] == SPEC_CACHE_CONTROL
+    assert await res.read() == app[APISPEC_ENCODED_SPEC].body
+
+
+async def test_spec_not_modified(aiohttp_client: AiohttpClient, make_docs_app: DocsAppFactory) -> None:
+    app = make_docs_app(url="/api/docs/swagger.json")
+    client = await aiohttp_client(app)
+
+    res = await client.get("/api/docs/swagger.json")
+    etag = res.headers["ETag"]
+
+    for if_none_match in (etag, f"W/{etag}", f'"other", {etag}', "*"):
+        res = await client.get("/api/docs/swagger.json", headers={"If-None-Match": if_none_match})
+        assert res.status == 304
+        assert res.headers["ETag"] == etag
+        assert await res.read() == b""
+
+
+async def test_spec_etag_mismatch(aiohttp_client: AiohttpClient, make_docs_app: DocsAppFactory) -> None:
+    app = make_docs_app(url="/api/docs/swagger.json")
+    client = await aiohttp_client(app)
+
+    res = await client.get("/api/docs/swagger.json", headers={"If-None-Match": '"outdated"'})
+    assert res.status == 200
+    assert await res.json() == app[SWAGGER_DICT]
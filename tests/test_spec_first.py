@@ -0,0 +1,371 @@
+import json
+import logging
+from pathlib import Path
+from typing import Any
+from unittest.mock import patch
+
+import marshmallow as m
+import pytest
+import yaml
+from aiohttp import web
+from pytest_aiohttp.plugin import AiohttpClient
+
+from aiohttp_apigami import AiohttpApiSpec, setup_aiohttp_apispec, validation_middleware
+from aiohttp_apigami.constants import APISPEC_ENCODED_SPEC, APISPEC_VALIDATION_PLANS, SWAGGER_DICT
+from aiohttp_apigami.export import export_spec
+from aiohttp_apigami.spec_first import SchemaCompiler
+
+DOCUMENT: dict[str, Any] = {
+    "openapi": "3.0.3",
+    "info": {"title": "Pets", "version": "1.0.0"},
+    "paths": {
+        "/v1/pets": {
+            "get": {
+                "parameters": [
+                    {"name": "limit", "in": "query", "schema": {"type": "integer", "minimum": 1, "maximum": 100}},
+                    {"name": "tag", "in": "query", "schema": {"type": "array", "items": {"type": "string"}}},
+                ],
+                "responses": {"200": {"description": "Pets"}},
+            },
+            "post": {
+                "operationId": "createPet",
+                "parameters": [{"$ref": "#/components/parameters/RequestId"}],
+                "requestBody": {
+                    "required": True,
+                    "content": {"application/json": {"schema": {"$ref": "#/components/schemas/NewPet"}}},
+                },
+                "responses": {
+                    "201": {
+                        "description": "Created",
+                        "content": {"application/json": {"schema": {"$ref": "#/components/schemas/Pet"}}},
+                    }
+                },
+            },
+        },
+        "/v1/pets/{pet_id}": {
+            "parameters": [{"name": "pet_id", "in": "path", "schema": {"type": "integer"}}],
+            "get": {"operationId": "getPet", "responses": {"200": {"description": "Pet"}}},
+            "put": {
+                "operationId": "PetView.put",
+                "requestBody": {
+                    "content": {"application/json": {"schema": {"$ref": "#/components/schemas/NewPet"}}},
+                },
+                "responses": {"200": {"description": "Pet"}},
+            },
+        },
+        "/v1/unbound": {"get": {"responses": {"200": {"description": "Nothing"}}}},
+    },
+    "components": {
+        "parameters": {
+            "RequestId": {"name": "X-Request-Id", "in": "header", "required": True, "schema": {"type": "string"}},
+        },
+        "schemas": {
+            "NewPet": {
+                "type": "object",
+                "required": ["name"],
+                "additionalProperties": False,
+                "properties": {
+                    "id": {"type": "integer", "readOnly": True},
+                    "name": {"type": "string", "minLength": 1, "pattern": "[a-z]"},
+                    "kind": {"type": "string", "enum": ["cat", "dog"], "default": "cat"},
+                    "born": {"type": "string", "format": "date", "nullable": True},
+                    "owner": {"$ref": "#/components/schemas/Owner"},
+                },
+            },
+            "Pet": {
+                "allOf": [
+                    {"$ref": "#/components/schemas/NewPet"},
+                    {"type": "object", "required": ["id"], "properties": {"id": {"type": "integer"}}},
+                ]
+            },
+            "Owner": {
+                "type": "object",
+                "properties": {
+                    "email": {"type": "string", "format": "email"},
+                    "friends": {"type": "array", "items": {"$ref": "#/components/schemas/Owner"}, "maxItems": 2},
+                },
+            },
+        },
+    },
+}
+
+
+class PetView(web.View):
+    async def get(self) -> web.Response:
+        return web.json_response({"pet_id": self.request["match_info"]["pet_id"]})
+
+    async def put(self) -> web.Response:
+        return web.json_response({"pet_id": self.request.match_info["pet_id"], **self.request["data"]})
+
+
+def create_app(document_path: Path | str, **options: Any) -> web.Application:
+    async def list_pets(request: web.Request) -> web.Response:
+        return web.json_response(request["querystring"])
+
+    async def add_pet(request: web.Request) -> web.Response:
+        data = request["data"]
+        return web.json_response(
+            {
+                **data,
+                "born": data["born"] and data["born"].isoformat(),
+                "request_id": request["headers"]["X-Request-Id"],
+            }
+        )
+
+    app = web.Application(middlewares=[validation_middleware])
+    app.router.add_get("/pets", list_pets)
+    # Matched by the route name
+    app.router.add_post("/animals", add_pet, name="createPet")
+    app.router.add_view("/pets/{pet_id}", PetView)
+    setup_aiohttp_apispec(app, prefix="/v1", spec_first_path=document_path, **options)
+    return app
+
+
+@pytest.fixture
+def document_path(tmp_path: Path) -> Path:
+    path = tmp_path / "openapi.yaml"
+    path.write_text(yaml.dump(DOCUMENT))
+    return path
+
+
+async def test_spec_first(aiohttp_client: AiohttpClient, document_path: Path) -> None:
+    with patch.object(AiohttpApiSpec, "swagger_dict") as swagger_dict:
+        app = create_app(document_path)
+        client = await aiohttp_client(app)
+    swagger_dict.assert_not_called()
+    assert SWAGGER_DICT not in app
+
+    # The document is served as the spec
+    res = await client.get("/api/docs/swagger.json")
+    assert await res.json() == DOCUMENT
+
+    res = await client.get("/pets", params=[("limit", "10"), ("tag", "a"), ("tag", "b")])
+    assert await res.json() == {"limit": 10, "tag": ["a", "b"]}
+    res = await client.get("/pets", params={"limit": "0"})
+    assert res.status == 422
+
+
+async def test_request_body(aiohttp_client: AiohttpClient, document_path: Path) -> None:
+    client = await aiohttp_client(create_app(document_path))
+    headers = {"X-Request-Id": "abc"}
+
+    res = await client.post("/animals", json={"name": "rex", "born": None}, headers=headers)
+    assert res.status == 200
+    assert await res.json() == {"name": "rex", "kind": "cat", "born": None, "request_id": "abc"}
+
+    res = await client.post("/animals", json={"name": "rex", "born": "2020-01-02"}, headers=headers)
+    assert (await res.json())["born"] == "2020-01-02"
+
+    invalid_bodies = [
+        {},
+        {"name": ""},
+        {"name": "REX"},
+        {"name": "rex", "kind": "cow"},
+        {"name": "rex", "id": 1},
+        {"name": "rex", "extra": 1},
+        {"name": "rex", "owner": {"email": "invalid"}},
+        {"name": "rex", "owner": {"friends": [{}, {}, {}]}},
+        {"name": "rex", "owner": {"friends": [{"friends": [{"email": "invalid"}]}]}},
+    ]
+    for body in invalid_bodies:
+        res = await client.post("/animals", json=body, headers=headers)
+        assert res.status == 422, body
+
+    # Required header
+    res = await client.post("/animals", json={"name": "rex"})
+    assert res.status == 422
+
+
+async def test_class_based_view(aiohttp_client: AiohttpClient, document_path: Path) -> None:
+    client = await aiohttp_client(create_app(document_path))
+
+    res = await client.get("/pets/1")
+    assert await res.json() == {"pet_id": 1}
+    res = await client.get("/pets/one")
+    assert res.status == 422
+
+    # Matched by the `View.method` operation ID
+    res = await client.put("/pets/1", json={"name": "rex"})
+    assert await res.json() == {"pet_id": "1", "name": "rex", "kind": "cat"}
+    res = await client.put("/pets/1", json={"name": 1})
+    assert res.status == 422
+
+
+def test_unbound_operations(document_path: Path, caplog: pytest.LogCaptureFixture) -> None:
+    with caplog.at_level(logging.WARNING):
+        app = create_app(document_path, in_place=True)
+    assert "Operation GET /v1/unbound of the API spec has no route" in caplog.text
+
+    # GET and POST of /pets, GET and PUT of the view
+    plans = app[APISPEC_VALIDATION_PLANS]
+    assert sum(plan is not None for plan in plans._plans.values()) == 4
+
+
+def test_operation_id_matching(document_path: Path, caplog: pytest.LogCaptureFixture) -> None:
+    async def getPet(request: web.Request) -> web.Response:
+        return web.json_response({})
+
+    app = web.Application()
+    # Not matched by the handler name
+    app.router.add_get("/pet", getPet)
+    # Not matched by the route name of the other method, nor by the HEAD route of the named GET one
+    app.router.add_get("/animals", getPet, name="createPet")
+    setup_aiohttp_apispec(app, prefix="/v1", spec_first_path=document_path, in_place=True)
+    assert not any(app[APISPEC_VALIDATION_PLANS]._plans.values())
+
+    # Ambiguous operation IDs are not bound
+    document = {
+        **DOCUMENT,
+        "paths": {
+            "/v1/a": {"get": {"operationId": "getPet", "responses": {}}},
+            "/v1/b": {"get": {"operationId": "getPet", "responses": {}}},
+        },
+    }
+    document_path.write_text(yaml.dump(document))
+    app = web.Application()
+    app.router.add_get("/pet", getPet, name="getPet")
+    with caplog.at_level(logging.WARNING):
+        setup_aiohttp_apispec(app, prefix="/v1", spec_first_path=document_path, in_place=True)
+    assert "Route GET /v1/pet matches the operations GET /v1/a, GET /v1/b by operationId" in caplog.text
+    assert not any(app[APISPEC_VALIDATION_PLANS]._plans.values())
+
+
+async def test_handler_on_several_routes(aiohttp_client: AiohttpClient, document_path: Path) -> None:
+    async def pets(request: web.Request) -> web.Response:
+        return web.json_response(request.get("querystring"))
+
+    # The same function is bound to the validated operation and to the unvalidated one
+    app = web.Application(middlewares=[validation_middleware])
+    app.router.add_get("/pets", pets)
+    app.router.add_get("/unbound", pets)
+    setup_aiohttp_apispec(app, prefix="/v1", spec_first_path=document_path)
+    client = await aiohttp_client(app)
+
+    res = await client.get("/pets", params={"limit": "0"})
+    assert res.status == 422
+    res = await client.get("/unbound", params={"limit": "0"})
+    assert res.status == 200
+
+
+def test_response_schemas(tmp_path: Path) -> None:
+    compiler = SchemaCompiler(DOCUMENT)
+    schemas = compiler.response_schemas(DOCUMENT["paths"]["/v1/pets"]["post"])
+    schema, rate = schemas[201]
+    assert rate is None
+    # Read-only properties are in the response schemas
+    assert schema.load({"id": 1, "name": "rex"}) == {"id": 1, "name": "rex", "kind": "cat"}
+    with pytest.raises(m.ValidationError):
+        schema.load({"name": "rex"})
+
+
+def test_swagger_document(aiohttp_client: AiohttpClient, tmp_path: Path) -> None:
+    document = {
+        "swagger": "2.0",
+        "info": {"title": "Pets", "version": "1.0.0"},
+        "paths": {
+            "/pets": {
+                "post": {
+                    "parameters": [
+                        {"name": "dry_run", "in": "query", "type": "boolean", "default": False},
+                        {"name": "body", "in": "body", "schema": {"$ref": "#/definitions/Pet"}},
+                    ],
+                    "responses": {"200": {"description": "Pet", "schema": {"$ref": "#/definitions/Pet"}}},
+                }
+            }
+        },
+        "definitions": {
+            "Pet": {
+                "type": "object",
+                "required": ["name"],
+                "properties": {"name": {"type": "string"}, "age": {"type": "integer", "x-nullable": True}},
+            }
+        },
+    }
+    path = tmp_path / "swagger.json"
+    path.write_text(json.dumps(document))
+
+    async def add_pet(request: web.Request) -> web.Response:
+        return web.json_response({})
+
+    app = web.Application()
+    app.router.add_post("/pets", add_pet)
+    setup_aiohttp_apispec(app, spec_first_path=path, in_place=True)
+    assert json.loads(bytes(app[APISPEC_ENCODED_SPEC].body)) == document
+
+    (plan,) = (plan for plan in app[APISPEC_VALIDATION_PLANS]._plans.values() if plan is not None)
+    query, body = plan.steps
+    assert (query.location, query.put_into) == ("querystring", "querystring")
+    assert query.schema.load({}) == {"dry_run": False}
+    assert body.location == "json"
+    # Unknown properties are allowed by default, and kept
+    assert body.schema.load({"name": "rex", "age": None, "color": "red"}) == {
+        "name": "rex",
+        "age": None,
+        "color": "red",
+    }
+    with pytest.raises(m.ValidationError):
+        # Strict types of the body
+        body.schema.load({"name": "rex", "age": "1"})
+
+
+@pytest.mark.parametrize(
+    "json_schema",
+    [
+        {"type": "integer", "exclusiveMinimum": True, "minimum": 0},
+        {"type": "integer", "exclusiveMinimum": 0},
+        {"type": ["integer", "null"], "exclusiveMinimum": 0},
+    ],
+)
+def test_exclusive_limits(json_schema: dict[str, Any]) -> None:
+    field = SchemaCompiler({}).field(json_schema)
+    assert field.deserialize(1) == 1
+    with pytest.raises(m.ValidationError):
+        field.deserialize(0)
+
+
+@pytest.mark.parametrize(
+    ("json_schema", "valid", "invalid"),
+    [
+        ({"type": "integer"}, 1, "1"),
+        ({"type": "number"}, 1.5, "1.5"),
+        ({"type": "number"}, 1, True),
+        ({"type": "boolean"}, True, "true"),
+        ({"type": "boolean"}, False, 0),
+    ],
+)
+def test_strict_types(json_schema: dict[str, Any], valid: Any, invalid: Any) -> None:
+    field = SchemaCompiler({}).field(json_schema)
+    assert field.deserialize(valid) == valid
+    with pytest.raises(m.ValidationError):
+        field.deserialize(invalid)
+    # The parameters are converted from strings
+    assert SchemaCompiler({}).field(json_schema, strict=False).deserialize(str(valid).lower()) == valid
+
+
+@pytest.mark.parametrize(
+    ("json_schema", "error"),
+    [
+        ({"$ref": "other.yaml#/Pet"}, "Only local references"),
+        ({"$ref": "#/components/schemas/Missing"}, "Invalid reference"),
+        ({"$ref": "#/components/schemas/Loop"}, "Circular reference"),
+    ],
+)
+def test_invalid_references(json_schema: dict[str, Any], error: str) -> None:
+    compiler = SchemaCompiler({"components": {"schemas": {"Loop": {"$ref": "#/components/schemas/Loop"}}}})
+    with pytest.raises(ValueError, match=error):
+        compiler.field(json_schema)
+
+
+def test_export(document_path: Path) -> None:
+    assert export_spec(create_app(document_path)) == DOCUMENT
+
+
+def test_validation_only(document_path: Path) -> None:
+    app = create_app(document_path, validation_only=True, in_place=True)
+    assert APISPEC_ENCODED_SPEC not in app
+    assert app[APISPEC_VALIDATION_PLANS]
+
+
+def test_spec_first_with_other_spec_files(document_path: Path) -> None:
+    with pytest.raises(ValueError, match="`prebuilt_spec_path` and `spec_first_path` can't be used together"):
+        create_app(document_path, prebuilt_spec_path="spec.json")
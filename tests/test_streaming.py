@@ -0,0 +1,138 @@
+import json
+from collections.abc import AsyncIterator
+from typing import Any
+from unittest.mock import patch
+
+import pytest
+from aiohttp import web
+from marshmallow import Schema, fields
+from pytest_aiohttp.plugin import AiohttpClient
+
+from aiohttp_apigami import request_schema, setup_aiohttp_apispec, validation_middleware
+from aiohttp_apigami.streaming import NotAJSONArray, _decoder, iter_json_array
+
+
+class ChunkedReader:
+    def __init__(self, data: bytes, chunk_size: int):
+        self._chunks = [data[i : i + chunk_size] for i in range(0, len(data), chunk_size)]
+
+    async def read(self, n: int = -1) -> bytes:
+        return self._chunks.pop(0) if self._chunks else b""
+
+    @property
+    def remaining(self) -> int:
+        return len(self._chunks)
+
+
+async def _decode(data: bytes, chunk_size: int = 1) -> list[Any]:
+    return [item async for item in iter_json_array(ChunkedReader(data, chunk_size))]
+
+
+class ItemSchema(Schema):
+    id = fields.Int(required=True)
+    name = fields.Str()
+
+
+@request_schema(ItemSchema(many=True), stream=True)
+async def stream_handler(request: web.Request) -> web.StreamResponse:
+    items: AsyncIterator[dict[str, Any]] = request["data"]
+    ids = [item["id"] async for item in items]
+    return web.json_response(ids)
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 1024])
+@pytest.mark.parametrize(
+    "value",
+    [
+        [],
+        [1, 23, -4.5e10, True, None, "x"],
+        [{"id": 1, "name": "é, ]"}, {"nested": [[], {}]}],
+        ["€" * 10, 12345678901234567890],
+    ],
+)
+async def test_iter_json_array(value: list[Any], chunk_size: int) -> None:
+    data = json.dumps(value, ensure_ascii=False).encode()
+    assert await _decode(data, chunk_size) == value
+    assert await _decode(b" \n" + json.dumps(value, indent=2).encode() + b"\n", chunk_size) == value
+
+
+@pytest.mark.parametrize("data", [b"", b"  ", b'{"id": 1}', b"1"])
+async def test_iter_json_array_not_array(data: bytes) -> None:
+    with pytest.raises(NotAJSONArray):
+        await _decode(data)
+
+
+@pytest.mark.parametrize("data", [b"[1", b"[1 2]", b"[1,]", b"[1] 2", b"[\xff]", b'["\xe2\x82"]'])
+async def test_iter_json_array_invalid(data: bytes) -> None:
+    with pytest.raises(ValueError):
+        await _decode(data)
+
+
+async def test_iter_json_array_large_item_decoded_once() -> None:
+    value = [{"id": 1, "text": 'a\\"]}' * 10000, "items": list(range(10000))}, 2]
+    reader = ChunkedReader(json.dumps(value).encode(), 100)
+    with patch("aiohttp_apigami.streaming._decoder", wraps=_decoder) as decoder:
+        assert [item async for item in iter_json_array(reader, chunk_size=100)] == value
+    assert decoder.raw_decode.call_count == 2
+
+
+@pytest.mark.parametrize("data", [b'[{"id": 1, "name": x', b'[{"id": [1}', b'[{"a": {"b": 1]}'])
+async def test_iter_json_array_fails_early(data: bytes) -> None:
+    # The rest of the body is not read
+    reader = ChunkedReader(data + b" " * 1000 + b"]", 10)
+    with pytest.raises(ValueError):
+        await anext(aiter(iter_json_array(reader, chunk_size=10)))
+    assert reader.remaining > 90
+
+
+async def test_iter_json_array_yields_items_early() -> None:
+    items = iter_json_array(ChunkedReader(b'[{"id": 1}, {"id": 2', 4))
+    assert await anext(items) == {"id": 1}
+    with pytest.raises(ValueError):
+        await anext(items)
+
+
+def test_stream_options() -> None:
+    with pytest.raises(ValueError, match="many=True"):
+        request_schema(ItemSchema, stream=True)
+    with pytest.raises(ValueError, match="many=True"):
+        request_schema(ItemSchema(many=True), location="form", stream=True)
+    with pytest.raises(ValueError, match="can't be used together"):
+        request_schema(ItemSchema(many=True), stream=True, process_pool=True)
+
+
+@pytest.fixture
+async def client(aiohttp_client: AiohttpClient) -> Any:
+    app = web.Application(middlewares=[validation_middleware])
+    app.router.add_post("/stream", stream_handler)
+    setup_aiohttp_apispec(app, in_place=True)
+    return await aiohttp_client(app)
+
+
+async def test_stream_validation(client: Any) -> None:
+    items = [{"id": i, "name": f"item {i}"} for i in range(1000)]
+    res = await client.post("/stream", json=items)
+    assert res.status == 200
+    assert await res.json() == list(range(1000))
+
+    res = await client.post("/stream", json=[])
+    assert res.status == 200
+    assert await res.json() == []
+
+
+async def test_stream_validation_errors(client: Any) -> None:
+    res = await client.post("/stream", json=[{"id": 1}, {"id": "x"}, {}])
+    assert res.status == 422
+    assert await res.json() == {"json": {"1": {"id": ["Not a valid integer."]}}}
+
+    res = await client.post("/stream", json={"id": 1})
+    assert res.status == 422
+    assert await res.json() == {"json": {"_schema": ["Invalid input type."]}}
+
+    res = await client.post("/stream")
+    assert res.status == 422
+    assert await res.json() == {"json": {"_schema": ["Invalid input type."]}}
+
+    res = await client.post("/stream", data=b'[{"id": 1}, {', headers={"Content-Type": "application/json"})
+    assert res.status == 400
+    assert await res.json() == {"json": ["Invalid JSON body."]}
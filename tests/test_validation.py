@@ -0,0 +1,261 @@
+import json
+from collections.abc import AsyncIterator
+from typing import Any
+from unittest.mock import patch
+
+import pytest
+from aiohttp import web
+from pytest_aiohttp.plugin import AiohttpClient
+
+from aiohttp_apigami import request_schema, setup_aiohttp_apispec, validation_middleware
+from aiohttp_apigami.constants import APISPEC_VALIDATION_PLANS
+from aiohttp_apigami.parser import ApigamiParser
+from aiohttp_apigami.validation import ValidationPlan
+from tests.fixtures import AppFactory
+from tests.fixtures.schemas import RequestSchema
+
+
+@request_schema(RequestSchema)
+async def validated_handler(request: web.Request) -> web.Response:
+    return web.json_response(request["data"])
+
+
+async def plain_handler(request: web.Request) -> web.Response:
+    return web.json_response({"plain": True})
+
+
+class ViewClass(web.View):
+    @request_schema(RequestSchema, location="querystring")
+    async def get(self) -> web.Response:
+        return web.json_response(self.request["data"])
+
+    async def delete(self) -> web.Response:
+        return web.json_response({"deleted": True})
+
+
+ROUTES = [
+    web.post("/validated", validated_handler),
+    web.get("/plain", plain_handler),
+    web.view("/view", ViewClass),
+]
+
+
+def _route(app: web.Application, path: str, method: str = "*") -> web.AbstractRoute:
+    return next(
+        route
+        for route in app.router.routes()
+        if route.method == method and route.resource is not None and route.resource.canonical == path
+    )
+
+
+def test_plans_compiled_on_register(make_app: AppFactory) -> None:
+    app = make_app(*ROUTES)
+    plans = app[APISPEC_VALIDATION_PLANS]
+
+    plan = plans.get((_route(app, "/validated", "POST"), "POST"))
+    assert isinstance(plan, ValidationPlan)
+    assert [step.location for step in plan.steps] == ["json"]
+    assert plan.data_name == "data"
+
+    view_plan = plans.get((_route(app, "/view"), "GET"))
+    assert isinstance(view_plan, ValidationPlan)
+    assert [step.location for step in view_plan.steps] == ["querystring"]
+
+    # Handlers without schemas have no plan
+    assert (_route(app, "/plain", "GET"), "GET") in plans
+    assert plans.get((_route(app, "/plain", "GET"), "GET")) is None
+    assert (_route(app, "/view"), "DELETE") in plans
+    assert plans.get((_route(app, "/view"), "DELETE")) is None
+
+
+async def test_middleware_uses_compiled_plans(aiohttp_client: AiohttpClient, make_app: AppFactory) -> None:
+    client = await aiohttp_client(make_app(*ROUTES))
+
+    with patch("aiohttp_apigami.middlewares._get_handler_spec") as get_handler_spec:
+        res = await client.post("/validated", json={"id": 1, "name": "max"})
+        assert res.status == 200
+        assert await res.json() == {"id": 1, "name": "max"}
+
+        res = await client.get("/view", params={"id": "2"})
+        assert res.status == 200
+        assert await res.json() == {"id": 2}
+
+        res = await client.delete("/view")
+        assert res.status == 200
+
+        res = await client.get("/plain")
+        assert res.status == 200
+
+    get_handler_spec.assert_not_called()
+
+
+async def test_plan_compiled_for_route_added_after_register(
+    aiohttp_client: AiohttpClient, make_app: AppFactory
+) -> None:
+    app = make_app(*ROUTES)
+    route = app.router.add_put("/late", validated_handler)
+    plans = app[APISPEC_VALIDATION_PLANS]
+    assert (route, "PUT") not in plans
+
+    client = await aiohttp_client(app)
+    res = await client.put("/late", json={"id": 1})
+    assert res.status == 200
+    assert await res.json() == {"id": 1}
+    assert isinstance(plans.get((route, "PUT")), ValidationPlan)
+
+
+async def test_unmatched_routes_are_not_cached(aiohttp_client: AiohttpClient, make_app: AppFactory) -> None:
+    app = make_app(*ROUTES)
+    plans = app[APISPEC_VALIDATION_PLANS]
+    compiled = len(plans)
+
+    client = await aiohttp_client(app)
+    for _ in range(3):
+        res = await client.get("/unknown")
+        assert res.status == 404
+    res = await client.post("/plain")
+    assert res.status == 405
+
+    assert len(plans) == compiled
+
+
+async def test_app_without_setup(aiohttp_client: AiohttpClient, make_app: AppFactory) -> None:
+    sub_app = make_app(*ROUTES)
+    # The middleware is on the parent app, which is not set up
+    app = web.Application(middlewares=[validation_middleware])
+    app.router.add_get("/plain", plain_handler)
+    app.add_subapp("/sub", sub_app)
+    client = await aiohttp_client(app)
+
+    res = await client.get("/plain")
+    assert res.status == 200
+    assert await res.json() == {"plain": True}
+
+    # The set up sub-app is validated by its own middleware
+    res = await client.post("/sub/validated", json={"id": "invalid"})
+    assert res.status == 422
+
+
+@request_schema(RequestSchema, max_body_size=100)
+async def limited_handler(request: web.Request) -> web.Response:
+    return web.json_response(request["data"])
+
+
+@request_schema(RequestSchema(many=True), stream=True, max_body_size=100)
+async def limited_stream_handler(request: web.Request) -> web.Response:
+    return web.json_response([item async for item in request["data"]])
+
+
+@request_schema(RequestSchema, location="form", max_body_size=100)
+async def limited_form_handler(request: web.Request) -> web.Response:
+    return web.json_response(request["data"])
+
+
+@request_schema(RequestSchema, location="form", max_body_size=300)
+async def limited_multipart_handler(request: web.Request) -> web.Response:
+    return web.json_response(request["data"])
+
+
+@request_schema(RequestSchema(many=True), stream=True)
+async def stream_handler(request: web.Request) -> web.Response:
+    return web.json_response(len([item async for item in request["data"]]))
+
+
+async def _chunks(data: bytes) -> AsyncIterator[bytes]:
+    for i in range(0, len(data), 10):
+        yield data[i : i + 10]
+
+
+def test_invalid_max_body_size() -> None:
+    with pytest.raises(ValueError, match="max_body_size"):
+        request_schema(RequestSchema, max_body_size=0)
+
+
+def test_plan_max_body_size() -> None:
+    @request_schema(RequestSchema, max_body_size=100)
+    @request_schema(RequestSchema, location="querystring", max_body_size=50)
+    @request_schema(RequestSchema, location="headers")
+    async def handler(request: web.Request) -> web.Response:
+        return web.json_response({})
+
+    plan = ValidationPlan(handler.__schemas__, ApigamiParser(), "data")  # type: ignore[attr-defined]
+    assert plan.max_body_size == 50
+    assert ValidationPlan([], ApigamiParser(), "data").max_body_size is None
+
+
+@pytest.mark.parametrize(("path", "payload"), [("/limited", {"name": "x" * 100}), ("/stream", [{"name": "x" * 100}])])
+async def test_max_body_size(aiohttp_client: AiohttpClient, path: str, payload: Any) -> None:
+    app = web.Application(middlewares=[validation_middleware])
+    app.router.add_post("/limited", limited_handler)
+    app.router.add_post("/stream", limited_stream_handler)
+    setup_aiohttp_apispec(app, in_place=True)
+    client = await aiohttp_client(app)
+
+    body = json.dumps(payload).encode()
+    headers = {"Content-Type": "application/json"}
+
+    # Rejected by Content-Length before reading the body
+    with patch.object(ApigamiParser, "load_location_data") as load_location_data:
+        res = await client.post(path, data=body, headers=headers)
+    assert res.status == 413
+    load_location_data.assert_not_called()
+
+    # Chunked body is aborted while reading
+    res = await client.post(path, data=_chunks(body), headers=headers)
+    assert res.status == 413
+
+    # Bodies under the limit are validated as usual
+    res = await client.post(path, data=_chunks(body[:20] + body[-3:]), headers=headers)
+    assert res.status == 200
+
+
+async def test_max_body_size_form(aiohttp_client: AiohttpClient) -> None:
+    app = web.Application(middlewares=[validation_middleware])
+    app.router.add_post("/form", limited_form_handler)
+    setup_aiohttp_apispec(app, in_place=True)
+    client = await aiohttp_client(app)
+    headers = {"Content-Type": "application/x-www-form-urlencoded"}
+
+    res = await client.post("/form", data=_chunks(b"id=1&name=" + b"x" * 100), headers=headers)
+    assert res.status == 413
+    res = await client.post("/form", data=_chunks(b"id=1&name=x"), headers=headers)
+    assert res.status == 200
+    assert await res.json() == {"id": 1, "name": "x"}
+
+
+def _multipart(name: bytes) -> bytes:
+    return (
+        b'--b\r\nContent-Disposition: form-data; name="id"\r\n\r\n1\r\n'
+        b'--b\r\nContent-Disposition: form-data; name="name"\r\n\r\n' + name + b"\r\n--b--\r\n"
+    )
+
+
+async def test_max_body_size_multipart(aiohttp_client: AiohttpClient) -> None:
+    app = web.Application(middlewares=[validation_middleware])
+    app.router.add_post("/form", limited_multipart_handler)
+    setup_aiohttp_apispec(app, in_place=True)
+    client = await aiohttp_client(app)
+    headers = {"Content-Type": "multipart/form-data; boundary=b"}
+
+    # Chunked upload is aborted while parsing
+    res = await client.post("/form", data=_chunks(_multipart(b"x" * 300)), headers=headers)
+    assert res.status == 413
+    res = await client.post("/form", data=_multipart(b"x" * 300), headers=headers)
+    assert res.status == 413
+
+    res = await client.post("/form", data=_chunks(_multipart(b"x")), headers=headers)
+    assert res.status == 200
+    assert await res.json() == {"id": 1, "name": "x"}
+
+
+async def test_stream_without_max_body_size(aiohttp_client: AiohttpClient) -> None:
+    # Streamed bodies are not limited by the app `client_max_size`
+    app = web.Application(middlewares=[validation_middleware], client_max_size=100)
+    app.router.add_post("/stream", stream_handler)
+    setup_aiohttp_apispec(app, in_place=True)
+    client = await aiohttp_client(app)
+
+    body = json.dumps([{"id": i, "name": "x" * 10} for i in range(100)]).encode()
+    res = await client.post("/stream", data=_chunks(body), headers={"Content-Type": "application/json"})
+    assert res.status == 200
+    assert await res.json() == 100
@@ -0,0 +1,98 @@
+from typing import Any
+
+from aiohttp import web
+from marshmallow import Schema, fields, pre_load
+from pytest_aiohttp.plugin import AiohttpClient
+
+from aiohttp_apigami import request_schema, setup_aiohttp_apispec, validation_middleware
+from aiohttp_apigami.warmup import minimal_payload, warm_up_handlers
+
+loaded: list[Any] = []
+
+
+class LabelSchema(Schema):
+    name = fields.Str(required=True)
+
+
+class ItemSchema(Schema):
+    id = fields.UUID(required=True)
+    name = fields.Str(required=True, data_key="Name")
+    price = fields.Decimal()
+    count = fields.Int()
+    created = fields.DateTime()
+    tags = fields.List(fields.Nested("LabelSchema"))
+    owner = fields.Nested(LabelSchema, many=True)
+    parent = fields.Nested(lambda: ItemSchema())
+    extra = fields.Dict()
+    computed = fields.Str(dump_only=True)
+
+    @pre_load
+    def record(self, data: Any, **kwargs: Any) -> Any:
+        loaded.append(data)
+        return data
+
+
+class FailingSchema(Schema):
+    name = fields.Str()
+
+    @pre_load
+    def fail(self, data: Any, **kwargs: Any) -> Any:
+        raise KeyError("name")
+
+
+def test_minimal_payload() -> None:
+    payload = minimal_payload(ItemSchema())
+    assert set(payload) == {"id", "Name", "price", "count", "created", "tags", "owner", "parent", "extra"}
+    assert payload["tags"] == [{"name": ""}]
+    assert payload["owner"] == [{"name": ""}]
+    # Self references are cut off
+    depth = 0
+    parent = payload
+    while parent["parent"] is not None:
+        parent = parent["parent"]
+        depth += 1
+    assert depth == 5
+    assert minimal_payload(LabelSchema(many=True)) == [{"name": ""}]
+
+    # The synthesized payload is valid for the fields without validators
+    del payload["parent"]
+    ItemSchema().load(payload)
+
+
+async def test_warm_up(aiohttp_client: AiohttpClient) -> None:
+    example = {"id": "00000000-0000-0000-0000-000000000001", "Name": "example"}
+
+    @request_schema(ItemSchema, example=example)
+    @request_schema(FailingSchema, location="querystring")
+    async def handler(request: web.Request) -> web.Response:
+        return web.Response(text="ok")
+
+    app = web.Application(middlewares=[validation_middleware])
+    app.router.add_post("/items", handler)
+    loaded.clear()
+    api_spec = setup_aiohttp_apispec(app, in_place=True, swagger_path="/api/docs", warm_up=True)
+
+    # The example and the synthesized payload, the failing hook doesn't fail the registration
+    assert loaded[0] == example
+    assert loaded[1]["Name"] == ""
+    assert api_spec._swagger_ui._index_page is None
+
+    # The index page is rendered on startup
+    client = await aiohttp_client(app)
+    assert api_spec._swagger_ui._index_page is not None
+    res = await client.get("/api/docs")
+    assert res.status == 200
+
+
+def test_warm_up_shared_schemas() -> None:
+    schema = LabelSchema()
+
+    @request_schema(schema)
+    async def first(request: web.Request) -> web.Response:
+        raise NotImplementedError
+
+    @request_schema(schema)
+    async def second(request: web.Request) -> web.Response:
+        raise NotImplementedError
+
+    assert warm_up_handlers([first, second]) == 1